@@ -0,0 +1,137 @@
+"""Add composite, partial and unique indexes for hot API queries
+
+Revision ID: add_hot_query_indexes
+Revises: add_users_leaderboard_index
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+import logging
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_hot_query_indexes'
+down_revision = 'add_users_leaderboard_index'
+branch_labels = None
+depends_on = None
+
+logger = logging.getLogger('alembic.runtime.migration')
+
+# (имя, таблица, колонки, unique, условие частичного индекса)
+INDEXES = [
+    ('ix_projects_status_created_at', 'projects', ['status', 'created_at', 'id'], False, None),
+    ('ix_projects_customer_id_created_at', 'projects', ['customer_id', 'created_at'], False, None),
+    ('ix_projects_assignee_id', 'projects', ['assignee_id'], False, 'assignee_id IS NOT NULL'),
+    ('ix_tasks_project_id_order', 'tasks', ['project_id', 'order'], False, None),
+    ('ix_tasks_assignee_id', 'tasks', ['assignee_id'], False, 'assignee_id IS NOT NULL'),
+    ('uq_applications_project_id_student_id', 'applications', ['project_id', 'student_id'], True, None),
+    ('ix_applications_student_id_created_at', 'applications', ['student_id', 'created_at'], False, None),
+    ('uq_ratings_project_id_reviewer_id', 'ratings', ['project_id', 'reviewer_id'], True, None),
+    ('ix_ratings_reviewee_id_created_at', 'ratings', ['reviewee_id', 'created_at'], False, None),
+]
+
+# Дубли, которые API отсекал только проверкой перед вставкой (гонка двух
+# запросов): (таблица, ключ уникальности, какую запись оставить — первую
+# по этому порядку). Из заявок — принятую, иначе последнюю; из отзывов — последний
+DUPLICATES = [
+    ('applications', ['project_id', 'student_id'], "(status = 'ACCEPTED') DESC, id DESC"),
+    ('ratings', ['project_id', 'reviewer_id'], 'id DESC'),
+]
+
+# Полный пересчёт user_rating_stats и users.rating_score по таблице ratings
+# (снимок app.services.ratings на момент миграции: код приложения меняется,
+# а миграция должна выполняться так же, как при написании)
+REBUILD_RATING_STATS = [
+    "DELETE FROM user_rating_stats",
+    """
+    INSERT INTO user_rating_stats (
+        user_id, ratings_count, score_sum,
+        quality_sum, quality_count,
+        communication_sum, communication_count,
+        deadline_sum, deadline_count,
+        updated_at
+    )
+    SELECT
+        reviewee_id, count(*), sum(score),
+        coalesce(sum(quality_score), 0), count(quality_score),
+        coalesce(sum(communication_score), 0), count(communication_score),
+        coalesce(sum(deadline_score), 0), count(deadline_score),
+        CURRENT_TIMESTAMP
+    FROM ratings
+    GROUP BY reviewee_id
+    """,
+    """
+    UPDATE users SET rating_score = (
+        SELECT score_sum * 1.0 / ratings_count
+        FROM user_rating_stats
+        WHERE user_rating_stats.user_id = users.id
+    )
+    WHERE id IN (SELECT user_id FROM user_rating_stats)
+    """,
+]
+
+
+def _column_list(columns) -> str:
+    # "order" — зарезервированное слово
+    return ', '.join(f'"{column}"' for column in columns)
+
+
+def _delete_duplicates(table, columns, keep_order) -> int:
+    """Удалить дубли ключа, оставив первую запись по keep_order; удалённые пишутся в журнал"""
+    key = _column_list(columns)
+    duplicates = (
+        f"SELECT id, {key}, first_value(id) OVER w AS kept_id, row_number() OVER w AS duplicate_rank "
+        f"FROM {table} WINDOW w AS (PARTITION BY {key} ORDER BY {keep_order})"
+    )
+    bind = op.get_bind()
+    rows = bind.execute(sa.text(f"SELECT * FROM ({duplicates}) ranked WHERE duplicate_rank > 1")).all()
+    for row in rows:
+        logger.warning(
+            "Deleting duplicate %s id=%s (%s), keeping id=%s",
+            table, row.id, ', '.join(f'{column}={getattr(row, column)}' for column in columns), row.kept_id,
+        )
+    if rows:
+        bind.execute(sa.text(
+            f"DELETE FROM {table} WHERE id IN "
+            f"(SELECT id FROM ({duplicates}) ranked WHERE duplicate_rank > 1)"
+        ))
+    return len(rows)
+
+
+def upgrade() -> None:
+    deleted = {table: _delete_duplicates(table, columns, keep_order) for table, columns, keep_order in DUPLICATES}
+    if deleted['ratings']:
+        # Удалённые отзывы входили в user_rating_stats и users.rating_score
+        for statement in REBUILD_RATING_STATS:
+            op.execute(statement)
+    
+    if op.get_bind().dialect.name == 'postgresql':
+        # Строим индексы без блокировки записи; autocommit_block фиксирует удаление дублей
+        with op.get_context().autocommit_block():
+            for name, table, columns, unique, where in INDEXES:
+                op.execute(
+                    f"CREATE {'UNIQUE ' if unique else ''}INDEX CONCURRENTLY IF NOT EXISTS {name} "
+                    f"ON {table} ({_column_list(columns)})"
+                    + (f" WHERE {where}" if where else "")
+                )
+    else:
+        for name, table, columns, unique, where in INDEXES:
+            op.create_index(
+                name,
+                table,
+                columns,
+                unique=unique,
+                sqlite_where=sa.text(where) if where else None,
+            )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == 'postgresql':
+        with op.get_context().autocommit_block():
+            for name, _, _, _, _ in reversed(INDEXES):
+                op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+    else:
+        for name, table, _, _, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table)
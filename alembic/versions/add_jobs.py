@@ -0,0 +1,56 @@
+"""Add jobs table for the background LLM job queue
+
+Revision ID: add_jobs
+Revises: add_hot_query_indexes
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_jobs'
+down_revision = 'add_hot_query_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'jobs',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('kind', sa.Enum('GENERATE_SPEC', 'ESTIMATE', name='jobkind'), nullable=False),
+        sa.Column(
+            'status',
+            sa.Enum('PENDING', 'RUNNING', 'SUCCEEDED', 'FAILED', name='jobstatus'),
+            nullable=False,
+        ),
+        sa.Column('project_id', sa.Integer(), sa.ForeignKey('projects.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('created_by_id', sa.Integer(), sa.ForeignKey('users.id'), nullable=False),
+        sa.Column('idempotency_key', sa.String(255), nullable=True),
+        sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('max_attempts', sa.Integer(), nullable=False),
+        sa.Column('run_after', sa.DateTime(), nullable=False),
+        sa.Column('locked_at', sa.DateTime(), nullable=True),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+    )
+    op.create_index('ix_jobs_id', 'jobs', ['id'])
+    op.create_index('ix_jobs_status_run_after', 'jobs', ['status', 'run_after'])
+    op.create_index(
+        'uq_jobs_created_by_id_idempotency_key',
+        'jobs',
+        ['created_by_id', 'idempotency_key'],
+        unique=True,
+    )
+    op.create_index('ix_jobs_project_id_kind', 'jobs', ['project_id', 'kind'])
+
+
+def downgrade() -> None:
+    op.drop_table('jobs')
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute('DROP TYPE IF EXISTS jobstatus')
+        op.execute('DROP TYPE IF EXISTS jobkind')
@@ -0,0 +1,41 @@
+"""Add llm_cache table and jobs.bypass_cache
+
+Revision ID: add_llm_cache
+Revises: add_jobs
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_llm_cache'
+down_revision = 'add_jobs'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'llm_cache',
+        sa.Column('key', sa.String(64), primary_key=True),
+        sa.Column('namespace', sa.String(255), nullable=False),
+        sa.Column('output', sa.Text(), nullable=False),
+        sa.Column('hits', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('expires_at', sa.DateTime(), nullable=False),
+        sa.Column('last_used_at', sa.DateTime(), nullable=False),
+    )
+    op.create_index('ix_llm_cache_expires_at', 'llm_cache', ['expires_at'])
+    op.create_index('ix_llm_cache_last_used_at', 'llm_cache', ['last_used_at'])
+    
+    op.add_column(
+        'jobs',
+        sa.Column('bypass_cache', sa.Boolean(), nullable=False, server_default=sa.false()),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('jobs', 'bypass_cache')
+    op.drop_table('llm_cache')
@@ -0,0 +1,50 @@
+"""Add full-text search vector to projects
+
+Revision ID: add_project_search
+Revises: add_assignee_to_projects
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+
+
+# Выражение зафиксировано на момент миграции: правки поиска в приложении
+# не должны менять уже применённую схему
+SEARCH_VECTOR = """
+    setweight(to_tsvector('russian', coalesce(title, '')), 'A') ||
+    setweight(to_tsvector('russian', coalesce(description, '')), 'B') ||
+    setweight(to_tsvector('russian', coalesce(requirements, '')), 'C')
+"""
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_project_search'
+down_revision = 'add_assignee_to_projects'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Только PostgreSQL: в SQLite FTS5-таблица создаётся при старте приложения
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    
+    # Генерируемая колонка пересчитывается самой базой при INSERT/UPDATE
+    op.execute(
+        "ALTER TABLE projects ADD COLUMN IF NOT EXISTS search_vector tsvector "
+        f"GENERATED ALWAYS AS ({SEARCH_VECTOR}) STORED"
+    )
+    # GIN индекс строим без блокировки записи
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_projects_search_vector "
+            "ON projects USING gin (search_vector)"
+        )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    
+    op.execute("DROP INDEX IF EXISTS ix_projects_search_vector")
+    op.execute("ALTER TABLE projects DROP COLUMN IF EXISTS search_vector")
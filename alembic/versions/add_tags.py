@@ -0,0 +1,106 @@
+"""Add tags with project_tags and user_skills, backfilled from JSON columns
+
+Revision ID: add_tags
+Revises: add_project_search
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+import json
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_tags'
+down_revision = 'add_project_search'
+branch_labels = None
+depends_on = None
+
+
+def _parse_tags(value):
+    """JSON-список из Text-колонки (битые значения пропускаем)"""
+    if not value:
+        return []
+    try:
+        data = json.loads(value)
+    except (ValueError, TypeError):
+        return []
+    if not isinstance(data, list):
+        return []
+    return [item for item in data if isinstance(item, str) and item.strip()]
+
+
+def _normalize(name):
+    return " ".join(name.split()).lower()[:100]
+
+
+def upgrade() -> None:
+    tags = op.create_table(
+        'tags',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('name', sa.String(length=100), nullable=False),
+        sa.Column('slug', sa.String(length=100), nullable=False),
+    )
+    op.create_index('ix_tags_id', 'tags', ['id'])
+    op.create_index('ix_tags_slug', 'tags', ['slug'], unique=True)
+    
+    project_tags = op.create_table(
+        'project_tags',
+        sa.Column('project_id', sa.Integer(), sa.ForeignKey('projects.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('tag_id', sa.Integer(), sa.ForeignKey('tags.id', ondelete='CASCADE'), primary_key=True),
+    )
+    op.create_index('ix_project_tags_tag_id_project_id', 'project_tags', ['tag_id', 'project_id'])
+    
+    user_skills = op.create_table(
+        'user_skills',
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('tag_id', sa.Integer(), sa.ForeignKey('tags.id', ondelete='CASCADE'), primary_key=True),
+    )
+    op.create_index('ix_user_skills_tag_id_user_id', 'user_skills', ['tag_id', 'user_id'])
+    
+    # Переносим существующие JSON-списки в таблицы связей
+    bind = op.get_bind()
+    project_rows = bind.execute(sa.text(
+        "SELECT id, tech_stack FROM projects WHERE tech_stack IS NOT NULL"
+    )).all()
+    user_rows = bind.execute(sa.text(
+        "SELECT id, skills FROM users WHERE skills IS NOT NULL"
+    )).all()
+    
+    names = {}
+    project_links = []
+    user_links = []
+    for rows, links in ((project_rows, project_links), (user_rows, user_links)):
+        for owner_id, value in rows:
+            slugs = set()
+            for name in _parse_tags(value):
+                slug = _normalize(name)
+                names.setdefault(slug, " ".join(name.split())[:100])
+                slugs.add(slug)
+            links.extend((owner_id, slug) for slug in slugs)
+    
+    if not names:
+        return
+    
+    op.bulk_insert(tags, [{'slug': slug, 'name': name} for slug, name in names.items()])
+    tag_ids = dict(bind.execute(sa.text("SELECT slug, id FROM tags")).all())
+    
+    if project_links:
+        op.bulk_insert(project_tags, [
+            {'project_id': owner_id, 'tag_id': tag_ids[slug]} for owner_id, slug in project_links
+        ])
+    if user_links:
+        op.bulk_insert(user_skills, [
+            {'user_id': owner_id, 'tag_id': tag_ids[slug]} for owner_id, slug in user_links
+        ])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_user_skills_tag_id_user_id', table_name='user_skills')
+    op.drop_table('user_skills')
+    op.drop_index('ix_project_tags_tag_id_project_id', table_name='project_tags')
+    op.drop_table('project_tags')
+    op.drop_index('ix_tags_slug', table_name='tags')
+    op.drop_index('ix_tags_id', table_name='tags')
+    op.drop_table('tags')
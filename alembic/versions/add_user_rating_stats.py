@@ -0,0 +1,71 @@
+"""Add user_rating_stats with running rating aggregates
+
+Revision ID: add_user_rating_stats
+Revises: add_tags
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_user_rating_stats'
+down_revision = 'add_tags'
+branch_labels = None
+depends_on = None
+
+# Заполнение user_rating_stats и users.rating_score по таблице ratings
+# (снимок app.services.ratings на момент миграции: код приложения меняется,
+# а миграция должна выполняться так же, как при написании)
+REBUILD_RATING_STATS = [
+    """
+    INSERT INTO user_rating_stats (
+        user_id, ratings_count, score_sum,
+        quality_sum, quality_count,
+        communication_sum, communication_count,
+        deadline_sum, deadline_count,
+        updated_at
+    )
+    SELECT
+        reviewee_id, count(*), sum(score),
+        coalesce(sum(quality_score), 0), count(quality_score),
+        coalesce(sum(communication_score), 0), count(communication_score),
+        coalesce(sum(deadline_score), 0), count(deadline_score),
+        CURRENT_TIMESTAMP
+    FROM ratings
+    GROUP BY reviewee_id
+    """,
+    """
+    UPDATE users SET rating_score = (
+        SELECT score_sum * 1.0 / ratings_count
+        FROM user_rating_stats
+        WHERE user_rating_stats.user_id = users.id
+    )
+    WHERE id IN (SELECT user_id FROM user_rating_stats)
+    """,
+]
+
+
+def upgrade() -> None:
+    op.create_table(
+        'user_rating_stats',
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('ratings_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('score_sum', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('quality_sum', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('quality_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('communication_sum', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('communication_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('deadline_sum', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('deadline_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+    )
+    
+    # Заполняем агрегаты по уже оставленным отзывам
+    for statement in REBUILD_RATING_STATS:
+        op.execute(statement)
+
+
+def downgrade() -> None:
+    op.drop_table('user_rating_stats')
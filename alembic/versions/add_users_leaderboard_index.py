@@ -0,0 +1,38 @@
+"""Add composite users index for leaderboard and student list
+
+Revision ID: add_users_leaderboard_index
+Revises: add_user_rating_stats
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_users_leaderboard_index'
+down_revision = 'add_user_rating_stats'
+branch_labels = None
+depends_on = None
+
+INDEX_NAME = 'ix_users_role_active_rating'
+INDEX_COLUMNS = ['role', 'is_active', 'rating_score', 'id']
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name == 'postgresql':
+        # Строим индекс без блокировки записи в users
+        with op.get_context().autocommit_block():
+            op.execute(
+                f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {INDEX_NAME} "
+                f"ON users ({', '.join(INDEX_COLUMNS)})"
+            )
+    else:
+        op.create_index(INDEX_NAME, 'users', INDEX_COLUMNS)
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == 'postgresql':
+        with op.get_context().autocommit_block():
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {INDEX_NAME}")
+    else:
+        op.drop_index(INDEX_NAME, table_name='users')
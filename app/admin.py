@@ -6,6 +6,7 @@ from sqladmin import Admin, ModelView
 from sqladmin.authentication import AuthenticationBackend
 from starlette.requests import Request
 
+from app.api.deps import invalidate_cached_user
 from app.core.database import engine
 from app.core.security import verify_password
 from app.models.user import User, UserRole
@@ -91,6 +92,13 @@ class UserAdmin(ModelView, model=User):
     # Экспорт
     can_export = True
     export_types = ["csv", "json"]
+    
+    async def after_model_change(self, data, model, is_created, request) -> None:
+        # Сбрасываем кэш авторизации (например, после снятия is_active)
+        invalidate_cached_user(model.id)
+    
+    async def after_model_delete(self, model, request) -> None:
+        invalidate_cached_user(model.id)
 
 
 class ProjectAdmin(ModelView, model=Project):
@@ -3,7 +3,7 @@ API роутеры
 """
 from fastapi import APIRouter
 
-from app.api import auth, users, projects, ratings
+from app.api import auth, users, projects, ratings, exports, events, jobs
 
 api_router = APIRouter()
 
@@ -13,3 +13,6 @@ api_router.include_router(projects.router, prefix="/projects", tags=["projects"]
 api_router.include_router(ratings.router, prefix="/ratings", tags=["ratings"])
 
 
+api_router.include_router(exports.router, prefix="/exports", tags=["exports"])
+api_router.include_router(events.router, prefix="/events", tags=["events"])
+api_router.include_router(jobs.router, prefix="/jobs", tags=["jobs"])
@@ -10,15 +10,16 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import settings
 from app.core.database import get_db
-from app.core.security import verify_password, get_password_hash, create_access_token
-from app.models.user import User
+from app.core.query_budget import QueryBudget
+from app.core.security import verify_password_async, get_password_hash_async, create_access_token
+from app.models.user import User, UserRole
 from app.schemas.user import UserCreate, UserResponse, Token
 
 
 router = APIRouter()
 
 
-@router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
+@router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED, dependencies=[Depends(QueryBudget(3))])
 async def register(
     user_data: UserCreate,
     db: AsyncSession = Depends(get_db)
@@ -26,6 +27,13 @@ async def register(
     """
     Регистрация нового пользователя
     """
+    # Администраторов создают через админ-панель
+    if user_data.role == UserRole.ADMIN:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Регистрация администраторов недоступна"
+        )
+    
     # Проверяем, что email не занят
     result = await db.execute(select(User).where(User.email == user_data.email))
     if result.scalar_one_or_none():
@@ -37,7 +45,7 @@ async def register(
     # Создаём пользователя
     user = User(
         email=user_data.email,
-        hashed_password=get_password_hash(user_data.password),
+        hashed_password=await get_password_hash_async(user_data.password),
         first_name=user_data.first_name,
         last_name=user_data.last_name,
         role=user_data.role,
@@ -50,7 +58,7 @@ async def register(
     return user
 
 
-@router.post("/login", response_model=Token)
+@router.post("/login", response_model=Token, dependencies=[Depends(QueryBudget(1))])
 async def login(
     form_data: OAuth2PasswordRequestForm = Depends(),
     db: AsyncSession = Depends(get_db)
@@ -62,7 +70,7 @@ async def login(
     result = await db.execute(select(User).where(User.email == form_data.username))
     user = result.scalar_one_or_none()
     
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    if not user or not await verify_password_async(form_data.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Неверный email или пароль",
@@ -1,27 +1,88 @@
 """
 Зависимости для API endpoints
 """
+import time
 from typing import Optional
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
 
+from app.core.cache import TTLCache
+from app.core.config import settings
 from app.core.database import get_db
 from app.core.security import decode_access_token
-from app.models.user import User
+from app.models.user import User, UserRole
 
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
 
+# Кэш проверенных токенов: token -> payload
+token_cache = TTLCache(
+    maxsize=settings.auth_cache_max_size,
+    ttl=settings.auth_cache_ttl_seconds,
+)
 
-async def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    db: AsyncSession = Depends(get_db)
-) -> User:
+# Кэш пользователей: user_id -> значения колонок строки users
+user_cache = TTLCache(
+    maxsize=settings.auth_cache_max_size,
+    ttl=settings.auth_cache_ttl_seconds,
+)
+
+
+def invalidate_cached_user(user_id: int) -> None:
+    """Сбросить закэшированную строку пользователя после её изменения"""
+    user_cache.pop(user_id)
+
+
+def _decode_token_cached(token: str) -> Optional[dict]:
+    """Декодировать JWT, используя кэш проверенных токенов"""
+    payload = token_cache.get(token)
+    if payload is not None:
+        return payload
+    
+    payload = decode_access_token(token)
+    if payload is not None:
+        # Запись не должна пережить сам токен
+        exp = payload.get("exp")
+        ttl = exp - time.time() if isinstance(exp, (int, float)) else None
+        token_cache.set(token, payload, ttl=ttl)
+    return payload
+
+
+async def _load_user_cached(db: AsyncSession, user_id: int) -> Optional[User]:
     """
-    Получить текущего пользователя по JWT токену
+    Загрузить пользователя, используя кэш строк users
+    
+    Из кэша собирается новый экземпляр и присоединяется к сессии запроса
+    как загруженный, поэтому endpoint'ы могут менять и коммитить его как обычно.
+    """
+    columns = user_cache.get(user_id)
+    if columns is not None:
+        user = User(**columns)
+        make_transient_to_detached(user)
+        db.add(user)
+        return user
+    
+    result = await db.execute(select(User).where(User.id == user_id))
+    user = result.scalar_one_or_none()
+    
+    if user is not None:
+        user_cache.set(user_id, {
+            attr.key: getattr(user, attr.key)
+            for attr in User.__mapper__.column_attrs
+        })
+    return user
+
+
+async def get_user_by_token(db: AsyncSession, token: str) -> User:
+    """
+    Пользователь по JWT токену
+    
+    Для транспортов, где токен приходит не в заголовке Authorization
+    (WebSocket, EventSource).
     """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -29,7 +90,7 @@ async def get_current_user(
         headers={"WWW-Authenticate": "Bearer"},
     )
     
-    payload = decode_access_token(token)
+    payload = _decode_token_cached(token)
     if payload is None:
         raise credentials_exception
     
@@ -37,8 +98,7 @@ async def get_current_user(
     if user_id is None:
         raise credentials_exception
     
-    result = await db.execute(select(User).where(User.id == int(user_id)))
-    user = result.scalar_one_or_none()
+    user = await _load_user_cached(db, int(user_id))
     
     if user is None:
         raise credentials_exception
@@ -52,6 +112,16 @@ async def get_current_user(
     return user
 
 
+async def get_current_user(
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_db)
+) -> User:
+    """
+    Получить текущего пользователя по JWT токену
+    """
+    return await get_user_by_token(db, token)
+
+
 async def get_current_active_user(
     current_user: User = Depends(get_current_user)
 ) -> User:
@@ -61,3 +131,15 @@ async def get_current_active_user(
     return current_user
 
 
+async def get_current_admin_user(
+    current_user: User = Depends(get_current_user)
+) -> User:
+    """
+    Получить текущего пользователя-администратора
+    """
+    if current_user.role != UserRole.ADMIN:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Доступно только администраторам"
+        )
+    return current_user
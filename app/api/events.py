@@ -0,0 +1,167 @@
+"""
+API endpoints для событий реального времени (SSE и WebSocket)
+
+Вместо опроса лент клиент держит одно соединение и получает события:
+- project.published — опубликован новый проект (тема projects);
+- application.created — новая заявка на проект заказчика;
+- application.status_changed — заявку студента приняли или отклонили;
+- project.review_requested — исполнитель запросил проверку;
+- project.completed — проект исполнителя завершён;
+- job.finished — фоновая задача LLM автора завершилась (succeeded/failed).
+
+События — подсказки обновить данные: после переподключения клиент
+перечитывает состояние через REST, пропущенные события не воспроизводятся.
+"""
+import asyncio
+from enum import Enum
+from typing import AsyncIterator, List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, WebSocket, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.deps import get_user_by_token
+from app.core.config import settings
+from app.core.database import async_session_maker, get_db
+from app.core.events import PROJECTS_TOPIC, Subscription, event_hub, user_topic
+from app.core.query_budget import QueryBudget
+from app.models.user import User
+
+
+router = APIRouter()
+
+
+class EventTopic(str, Enum):
+    """Группы событий, на которые можно подписаться"""
+    PROJECTS = "projects"
+    MINE = "mine"
+
+
+def _hub_topics(user: User, topics: List[EventTopic]) -> List[str]:
+    # Личная тема — только своя: чужие события недоступны по построению
+    return [
+        PROJECTS_TOPIC if topic == EventTopic.PROJECTS else user_topic(user.id)
+        for topic in set(topics)
+    ]
+
+
+def _bearer_token(authorization: Optional[str]) -> Optional[str]:
+    if authorization and authorization.lower().startswith("bearer "):
+        return authorization[7:].strip()
+    return None
+
+
+async def _get_stream_user(
+    request: Request,
+    access_token: Optional[str] = Query(None),
+    db: AsyncSession = Depends(get_db)
+) -> User:
+    """Пользователь по заголовку Authorization или параметру access_token (EventSource не умеет заголовки)"""
+    token = _bearer_token(request.headers.get("authorization")) or access_token
+    if not token:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Не удалось проверить учётные данные",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return await get_user_by_token(db, token)
+
+
+async def _sse_stream(topics: List[str]) -> AsyncIterator[bytes]:
+    # Подписываемся при старте потока: finally гарантированно снимет подписку
+    subscription = event_hub.subscribe(topics)
+    try:
+        # Интервал переподключения EventSource
+        yield b"retry: 5000\n\n"
+        while True:
+            try:
+                event = await subscription.next(settings.events_heartbeat_seconds)
+            except asyncio.TimeoutError:
+                # Комментарий SSE: держит соединение открытым за прокси
+                yield b": ping\n\n"
+                continue
+            if event is None:
+                return
+            yield b"event: " + event.type.encode() + b"\ndata: " + event.message + b"\n\n"
+    finally:
+        event_hub.unsubscribe(subscription)
+
+
+@router.get("/stream", dependencies=[Depends(QueryBudget(1))])
+async def stream_events(
+    topics: List[EventTopic] = Query([EventTopic.PROJECTS, EventTopic.MINE]),
+    current_user: User = Depends(_get_stream_user),
+):
+    """
+    Поток событий в формате Server-Sent Events
+    
+    `topics=projects` — новые проекты, `topics=mine` — события заявок
+    и проектов текущего пользователя (по умолчанию обе группы).
+    Токен — в заголовке Authorization или в параметре `access_token`.
+    """
+    return StreamingResponse(
+        _sse_stream(_hub_topics(current_user, topics)),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            # Не буферизовать поток в nginx
+            "X-Accel-Buffering": "no",
+        },
+    )
+
+
+async def _wait_disconnect(websocket: WebSocket) -> None:
+    # Сообщения клиента не нужны: читаем только до отключения
+    while True:
+        message = await websocket.receive()
+        if message["type"] == "websocket.disconnect":
+            return
+
+
+async def _send_events(websocket: WebSocket, subscription: Subscription) -> None:
+    while True:
+        try:
+            event = await subscription.next(settings.events_heartbeat_seconds)
+        except asyncio.TimeoutError:
+            await websocket.send_text('{"type":"ping"}')
+            continue
+        if event is None:
+            await websocket.close()
+            return
+        await websocket.send_text(event.message.decode())
+
+
+@router.websocket("/ws", dependencies=[Depends(QueryBudget(1))])
+async def events_websocket(
+    websocket: WebSocket,
+    access_token: Optional[str] = Query(None),
+    topics: List[EventTopic] = Query([EventTopic.PROJECTS, EventTopic.MINE]),
+):
+    """
+    Поток событий по WebSocket: JSON-сообщения {"type": ..., "data": ...}
+    
+    Параметры те же, что у /events/stream.
+    """
+    token = _bearer_token(websocket.headers.get("authorization")) or access_token
+    try:
+        if not token:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
+        async with async_session_maker() as db:
+            user = await get_user_by_token(db, token)
+    except HTTPException:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    
+    await websocket.accept()
+    subscription = event_hub.subscribe(_hub_topics(user, topics))
+    tasks = [
+        asyncio.create_task(_wait_disconnect(websocket)),
+        asyncio.create_task(_send_events(websocket, subscription)),
+    ]
+    try:
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        event_hub.unsubscribe(subscription)
@@ -0,0 +1,150 @@
+"""
+API endpoints для выгрузки данных (только администраторы)
+
+Строки читаются серверным курсором (stream_results + yield_per) порциями
+и сразу отдаются клиенту, поэтому память не зависит от размера таблицы.
+Выгрузка идёт в отдельной сессии: сессия запроса закрывается до начала
+отправки тела ответа.
+"""
+import csv
+import io
+import zlib
+from enum import Enum
+from typing import AsyncIterator, Iterable, List
+
+import orjson
+from fastapi import APIRouter, Depends, Query, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Table, select
+
+from app.api.deps import get_current_admin_user
+from app.core.database import async_session_maker
+from app.core.query_budget import QueryBudget
+from app.models.project import Project, Application
+from app.models.rating import Rating
+
+
+router = APIRouter()
+
+# Строк в одной порции курсора
+EXPORT_BATCH_SIZE = 1000
+
+
+class ExportEntity(str, Enum):
+    """Выгружаемая таблица"""
+    PROJECTS = "projects"
+    APPLICATIONS = "applications"
+    RATINGS = "ratings"
+
+
+class ExportFormat(str, Enum):
+    """Формат выгрузки"""
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+
+_EXPORT_TABLES = {
+    ExportEntity.PROJECTS: Project.__table__,
+    ExportEntity.APPLICATIONS: Application.__table__,
+    ExportEntity.RATINGS: Rating.__table__,
+}
+
+_MEDIA_TYPES = {
+    ExportFormat.NDJSON: "application/x-ndjson",
+    ExportFormat.CSV: "text/csv; charset=utf-8",
+}
+
+
+def _csv_value(value):
+    if isinstance(value, Enum):
+        return value.value
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return value
+
+
+def _encode_ndjson(columns: List[str], rows: Iterable) -> bytes:
+    return b"".join(
+        orjson.dumps(dict(zip(columns, row)), option=orjson.OPT_APPEND_NEWLINE)
+        for row in rows
+    )
+
+
+def _encode_csv(rows: Iterable) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerows([_csv_value(value) for value in row] for row in rows)
+    return buffer.getvalue().encode("utf-8")
+
+
+def _accepts_gzip(request: Request) -> bool:
+    return any(
+        part.split(";")[0].strip() == "gzip"
+        for part in request.headers.get("accept-encoding", "").split(",")
+    )
+
+
+async def _export_rows(
+    table: Table,
+    export_format: ExportFormat,
+    after_id: int,
+    compress: bool,
+) -> AsyncIterator[bytes]:
+    """Тело выгрузки: строки с id > after_id по возрастанию id"""
+    columns = [column.name for column in table.columns]
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16) if compress else None
+    
+    def emit(chunk: bytes) -> bytes:
+        if compressor is None:
+            return chunk
+        # Z_SYNC_FLUSH: клиент получает данные порции сразу, а не в конце
+        return compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    
+    if export_format == ExportFormat.CSV:
+        yield emit(_encode_csv([columns]))
+    
+    query = (
+        select(table)
+        .where(table.c.id > after_id)
+        .order_by(table.c.id)
+        .execution_options(yield_per=EXPORT_BATCH_SIZE)
+    )
+    async with async_session_maker() as db:
+        result = await db.stream(query)
+        async for rows in result.partitions():
+            if export_format == ExportFormat.CSV:
+                yield emit(_encode_csv(rows))
+            else:
+                yield emit(_encode_ndjson(columns, rows))
+    
+    if compressor is not None:
+        yield compressor.flush()
+
+
+@router.get("/{entity}", dependencies=[Depends(QueryBudget(1)), Depends(get_current_admin_user)])
+async def export_table(
+    entity: ExportEntity,
+    request: Request,
+    format: ExportFormat = ExportFormat.NDJSON,
+    after_id: int = Query(0, ge=0),
+):
+    """
+    Выгрузить таблицу целиком (только администратор)
+    
+    Строки идут по возрастанию id. Чтобы продолжить прерванную выгрузку,
+    передайте в `after_id` id последней полностью полученной строки.
+    При `Accept-Encoding: gzip` ответ сжимается на лету.
+    """
+    compress = _accepts_gzip(request)
+    headers = {
+        "Content-Disposition": f'attachment; filename="{entity.value}.{format.value}"',
+        "Vary": "Accept-Encoding",
+    }
+    if compress:
+        headers["Content-Encoding"] = "gzip"
+    
+    return StreamingResponse(
+        _export_rows(_EXPORT_TABLES[entity], format, after_id, compress),
+        media_type=_MEDIA_TYPES[format],
+        headers=headers,
+    )
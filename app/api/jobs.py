@@ -0,0 +1,155 @@
+"""
+API endpoints для фоновых задач LLM
+
+Генерация ТЗ и оценка сроков занимают десятки секунд, поэтому запрос только
+ставит задачу в очередь и сразу отвечает 202. Клиент узнаёт итог по
+GET /jobs/{id} или по событию job.finished из /events, а результат читает
+из проекта (generated_spec, llm_estimation).
+"""
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, Response, status
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.deps import get_current_active_user
+from app.core.config import settings
+from app.core.database import get_db
+from app.core.query_budget import QueryBudget
+from app.models.job import Job, JobStatus
+from app.models.project import Project
+from app.models.user import User, UserRole
+from app.schemas.job import JobCreate, JobResponse
+from app.services.jobs import job_queue
+
+
+router = APIRouter()
+
+
+async def _job_by_idempotency_key(db: AsyncSession, user_id: int, idempotency_key: str) -> Optional[Job]:
+    result = await db.execute(
+        select(Job).where(Job.created_by_id == user_id, Job.idempotency_key == idempotency_key)
+    )
+    return result.scalar_one_or_none()
+
+
+def _same_request(job: Job, job_data: JobCreate) -> Job:
+    if (
+        job.kind != job_data.kind
+        or job.project_id != job_data.project_id
+        or job.bypass_cache != job_data.bypass_cache
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Idempotency-Key уже использован для другой задачи"
+        )
+    return job
+
+
+def _accepted(request: Request, response: Response, job: Job) -> Job:
+    response.headers["Location"] = str(request.url_for("get_job", job_id=job.id))
+    return job
+
+
+@router.post("/", response_model=JobResponse, status_code=status.HTTP_202_ACCEPTED, dependencies=[Depends(QueryBudget(6))])
+async def create_job(
+    job_data: JobCreate,
+    request: Request,
+    response: Response,
+    idempotency_key: Optional[str] = Header(None, max_length=255),
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Поставить в очередь генерацию ТЗ (generate_spec) или оценку сроков (estimate)
+    
+    Запускать может только заказчик проекта. Повтор запроса с тем же
+    заголовком Idempotency-Key возвращает уже созданную задачу. Пока задача
+    того же вида для проекта ждёт или выполняется, возвращается она же
+    (для `bypass_cache=true` — только такая же задача в обход кэша).
+    
+    Ответ для проекта с тем же содержимым берётся из кэша LLM;
+    `bypass_cache=true` заставляет сгенерировать его заново.
+    """
+    if idempotency_key:
+        existing = await _job_by_idempotency_key(db, current_user.id, idempotency_key)
+        if existing:
+            return _accepted(request, response, _same_request(existing, job_data))
+    
+    result = await db.execute(select(Project.customer_id).where(Project.id == job_data.project_id))
+    customer_id = result.scalar_one_or_none()
+    
+    if customer_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Проект не найден"
+        )
+    
+    if customer_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Только заказчик проекта может запускать генерацию"
+        )
+    
+    active_query = select(Job).where(
+        Job.project_id == job_data.project_id,
+        Job.kind == job_data.kind,
+        Job.status.in_([JobStatus.PENDING, JobStatus.RUNNING]),
+    )
+    if job_data.bypass_cache:
+        # Задача без bypass_cache может отдать ответ из кэша, а клиент просил свежий;
+        # обратное допустимо: свежий ответ подходит и обычному запросу
+        active_query = active_query.where(Job.bypass_cache.is_(True))
+    result = await db.execute(active_query.order_by(Job.id).limit(1))
+    active = result.scalar_one_or_none()
+    if active:
+        return _accepted(request, response, active)
+    
+    job = Job(
+        kind=job_data.kind,
+        project_id=job_data.project_id,
+        created_by_id=current_user.id,
+        idempotency_key=idempotency_key,
+        bypass_cache=job_data.bypass_cache,
+        max_attempts=settings.jobs_max_attempts,
+    )
+    db.add(job)
+    try:
+        await db.commit()
+    except IntegrityError:
+        # Параллельный запрос с тем же Idempotency-Key успел создать задачу
+        await db.rollback()
+        existing = await _job_by_idempotency_key(db, current_user.id, idempotency_key) if idempotency_key else None
+        if existing is None:
+            raise
+        return _accepted(request, response, _same_request(existing, job_data))
+    
+    job_queue.notify()
+    return _accepted(request, response, job)
+
+
+@router.get("/{job_id}", response_model=JobResponse, dependencies=[Depends(QueryBudget(2))])
+async def get_job(
+    job_id: int,
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Состояние фоновой задачи (автор задачи или администратор)
+    """
+    job = await db.get(Job, job_id)
+    
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Задача не найдена"
+        )
+    
+    if job.created_by_id != current_user.id and current_user.role != UserRole.ADMIN:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Нет доступа к задаче"
+        )
+    
+    return job
@@ -2,23 +2,40 @@
 API endpoints для проектов
 """
 import json
-from typing import List, Optional
+from datetime import datetime
+from typing import Awaitable, Callable, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy import select, func
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
+from sqlalchemy import Select, case, insert, select, func, or_, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
+from sqlalchemy.orm.attributes import set_committed_value
 from pydantic import BaseModel
 
-from app.core.database import get_db
+from app.core.database import get_db, get_read_db, reads_pinned_to_primary
+from app.core.events import PROJECTS_TOPIC, event_hub, user_topic
+from app.core.http_cache import conditional_response, weak_etag
+from app.core.response_cache import CachedResponse, project_feed_cache
+from app.core.serialization import dump_orm, orm_response
+from app.core.query_budget import QueryBudget
+from app.core.pagination import NEXT_CURSOR_HEADER, decode_cursor_or_400, keyset_after_desc, next_cursor
 from app.api.deps import get_current_active_user
 from app.models.user import User, UserRole
-from app.models.project import Project, Task, Application, ProjectStatus, ApplicationStatus
+from app.models.project import Project, Task, Application, ProjectStatus, TaskStatus, ApplicationStatus
+from app.services.matcher import talent_matcher
+from app.services.search import build_project_search, render_highlight
+from app.services.tags import TagMatch, normalize_tag, parse_tag_list, project_tag_filter, sync_project_tags
 from app.schemas.project import (
     ProjectCreate, 
     ProjectUpdate, 
     ProjectResponse,
+    ProjectSummaryResponse,
+    ProjectSearchResult,
+    ProjectCandidateResponse,
     TaskCreate,
+    TaskBatchCreate,
+    TaskReorder,
     TaskResponse,
     TaskAssigneeInfo,
     ApplicationCreate,
@@ -30,9 +47,72 @@ from app.schemas.project import (
 router = APIRouter()
 
 
+def _project_version_query(project_id: int) -> Select:
+    """
+    Версия проекта для ETag: updated_at проекта и последнее изменение
+    профилей исполнителей (они входят в ответ); created_at — Last-Modified
+    для строк, где оба значения NULL
+    """
+    task_assignees = select(Task.assignee_id).where(Task.project_id == Project.id).correlate(Project)
+    people_updated_at = (
+        select(func.max(User.updated_at))
+        .where(or_(User.id == Project.assignee_id, User.id.in_(task_assignees)))
+        .scalar_subquery()
+    )
+    return select(Project.updated_at, people_updated_at, Project.created_at).where(Project.id == project_id)
+
+
+def _feed_cache_key(
+    kind: str,
+    skip: int,
+    limit: int,
+    cursor: Optional[str],
+    tech: Optional[List[str]],
+    tech_match: TagMatch,
+) -> str:
+    """Ключ ленты в кэше ответов (статус — область кэша, в ключ не входит)"""
+    tags = ",".join(sorted({normalize_tag(name) for name in tech or ()}))
+    return f"{kind}:{skip}:{limit}:{cursor or ''}:{tech_match.value}:{tags}"
+
+
+async def _load_feed(
+    request: Request,
+    project_status: Optional[ProjectStatus],
+    key: str,
+    load: Callable[[AsyncSession], Awaitable[CachedResponse]],
+    db: AsyncSession,
+    primary_db: AsyncSession,
+) -> CachedResponse:
+    """
+    Загрузить ленту через кэш ответов
+    
+    Кэш заполняется только из основной БД: ответ реплики, отстающей от
+    только что сброшенного поколения, иначе пролежал бы в кэше весь TTL.
+    Клиент в окне чтения своих записей читает мимо кэша — на других
+    воркерах (memory-бэкенд) сброс ещё не виден.
+    """
+    if reads_pinned_to_primary(request) or project_feed_cache.ttl <= 0:
+        return await load(db)
+    return await project_feed_cache.get_or_load(
+        (project_status or ProjectStatus.OPEN).value,
+        key,
+        lambda: load(primary_db),
+    )
+
+
+async def _invalidate_project_feeds(*statuses: ProjectStatus) -> None:
+    """Сбросить кэш лент проектов с этими статусами (вызывать после commit)"""
+    await project_feed_cache.invalidate(*(project_status.value for project_status in statuses))
+
+
+def _mark_project_assignees_dirty(project: Project) -> None:
+    """Статус проекта влияет на загрузку его исполнителей в Talent Matcher"""
+    talent_matcher.mark_dirty(project.assignee_id, *(task.assignee_id for task in project.tasks))
+
+
 # ===== ПРОЕКТЫ =====
 
-@router.post("/", response_model=ProjectResponse, status_code=status.HTTP_201_CREATED)
+@router.post("/", response_model=ProjectResponse, status_code=status.HTTP_201_CREATED, dependencies=[Depends(QueryBudget(6))])
 async def create_project(
     project_data: ProjectCreate,
     current_user: User = Depends(get_current_active_user),
@@ -62,102 +142,318 @@ async def create_project(
         llm_estimation=project_data.llm_estimation,
         customer_id=current_user.id,
         status=ProjectStatus.DRAFT,
+        # У нового проекта нет задач и исполнителя — ответ собирается без перезапроса
+        assignee=None,
+        tasks=[],
     )
     
     db.add(project)
+    
+    if project_data.tech_stack:
+        await db.flush()
+        await sync_project_tags(db, project.id, project_data.tech_stack, replace=False)
+    
     await db.commit()
+    await _invalidate_project_feeds(project.status)
     
-    # Загружаем проект с tasks для корректного ответа
-    result = await db.execute(
-        select(Project)
-        .options(
-            selectinload(Project.assignee),
-            selectinload(Project.tasks).selectinload(Task.assignee)
-        )
-        .where(Project.id == project.id)
+    return project
+
+
+def _project_with_relations() -> Select:
+    """
+    Выборка проекта с исполнителем и деревом задач
+    
+    Мутации загружают проект так сразу: после commit (expire_on_commit=False)
+    тот же объект отдаётся в ответ без повторного SELECT.
+    """
+    return select(Project).options(
+        selectinload(Project.assignee),
+        selectinload(Project.tasks).selectinload(Task.assignee)
     )
-    project = result.scalar_one()
+
+
+def _apply_feed_filters(
+    query: Select,
+    status_filter: Optional[ProjectStatus],
+    skip: int,
+    limit: int,
+    cursor: Optional[str],
+    tech: Optional[List[str]] = None,
+    tech_match: TagMatch = TagMatch.ANY,
+) -> Select:
+    """Фильтры по статусу и технологиям, пагинация и сортировка ленты проектов"""
+    # По умолчанию показываем открытые проекты
+    query = query.where(Project.status == (status_filter or ProjectStatus.OPEN))
+    
+    if tech:
+        tech_filter = project_tag_filter(Project.id, tech, tech_match)
+        if tech_filter is not None:
+            query = query.where(tech_filter)
+    
+    if cursor:
+        query = query.where(
+            keyset_after_desc(
+                (Project.created_at, Project.id),
+                decode_cursor_or_400(cursor, (datetime, int)),
+            )
+        )
+    else:
+        query = query.offset(skip)
     
-    return project
+    return query.order_by(Project.created_at.desc(), Project.id.desc()).limit(limit)
+
+
+def _my_projects_filter(current_user: User):
+    """Условие отбора проектов текущего пользователя"""
+    if current_user.role == UserRole.CUSTOMER:
+        # Для заказчика — его проекты
+        return Project.customer_id == current_user.id
+    
+    # Для студента — проекты, на которые он подал заявку ИЛИ где он назначен исполнителем
+    applied = select(Application.project_id).where(Application.student_id == current_user.id)
+    return or_(Project.id.in_(applied), Project.assignee_id == current_user.id)
 
 
-@router.get("/", response_model=List[ProjectResponse])
+def _project_summary_query() -> Select:
+    """Выборка только колонок ленты и счётчиков задач, без загрузки дерева задач"""
+    task_count = (
+        select(func.count(Task.id))
+        .where(Task.project_id == Project.id)
+        .correlate(Project)
+        .scalar_subquery()
+    )
+    completed_task_count = (
+        select(func.count(Task.id))
+        .where(Task.project_id == Project.id)
+        .where(Task.status == TaskStatus.COMPLETED)
+        .correlate(Project)
+        .scalar_subquery()
+    )
+    return select(
+        Project.id,
+        Project.title,
+        Project.description,
+        Project.budget,
+        Project.deadline,
+        Project.tech_stack,
+        Project.status,
+        Project.customer_id,
+        Project.assignee_id,
+        Project.created_at,
+        Project.updated_at,
+        task_count.label("task_count"),
+        completed_task_count.label("completed_task_count"),
+    )
+
+
+@router.get("/", response_model=List[ProjectResponse], dependencies=[Depends(QueryBudget(4))])
 async def list_projects(
+    request: Request,
     status: Optional[ProjectStatus] = None,
     skip: int = 0,
     limit: int = 20,
-    db: AsyncSession = Depends(get_db)
+    cursor: Optional[str] = None,
+    tech: Optional[List[str]] = Query(None),
+    tech_match: TagMatch = TagMatch.ANY,
+    db: AsyncSession = Depends(get_read_db),
+    primary_db: AsyncSession = Depends(get_db)
 ):
     """
     Получить список проектов
+    
+    Для глубокого листания передавайте `cursor` из заголовка `X-Next-Cursor`
+    предыдущего ответа вместо `skip`. Фильтр по технологиям:
+    `?tech=React&tech=Python`, `tech_match=all` — нужны все перечисленные.
+    
+    Ответ кэшируется целиком (см. app/core/response_cache.py) и
+    сбрасывается мутациями проектов с тем же статусом.
     """
-    query = select(Project).options(
-        selectinload(Project.assignee),
-        selectinload(Project.tasks).selectinload(Task.assignee)
+    async def load(session: AsyncSession) -> CachedResponse:
+        query = select(Project).options(
+            selectinload(Project.assignee),
+            selectinload(Project.tasks).selectinload(Task.assignee)
+        )
+        query = _apply_feed_filters(query, status, skip, limit, cursor, tech, tech_match)
+        
+        result = await session.execute(query)
+        projects = result.scalars().all()
+        
+        headers = {}
+        cursor_value = next_cursor(projects, limit, "created_at", "id")
+        if cursor_value:
+            headers[NEXT_CURSOR_HEADER] = cursor_value
+        
+        return CachedResponse(dump_orm(List[ProjectResponse], projects), headers)
+    
+    cached = await _load_feed(
+        request,
+        status,
+        _feed_cache_key("full", skip, limit, cursor, tech, tech_match),
+        load,
+        db,
+        primary_db,
     )
+    return Response(content=cached.body, media_type="application/json", headers=cached.headers)
+
+
+@router.get("/summary", response_model=List[ProjectSummaryResponse], dependencies=[Depends(QueryBudget(1))])
+async def list_projects_summary(
+    request: Request,
+    status: Optional[ProjectStatus] = None,
+    skip: int = 0,
+    limit: int = 20,
+    cursor: Optional[str] = None,
+    tech: Optional[List[str]] = Query(None),
+    tech_match: TagMatch = TagMatch.ANY,
+    db: AsyncSession = Depends(get_read_db),
+    primary_db: AsyncSession = Depends(get_db)
+):
+    """
+    Получить ленту проектов в кратком виде
     
-    if status:
-        query = query.where(Project.status == status)
-    else:
-        # По умолчанию показываем открытые проекты
-        query = query.where(Project.status == ProjectStatus.OPEN)
+    Те же фильтры, что у списка проектов, но вместо дерева задач
+    возвращаются только счётчики задач. Полные данные — в GET /projects/{id}.
+    Кэшируется так же, как список проектов.
+    """
+    async def load(session: AsyncSession) -> CachedResponse:
+        query = _apply_feed_filters(
+            _project_summary_query(), status, skip, limit, cursor, tech, tech_match
+        )
+        
+        result = await session.execute(query)
+        projects = result.all()
+        
+        headers = {}
+        cursor_value = next_cursor(projects, limit, "created_at", "id")
+        if cursor_value:
+            headers[NEXT_CURSOR_HEADER] = cursor_value
+        
+        return CachedResponse(dump_orm(List[ProjectSummaryResponse], projects), headers)
+    
+    cached = await _load_feed(
+        request,
+        status,
+        _feed_cache_key("summary", skip, limit, cursor, tech, tech_match),
+        load,
+        db,
+        primary_db,
+    )
+    return Response(content=cached.body, media_type="application/json", headers=cached.headers)
+
+
+@router.get("/search", response_model=List[ProjectSearchResult], dependencies=[Depends(QueryBudget(1))])
+async def search_projects(
+    q: str = Query(..., min_length=1, max_length=200),
+    status: Optional[ProjectStatus] = None,
+    skip: int = 0,
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Полнотекстовый поиск по названию, описанию и требованиям проектов
     
-    query = query.order_by(Project.created_at.desc()).offset(skip).limit(limit)
+    Результаты отсортированы по релевантности, в `highlight` совпадения
+    выделены тегом `<mark>`, остальной текст экранирован. По умолчанию
+    ищет среди открытых проектов.
+    """
+    search = build_project_search(q, db.bind.dialect.name)
+    if search is None:
+        return []
+    
+    query = _project_summary_query().add_columns(
+        search.rank.label("rank"),
+        search.highlight.label("highlight"),
+    )
+    if search.join is not None:
+        query = query.join(search.join, search.condition)
+    else:
+        query = query.where(search.condition)
+    
+    query = (
+        query
+        .where(Project.status == (status or ProjectStatus.OPEN))
+        .order_by(search.rank.desc(), Project.id.desc())
+        .offset(skip)
+        .limit(limit)
+    )
     
     result = await db.execute(query)
-    return result.scalars().all()
+    return [
+        {**row._mapping, "highlight": render_highlight(row.highlight)}
+        for row in result
+    ]
 
 
-@router.get("/my", response_model=List[ProjectResponse])
+@router.get("/my", response_model=List[ProjectResponse], dependencies=[Depends(QueryBudget(5))])
 async def list_my_projects(
     current_user: User = Depends(get_current_active_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Получить проекты текущего пользователя
     """
-    if current_user.role == UserRole.CUSTOMER:
-        # Для заказчика — его проекты
-        result = await db.execute(
-            select(Project)
-            .options(
-                selectinload(Project.assignee),
-                selectinload(Project.tasks).selectinload(Task.assignee)
-            )
-            .where(Project.customer_id == current_user.id)
-            .order_by(Project.created_at.desc())
-        )
-    else:
-        # Для студента — проекты, на которые он подал заявку ИЛИ где он назначен исполнителем
-        from sqlalchemy import or_
-        result = await db.execute(
-            select(Project)
-            .options(
-                selectinload(Project.assignee),
-                selectinload(Project.tasks).selectinload(Task.assignee)
-            )
-            .outerjoin(Application, Project.id == Application.project_id)
-            .where(
-                or_(
-                    Application.student_id == current_user.id,
-                    Project.assignee_id == current_user.id
-                )
-            )
-            .distinct()
-            .order_by(Project.created_at.desc())
+    result = await db.execute(
+        select(Project)
+        .options(
+            selectinload(Project.assignee),
+            selectinload(Project.tasks).selectinload(Task.assignee)
         )
+        .where(_my_projects_filter(current_user))
+        .order_by(Project.created_at.desc())
+    )
     
-    return result.scalars().all()
+    return orm_response(List[ProjectResponse], result.scalars().all())
 
 
-@router.get("/{project_id}", response_model=ProjectResponse)
+@router.get("/my/summary", response_model=List[ProjectSummaryResponse], dependencies=[Depends(QueryBudget(2))])
+async def list_my_projects_summary(
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Получить проекты текущего пользователя в кратком виде
+    """
+    result = await db.execute(
+        _project_summary_query()
+        .where(_my_projects_filter(current_user))
+        .order_by(Project.created_at.desc())
+    )
+    
+    return result.all()
+
+
+@router.get("/{project_id}", response_model=ProjectResponse, dependencies=[Depends(QueryBudget(5))])
 async def get_project(
     project_id: int,
-    db: AsyncSession = Depends(get_db)
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Получить проект по ID
+    
+    Поддерживает условный GET: при совпадении If-None-Match отвечает 304
+    без загрузки задач и сериализации.
     """
+    result = await db.execute(_project_version_query(project_id))
+    version = result.one_or_none()
+    
+    if not version:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Проект не найден"
+        )
+    
+    updated_at, people_updated_at, created_at = version
+    not_modified = conditional_response(
+        request,
+        response,
+        weak_etag("project", project_id, updated_at, people_updated_at),
+        max(filter(None, (updated_at, people_updated_at)), default=created_at),
+    )
+    if not_modified:
+        return not_modified
+    
     result = await db.execute(
         select(Project)
         .options(
@@ -174,10 +470,11 @@ async def get_project(
             detail="Проект не найден"
         )
     
-    return project
+    # Заголовки кэширования, проставленные conditional_response
+    return orm_response(ProjectResponse, project, headers=response.headers)
 
 
-@router.put("/{project_id}", response_model=ProjectResponse)
+@router.put("/{project_id}", response_model=ProjectResponse, dependencies=[Depends(QueryBudget(11))])
 async def update_project(
     project_id: int,
     project_data: ProjectUpdate,
@@ -188,7 +485,7 @@ async def update_project(
     Обновить проект (только владелец)
     """
     result = await db.execute(
-        select(Project).where(Project.id == project_id)
+        _project_with_relations().where(Project.id == project_id)
     )
     project = result.scalar_one_or_none()
     
@@ -205,30 +502,25 @@ async def update_project(
         )
     
     update_data = project_data.model_dump(exclude_unset=True)
+    previous_status = project.status
     
-    if "tech_stack" in update_data and update_data["tech_stack"]:
-        update_data["tech_stack"] = json.dumps(update_data["tech_stack"])
+    if "tech_stack" in update_data:
+        tech_stack = update_data["tech_stack"] or []
+        update_data["tech_stack"] = json.dumps(tech_stack) if tech_stack else None
+        await sync_project_tags(db, project.id, tech_stack)
     
     for field, value in update_data.items():
         setattr(project, field, value)
     
     await db.commit()
-    
-    # Загружаем проект с tasks для корректного ответа
-    result = await db.execute(
-        select(Project)
-        .options(
-            selectinload(Project.assignee),
-            selectinload(Project.tasks).selectinload(Task.assignee)
-        )
-        .where(Project.id == project_id)
-    )
-    project = result.scalar_one()
+    await _invalidate_project_feeds(previous_status, project.status)
+    if "status" in update_data:
+        _mark_project_assignees_dirty(project)
     
     return project
 
 
-@router.post("/{project_id}/publish", response_model=ProjectResponse)
+@router.post("/{project_id}/publish", response_model=ProjectResponse, dependencies=[Depends(QueryBudget(6))])
 async def publish_project(
     project_id: int,
     current_user: User = Depends(get_current_active_user),
@@ -238,7 +530,7 @@ async def publish_project(
     Опубликовать проект (перевести в статус OPEN)
     """
     result = await db.execute(
-        select(Project).where(Project.id == project_id)
+        _project_with_relations().where(Project.id == project_id)
     )
     project = result.scalar_one_or_none()
     
@@ -260,24 +552,19 @@ async def publish_project(
             detail="Можно опубликовать только черновик"
         )
     
+    previous_status = project.status
     project.status = ProjectStatus.OPEN
     await db.commit()
-    
-    # Загружаем проект с tasks для корректного ответа
-    result = await db.execute(
-        select(Project)
-        .options(
-            selectinload(Project.assignee),
-            selectinload(Project.tasks).selectinload(Task.assignee)
-        )
-        .where(Project.id == project_id)
+    await _invalidate_project_feeds(previous_status, project.status)
+    await event_hub.publish(
+        "project.published", [PROJECTS_TOPIC],
+        project_id=project.id, title=project.title,
     )
-    project = result.scalar_one()
     
     return project
 
 
-@router.post("/{project_id}/complete", response_model=ProjectResponse)
+@router.post("/{project_id}/complete", response_model=ProjectResponse, dependencies=[Depends(QueryBudget(6))])
 async def complete_project(
     project_id: int,
     current_user: User = Depends(get_current_active_user),
@@ -288,7 +575,7 @@ async def complete_project(
     Только заказчик может завершить проект
     """
     result = await db.execute(
-        select(Project).where(Project.id == project_id)
+        _project_with_relations().where(Project.id == project_id)
     )
     project = result.scalar_one_or_none()
     
@@ -316,23 +603,21 @@ async def complete_project(
             detail="Нельзя завершить проект без назначенного исполнителя"
         )
     
+    previous_status = project.status
     project.status = ProjectStatus.COMPLETED
     await db.commit()
-    
-    result = await db.execute(
-        select(Project)
-        .options(
-            selectinload(Project.assignee),
-            selectinload(Project.tasks).selectinload(Task.assignee)
-        )
-        .where(Project.id == project_id)
+    await _invalidate_project_feeds(previous_status, project.status)
+    _mark_project_assignees_dirty(project)
+    executors = {project.assignee_id, *(task.assignee_id for task in project.tasks)} - {None}
+    await event_hub.publish(
+        "project.completed", [user_topic(user_id) for user_id in executors],
+        project_id=project.id,
     )
-    project = result.scalar_one()
     
     return project
 
 
-@router.post("/{project_id}/request-review", response_model=ProjectResponse)
+@router.post("/{project_id}/request-review", response_model=ProjectResponse, dependencies=[Depends(QueryBudget(6))])
 async def request_review(
     project_id: int,
     current_user: User = Depends(get_current_active_user),
@@ -343,7 +628,7 @@ async def request_review(
     Исполнитель может запросить проверку, чтобы заказчик проверил работу
     """
     result = await db.execute(
-        select(Project).where(Project.id == project_id)
+        _project_with_relations().where(Project.id == project_id)
     )
     project = result.scalar_one_or_none()
     
@@ -367,23 +652,18 @@ async def request_review(
     
     project.status = ProjectStatus.REVIEW
     await db.commit()
-    
-    result = await db.execute(
-        select(Project)
-        .options(
-            selectinload(Project.assignee),
-            selectinload(Project.tasks).selectinload(Task.assignee)
-        )
-        .where(Project.id == project_id)
+    await _invalidate_project_feeds(ProjectStatus.IN_PROGRESS, project.status)
+    await event_hub.publish(
+        "project.review_requested", [user_topic(project.customer_id)],
+        project_id=project.id,
     )
-    project = result.scalar_one()
     
     return project
 
 
 # ===== ЗАЯВКИ =====
 
-@router.post("/{project_id}/apply", response_model=ApplicationResponse, status_code=status.HTTP_201_CREATED)
+@router.post("/{project_id}/apply", response_model=ApplicationResponse, status_code=status.HTTP_201_CREATED, dependencies=[Depends(QueryBudget(4))])
 async def apply_for_project(
     project_id: int,
     application_data: ApplicationCreate,
@@ -437,17 +717,29 @@ async def apply_for_project(
     )
     
     db.add(application)
-    await db.commit()
-    await db.refresh(application)
+    try:
+        await db.commit()
+    except IntegrityError:
+        # Параллельная заявка успела раньше (уникальный индекс project_id + student_id)
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Вы уже подали заявку на этот проект"
+        )
+    
+    await event_hub.publish(
+        "application.created", [user_topic(project.customer_id)],
+        application_id=application.id, project_id=project_id, student_id=current_user.id,
+    )
     
     return application
 
 
-@router.get("/{project_id}/applications", response_model=List[ApplicationResponse])
+@router.get("/{project_id}/applications", response_model=List[ApplicationResponse], dependencies=[Depends(QueryBudget(3))])
 async def list_project_applications(
     project_id: int,
     current_user: User = Depends(get_current_active_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Получить заявки на проект (только владелец проекта)
@@ -479,7 +771,7 @@ async def list_project_applications(
     return result.scalars().all()
 
 
-@router.put("/{project_id}/applications/{application_id}", response_model=ApplicationResponse)
+@router.put("/{project_id}/applications/{application_id}", response_model=ApplicationResponse, dependencies=[Depends(QueryBudget(5))])
 async def update_application_status(
     project_id: int,
     application_id: int,
@@ -517,13 +809,19 @@ async def update_application_status(
         )
     
     application.status = status_data.status
+    previous_status = project.status
     
     # Если заявка принята, переводим проект в статус IN_PROGRESS
     if status_data.status == ApplicationStatus.ACCEPTED:
         project.status = ProjectStatus.IN_PROGRESS
     
     await db.commit()
-    await db.refresh(application)
+    if project.status != previous_status:
+        await _invalidate_project_feeds(previous_status, project.status)
+    await event_hub.publish(
+        "application.status_changed", [user_topic(application.student_id)],
+        application_id=application.id, project_id=project_id, status=application.status.value,
+    )
     
     return application
 
@@ -535,7 +833,7 @@ class TaskAssigneeUpdate(BaseModel):
     assignee_id: Optional[int] = None
 
 
-@router.put("/{project_id}/tasks/{task_id}/assign", response_model=TaskResponse)
+@router.put("/{project_id}/tasks/{task_id}/assign", response_model=TaskResponse, dependencies=[Depends(QueryBudget(7))])
 async def assign_task_assignee(
     project_id: int,
     task_id: int,
@@ -567,6 +865,7 @@ async def assign_task_assignee(
     # Получаем задачу
     result = await db.execute(
         select(Task)
+        .options(selectinload(Task.assignee))
         .where(Task.id == task_id)
         .where(Task.project_id == project_id)
     )
@@ -578,6 +877,8 @@ async def assign_task_assignee(
             detail="Задача не найдена"
         )
     
+    previous_assignee_id = task.assignee_id
+    
     # Если указан assignee_id, проверяем что это студент
     if assignee_data.assignee_id:
         result = await db.execute(
@@ -597,20 +898,15 @@ async def assign_task_assignee(
                 detail="Исполнителем может быть только студент"
             )
         
-        task.assignee_id = assignee_data.assignee_id
+        task.assignee = assignee
     else:
         # Убираем исполнителя
-        task.assignee_id = None
+        task.assignee = None
     
+    project.updated_at = datetime.utcnow()
     await db.commit()
-    
-    # Загружаем задачу с assignee для корректного ответа
-    result = await db.execute(
-        select(Task)
-        .options(selectinload(Task.assignee))
-        .where(Task.id == task_id)
-    )
-    task = result.scalar_one()
+    await _invalidate_project_feeds(project.status)
+    talent_matcher.mark_dirty(previous_assignee_id, task.assignee_id)
     
     return task
 
@@ -622,7 +918,7 @@ class ProjectAssigneeUpdate(BaseModel):
     assignee_id: Optional[int] = None
 
 
-@router.put("/{project_id}/assign", response_model=ProjectResponse)
+@router.put("/{project_id}/assign", response_model=ProjectResponse, dependencies=[Depends(QueryBudget(7))])
 async def assign_project_assignee(
     project_id: int,
     assignee_data: ProjectAssigneeUpdate,
@@ -634,7 +930,7 @@ async def assign_project_assignee(
     """
     # Проверяем проект
     result = await db.execute(
-        select(Project).where(Project.id == project_id)
+        _project_with_relations().where(Project.id == project_id)
     )
     project = result.scalar_one_or_none()
     
@@ -650,6 +946,9 @@ async def assign_project_assignee(
             detail="Только владелец проекта может назначать исполнителей"
         )
     
+    previous_assignee_id = project.assignee_id
+    previous_status = project.status
+    
     # Если указан assignee_id, проверяем что это студент
     if assignee_data.assignee_id:
         result = await db.execute(
@@ -669,34 +968,84 @@ async def assign_project_assignee(
                 detail="Исполнителем может быть только студент"
             )
         
-        project.assignee_id = assignee_data.assignee_id
+        # Через relationship, чтобы ответ содержал нового исполнителя без перезапроса
+        project.assignee = assignee
         # Переводим проект в статус IN_PROGRESS при назначении исполнителя
         if project.status == ProjectStatus.OPEN:
             project.status = ProjectStatus.IN_PROGRESS
     else:
         # Убираем исполнителя
-        project.assignee_id = None
+        project.assignee = None
     
     await db.commit()
+    await _invalidate_project_feeds(previous_status, project.status)
+    talent_matcher.mark_dirty(previous_assignee_id)
+    _mark_project_assignees_dirty(project)
+    
+    return project
+
+
+# ===== ПОДБОР ИСПОЛНИТЕЛЕЙ =====
+
+@router.get("/{project_id}/candidates", response_model=List[ProjectCandidateResponse], dependencies=[Depends(QueryBudget(6))])
+async def list_project_candidates(
+    project_id: int,
+    limit: int = Query(10, ge=1, le=50),
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db),
+    read_db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Подобрать студентов для проекта (Talent Matcher)
     
-    # Загружаем проект с assignee для корректного ответа
+    Студенты ранжируются по совпадению навыков с tech_stack, рейтингу,
+    числу завершённых проектов и текущей загрузке. Только владелец проекта.
+    """
     result = await db.execute(
-        select(Project)
-        .options(
-            selectinload(Project.assignee),
-            selectinload(Project.tasks).selectinload(Task.assignee)
-        )
-        .where(Project.id == project_id)
+        select(Project).where(Project.id == project_id)
     )
-    project = result.scalar_one()
+    project = result.scalar_one_or_none()
     
-    return project
+    if not project:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Проект не найден"
+        )
+    
+    if project.customer_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Только владелец проекта может подбирать исполнителей"
+        )
+    
+    # Индекс обновляется только из основной БД: обновление сбрасывает пометки
+    # mark_dirty и сдвигает watermark, а отстающая реплика их бы потеряла
+    candidates = await talent_matcher.top_candidates(db, parse_tag_list(project.tech_stack), limit)
+    if not candidates:
+        return []
+    
+    result = await read_db.execute(
+        select(User).where(User.id.in_([candidate.user_id for candidate in candidates]))
+    )
+    students = {student.id: student for student in result.scalars()}
+    
+    return [
+        ProjectCandidateResponse(
+            student=students[candidate.user_id],
+            score=candidate.score,
+            matched_skills=candidate.matched_skills,
+            completed_projects=candidate.completed_projects,
+            active_assignments=candidate.active_assignments,
+        )
+        for candidate in candidates
+        if candidate.user_id in students
+    ]
 
 
-@router.get("/applications/my", response_model=List[ApplicationResponse])
+@router.get("/applications/my", response_model=List[ApplicationResponse], dependencies=[Depends(QueryBudget(2))])
 async def get_my_applications(
     current_user: User = Depends(get_current_active_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Получить заявки текущего студента
@@ -716,58 +1065,167 @@ async def get_my_applications(
     return result.scalars().all()
 
 
-@router.post("/{project_id}/tasks", response_model=TaskResponse, status_code=status.HTTP_201_CREATED)
-async def create_task(
+async def _lock_own_project(
+    db: AsyncSession,
     project_id: int,
-    task_data: TaskCreate,
-    current_user: User = Depends(get_current_active_user),
-    db: AsyncSession = Depends(get_db)
-):
+    current_user: User,
+    forbidden_detail: str,
+) -> Project:
     """
-    Создать задачу в проекте (только владелец проекта)
+    Заблокировать проект владельца до конца транзакции, обновив его updated_at
+    
+    UPDATE берёт блокировку строки в PostgreSQL и блокировку записи в SQLite
+    (SELECT ... FOR UPDATE в SQLite не поддерживается), поэтому изменения
+    списка задач проекта выполняются строго по очереди и параллельные запросы
+    не получат одинаковые order. Заодно меняется версия проекта для ETag.
     """
     result = await db.execute(
-        select(Project).where(Project.id == project_id)
+        update(Project)
+        .where(Project.id == project_id, Project.customer_id == current_user.id)
+        .values(updated_at=datetime.utcnow())
+        .returning(Project)
     )
     project = result.scalar_one_or_none()
+    if project:
+        return project
     
-    if not project:
+    exists = await db.execute(select(Project.id).where(Project.id == project_id))
+    if exists.scalar_one_or_none() is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Проект не найден"
         )
-    
-    if project.customer_id != current_user.id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Только владелец проекта может создавать задачи"
-        )
-    
+    raise HTTPException(
+        status_code=status.HTTP_403_FORBIDDEN,
+        detail=forbidden_detail
+    )
+
+
+async def _next_task_order(db: AsyncSession, project_id: int) -> int:
+    """Следующий свободный order (вызывать после _lock_own_project)"""
     max_order = await db.execute(
         select(func.max(Task.order)).where(Task.project_id == project_id)
     )
-    next_order = (max_order.scalar() or 0) + 1
+    return (max_order.scalar() or 0) + 1
+
+
+def _task_values(project_id: int, task_data: TaskCreate, order: int) -> dict:
+    return {
+        "project_id": project_id,
+        "title": task_data.title,
+        "description": task_data.description,
+        "complexity": task_data.complexity,
+        "estimated_hours": task_data.estimated_hours,
+        "deadline": task_data.deadline,
+        "order": order,
+    }
+
+
+@router.post("/{project_id}/tasks", response_model=TaskResponse, status_code=status.HTTP_201_CREATED, dependencies=[Depends(QueryBudget(4))])
+async def create_task(
+    project_id: int,
+    task_data: TaskCreate,
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Создать задачу в проекте (только владелец проекта)
+    """
+    project = await _lock_own_project(
+        db, project_id, current_user, "Только владелец проекта может создавать задачи"
+    )
     
     task = Task(
-        project_id=project_id,
-        title=task_data.title,
-        description=task_data.description,
-        complexity=task_data.complexity,
-        estimated_hours=task_data.estimated_hours,
-        deadline=task_data.deadline,
-        order=next_order,
+        **_task_values(project_id, task_data, await _next_task_order(db, project_id)),
+        assignee=None,
     )
     
     db.add(task)
     await db.commit()
-    await db.refresh(task)
+    await _invalidate_project_feeds(project.status)
+    
+    return task
+
+
+@router.post("/{project_id}/tasks:batch", response_model=List[TaskResponse], status_code=status.HTTP_201_CREATED, dependencies=[Depends(QueryBudget(4))])
+async def create_tasks_batch(
+    project_id: int,
+    batch: TaskBatchCreate,
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Создать несколько задач одним запросом (только владелец проекта)
+    
+    Задачи получают последовательные order после уже существующих в порядке
+    перечисления и вставляются одним INSERT ... RETURNING. Либо создаются
+    все задачи, либо ни одной.
+    """
+    project = await _lock_own_project(
+        db, project_id, current_user, "Только владелец проекта может создавать задачи"
+    )
+    
+    next_order = await _next_task_order(db, project_id)
+    # Один многострочный INSERT: RETURNING не гарантирует порядок строк,
+    # поэтому задачи упорядочиваются по order
+    result = await db.execute(
+        insert(Task)
+        .values([
+            _task_values(project_id, task_data, next_order + offset)
+            for offset, task_data in enumerate(batch.tasks)
+        ])
+        .returning(Task)
+    )
+    tasks = sorted(result.scalars().all(), key=lambda task: task.order)
+    
+    await db.commit()
+    await _invalidate_project_feeds(project.status)
+    
+    return orm_response(List[TaskResponse], tasks, status_code=status.HTTP_201_CREATED)
+
+
+@router.patch("/{project_id}/tasks/order", response_model=List[TaskResponse], dependencies=[Depends(QueryBudget(5))])
+async def reorder_tasks(
+    project_id: int,
+    reorder: TaskReorder,
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Изменить порядок задач проекта (только владелец проекта)
+    
+    В `task_ids` передаются id всех задач проекта в новом порядке, задачи
+    получают order 1..N одним UPDATE. Возвращает задачи в новом порядке.
+    """
+    project = await _lock_own_project(
+        db, project_id, current_user, "Только владелец проекта может менять порядок задач"
+    )
     
     result = await db.execute(
         select(Task)
         .options(selectinload(Task.assignee))
-        .where(Task.id == task.id)
+        .where(Task.project_id == project_id)
     )
-    task = result.scalar_one()
+    tasks = {task.id: task for task in result.scalars().all()}
     
-    return task
+    if len(set(reorder.task_ids)) != len(reorder.task_ids) or set(reorder.task_ids) != tasks.keys():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Нужно передать id всех задач проекта, каждый ровно один раз"
+        )
+    
+    positions = {task_id: position for position, task_id in enumerate(reorder.task_ids, start=1)}
+    await db.execute(
+        update(Task)
+        .where(Task.project_id == project_id)
+        .values(order=case(positions, value=Task.id))
+        .execution_options(synchronize_session=False)
+    )
+    for task_id, position in positions.items():
+        set_committed_value(tasks[task_id], "order", position)
+    
+    await db.commit()
+    await _invalidate_project_feeds(project.status)
+    
+    return orm_response(List[TaskResponse], [tasks[task_id] for task_id in reorder.task_ids])
 
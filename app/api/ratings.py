@@ -1,18 +1,22 @@
 """
 API endpoints для рейтингов
 """
-from typing import List
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from pydantic import BaseModel, Field
-from sqlalchemy import select, func
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.database import get_db
-from app.api.deps import get_current_active_user
+from app.core.database import get_db, get_read_db
+from app.core.http_cache import conditional_response, weak_etag
+from app.core.query_budget import QueryBudget
+from app.api.deps import get_current_active_user, invalidate_cached_user
 from app.models.user import User, UserRole
 from app.models.project import Project, ProjectStatus
-from app.models.rating import Rating
+from app.models.rating import Rating, UserRatingStats
+from app.services.ratings import apply_rating
 
 
 router = APIRouter()
@@ -45,7 +49,17 @@ class RatingResponse(BaseModel):
         from_attributes = True
 
 
-@router.post("/", response_model=RatingResponse, status_code=status.HTTP_201_CREATED)
+class RatingSummaryResponse(BaseModel):
+    """Средние оценки пользователя по накопленным агрегатам"""
+    user_id: int
+    ratings_count: int
+    average_score: float
+    average_quality: Optional[float] = None
+    average_communication: Optional[float] = None
+    average_deadline: Optional[float] = None
+
+
+@router.post("/", response_model=RatingResponse, status_code=status.HTTP_201_CREATED, dependencies=[Depends(QueryBudget(6))])
 async def create_rating(
     rating_data: RatingCreate,
     current_user: User = Depends(get_current_active_user),
@@ -122,38 +136,55 @@ async def create_rating(
     )
     
     db.add(rating)
-    
-    reviewee_result = await db.execute(
-        select(User).where(User.id == rating_data.reviewee_id)
-    )
-    reviewee = reviewee_result.scalar_one_or_none()
-    
-    if reviewee:
-        avg_result = await db.execute(
-            select(func.avg(Rating.score))
-            .where(Rating.reviewee_id == reviewee.id)
+    try:
+        await db.flush()
+    except IntegrityError:
+        # Параллельный отзыв успел раньше (уникальный индекс project_id + reviewer_id)
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Вы уже оставили отзыв на этот проект"
         )
-        avg_score = avg_result.scalar() or 0
-        reviewee.rating_score = float(avg_score)
-        if current_user.role == UserRole.CUSTOMER:
-            reviewee.completed_projects += 1
+    
+    # Средний рейтинг — из накопленных сумм, обновлённых в этой же транзакции
+    await apply_rating(db, rating, completed_project=current_user.role == UserRole.CUSTOMER)
     
     await db.commit()
-    await db.refresh(rating)
+    invalidate_cached_user(rating.reviewee_id)
     
     return rating
 
 
-@router.get("/user/{user_id}", response_model=List[RatingResponse])
+@router.get("/user/{user_id}", response_model=List[RatingResponse], dependencies=[Depends(QueryBudget(2))])
 async def get_user_ratings(
     user_id: int,
+    request: Request,
+    response: Response,
     skip: int = 0,
     limit: int = 20,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Получить отзывы о пользователе
+    
+    Отзывы не редактируются, поэтому версия списка — число отзывов и время
+    последнего из агрегатов user_rating_stats; при совпадении If-None-Match
+    список не запрашивается.
     """
+    result = await db.execute(
+        select(UserRatingStats.ratings_count, UserRatingStats.updated_at)
+        .where(UserRatingStats.user_id == user_id)
+    )
+    ratings_count, updated_at = result.one_or_none() or (0, None)
+    not_modified = conditional_response(
+        request,
+        response,
+        weak_etag("ratings", user_id, ratings_count, updated_at, skip, limit),
+        updated_at,
+    )
+    if not_modified:
+        return not_modified
+    
     result = await db.execute(
         select(Rating)
         .where(Rating.reviewee_id == user_id)
@@ -165,3 +196,32 @@ async def get_user_ratings(
     return result.scalars().all()
 
 
+@router.get("/user/{user_id}/summary", response_model=RatingSummaryResponse, dependencies=[Depends(QueryBudget(1))])
+async def get_user_rating_summary(
+    user_id: int,
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Получить средние оценки пользователя (общую и по категориям)
+    """
+    result = await db.execute(
+        select(UserRatingStats).where(UserRatingStats.user_id == user_id)
+    )
+    stats = result.scalar_one_or_none()
+    
+    if not stats or not stats.ratings_count:
+        return RatingSummaryResponse(user_id=user_id, ratings_count=0, average_score=0.0)
+    
+    def average(total: int, count: int) -> Optional[float]:
+        return round(total / count, 2) if count else None
+    
+    return RatingSummaryResponse(
+        user_id=user_id,
+        ratings_count=stats.ratings_count,
+        average_score=round(stats.score_sum / stats.ratings_count, 2),
+        average_quality=average(stats.quality_sum, stats.quality_count),
+        average_communication=average(stats.communication_sum, stats.communication_count),
+        average_deadline=average(stats.deadline_sum, stats.deadline_count),
+    )
+
+
@@ -1,22 +1,27 @@
 """
 API endpoints для пользователей
 """
-from typing import List
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status, Response
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.database import get_db
-from app.api.deps import get_current_active_user
+from app.core.database import get_db, get_read_db
+from app.core.http_cache import conditional_response, weak_etag
+from app.core.query_budget import QueryBudget
+from app.core.pagination import NEXT_CURSOR_HEADER, decode_cursor_or_400, keyset_after_desc, next_cursor
+from app.api.deps import get_current_active_user, invalidate_cached_user
 from app.models.user import User, UserRole
-from app.schemas.user import UserResponse, UserUpdate
+from app.schemas.user import LeaderboardRankResponse, UserResponse, UserUpdate
+from app.services.leaderboard import LeaderboardWindow, leaderboard
+from app.services.tags import TagMatch, sync_user_skills, user_skill_filter
 
 
 router = APIRouter()
 
 
-@router.get("/me", response_model=UserResponse)
+@router.get("/me", response_model=UserResponse, dependencies=[Depends(QueryBudget(1))])
 async def get_current_user_profile(
     current_user: User = Depends(get_current_active_user)
 ):
@@ -26,7 +31,7 @@ async def get_current_user_profile(
     return current_user
 
 
-@router.put("/me", response_model=UserResponse)
+@router.put("/me", response_model=UserResponse, dependencies=[Depends(QueryBudget(8))])
 async def update_current_user_profile(
     user_data: UserUpdate,
     current_user: User = Depends(get_current_active_user),
@@ -38,26 +43,85 @@ async def update_current_user_profile(
     update_data = user_data.model_dump(exclude_unset=True)
     
     # Преобразуем skills в JSON строку если передано
-    if "skills" in update_data and update_data["skills"]:
+    if "skills" in update_data:
         import json
-        update_data["skills"] = json.dumps(update_data["skills"])
+        skills = update_data["skills"] or []
+        update_data["skills"] = json.dumps(skills) if skills else None
+        await sync_user_skills(db, current_user.id, skills)
     
     for field, value in update_data.items():
         setattr(current_user, field, value)
     
     await db.commit()
     await db.refresh(current_user)
+    invalidate_cached_user(current_user.id)
     
     return current_user
 
 
-@router.get("/{user_id}", response_model=UserResponse)
+# Маршруты /leaderboard объявлены до /{user_id}, иначе их перехватит он
+
+@router.get("/leaderboard", response_model=List[UserResponse], dependencies=[Depends(QueryBudget(2))])
+async def get_leaderboard(
+    limit: int = Query(10, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    window: LeaderboardWindow = LeaderboardWindow.ALL,
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Получить топ студентов по рейтингу
+    
+    Отдаётся из материализованного снимка (не старше
+    LEADERBOARD_MAX_STALENESS_SECONDS). `window=30d|90d` — по отзывам за период.
+    """
+    snapshot = await leaderboard.get(db, window)
+    entries = snapshot.top(limit, offset)
+    if not entries:
+        return []
+    
+    result = await db.execute(
+        select(User).where(User.id.in_([entry.user_id for entry in entries]))
+    )
+    users = {user.id: user for user in result.scalars()}
+    
+    return [users[entry.user_id] for entry in entries if entry.user_id in users]
+
+
+@router.get("/leaderboard/me", response_model=LeaderboardRankResponse, dependencies=[Depends(QueryBudget(2))])
+async def get_my_leaderboard_rank(
+    window: LeaderboardWindow = LeaderboardWindow.ALL,
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Получить своё место в лидерборде
+    
+    rank = null, если студента нет в лидерборде выбранного периода.
+    """
+    snapshot = await leaderboard.get(db, window)
+    entry = snapshot.rank_of(current_user.id)
+    
+    return LeaderboardRankResponse(
+        user_id=current_user.id,
+        window=window,
+        rank=entry.rank if entry else None,
+        score=entry.score if entry else None,
+        ratings_count=entry.ratings_count if entry else 0,
+        total=len(snapshot),
+    )
+
+
+@router.get("/{user_id}", response_model=UserResponse, dependencies=[Depends(QueryBudget(1))])
 async def get_user_profile(
     user_id: int,
-    db: AsyncSession = Depends(get_db)
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Получить публичный профиль пользователя
+    
+    Поддерживает условный GET (ETag по updated_at).
     """
     result = await db.execute(select(User).where(User.id == user_id))
     user = result.scalar_one_or_none()
@@ -68,46 +132,59 @@ async def get_user_profile(
             detail="Пользователь не найден"
         )
     
+    not_modified = conditional_response(
+        request, response, weak_etag("user", user.id, user.updated_at), user.updated_at
+    )
+    if not_modified:
+        return not_modified
+    
     return user
 
 
-@router.get("/", response_model=List[UserResponse])
+@router.get("/", response_model=List[UserResponse], dependencies=[Depends(QueryBudget(1))])
 async def list_students(
+    response: Response,
     skip: int = 0,
     limit: int = 20,
-    db: AsyncSession = Depends(get_db)
+    cursor: Optional[str] = None,
+    skill: Optional[List[str]] = Query(None),
+    skill_match: TagMatch = TagMatch.ANY,
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Получить список студентов (для заказчиков)
+    
+    Для глубокого листания передавайте `cursor` из заголовка `X-Next-Cursor`
+    предыдущего ответа вместо `skip`. Фильтр по навыкам:
+    `?skill=React&skill=Python`, `skill_match=all` — нужны все перечисленные.
     """
-    result = await db.execute(
+    query = (
         select(User)
         .where(User.role == UserRole.STUDENT)
         .where(User.is_active == True)
-        .order_by(User.rating_score.desc())
-        .offset(skip)
-        .limit(limit)
     )
     
-    return result.scalars().all()
-
-
-@router.get("/leaderboard", response_model=List[UserResponse])
-async def get_leaderboard(
-    limit: int = 10,
-    db: AsyncSession = Depends(get_db)
-):
-    """
-    Получить топ студентов по рейтингу
-    """
+    if skill:
+        skill_filter = user_skill_filter(User.id, skill, skill_match)
+        if skill_filter is not None:
+            query = query.where(skill_filter)
+    
+    if cursor:
+        query = query.where(
+            keyset_after_desc((User.rating_score, User.id), decode_cursor_or_400(cursor, (float, int)))
+        )
+    else:
+        query = query.offset(skip)
+    
     result = await db.execute(
-        select(User)
-        .where(User.role == UserRole.STUDENT)
-        .where(User.is_active == True)
-        .order_by(User.rating_score.desc())
-        .limit(limit)
+        query.order_by(User.rating_score.desc(), User.id.desc()).limit(limit)
     )
+    students = result.scalars().all()
+    
+    cursor_value = next_cursor(students, limit, "rating_score", "id")
+    if cursor_value:
+        response.headers[NEXT_CURSOR_HEADER] = cursor_value
     
-    return result.scalars().all()
+    return students
 
 
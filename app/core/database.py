@@ -1,17 +1,147 @@
 """
 Настройка подключения к базе данных
+
+Запись и чтение, которому нужны свежие данные, идут в основную БД
+(get_db). Endpoint'ы только для чтения берут сессию get_read_db: она
+открывается на реплике из DATABASE_REPLICA_URLS по кругу. Реплика, к
+которой не удалось подключиться, пропускается db_replica_retry_seconds,
+а если недоступны все — чтение идёт в основную БД.
+
+Реплики отстают от основной БД, поэтому после успешного изменяющего
+запроса ReadYourWritesMiddleware выдаёт клиенту окно (cookie и заголовок
+X-Primary-Until) на db_read_your_writes_seconds: пока оно не истекло,
+get_read_db читает из основной БД и клиент видит свою запись.
 """
-from sqlalchemy import create_engine
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
+import logging
+import math
+import time
+from typing import List, Optional
+
+from fastapi import Depends, Request
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.exc import DBAPIError, TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.orm import DeclarativeBase
 
 from app.core.config import settings
+from app.core.metrics import install_db_metrics
+from app.core.query_log import install_query_logging
+
+
+logger = logging.getLogger("work21.database")
+
+
+def _engine_options(database_url: str) -> dict:
+    """Параметры движка и пула соединений из настроек"""
+    options = {
+        "echo": settings.db_echo,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+    }
+    # SQLite использует собственные пулы без очереди соединений
+    if make_url(database_url).get_backend_name() != "sqlite":
+        options.update(
+            pool_size=settings.db_pool_size,
+            max_overflow=settings.db_max_overflow,
+            pool_timeout=settings.db_pool_timeout,
+            pool_recycle=settings.db_pool_recycle,
+        )
+    return options
+
+
+class PoolStats:
+    """Счётчики событий пула соединений движка"""
+    
+    # Накопленные с запуска итоги; остальные числа снимка — текущее состояние
+    COUNTERS = ("connects", "checkouts", "overflow_checkouts", "invalidations", "timeouts")
+    
+    def __init__(self, engine: Engine):
+        self.engine = engine
+        self.connects = 0
+        self.checkouts = 0
+        self.overflow_checkouts = 0
+        self.invalidations = 0
+        self.timeouts = 0
+        # Сейчас стоят в очереди пула: свободных соединений нет и открыть
+        # новое нельзя (рост — пул мал для нагрузки). Открытие нового
+        # соединения ожиданием не считается
+        self.waiting = 0
+        
+        # У пула нет события до выдачи соединения: оборачиваем raw_connection
+        # движка (сам пул пересоздаётся при dispose, движок — нет)
+        raw_connection = engine.raw_connection
+        
+        def counted_raw_connection():
+            # Между проверкой и выдачей нет переключения задач: решение пула
+            # встать в очередь принимается по тому же состоянию
+            queued = self._pool_exhausted()
+            if queued:
+                self.waiting += 1
+            try:
+                return raw_connection()
+            except PoolTimeoutError:
+                # Не дождались свободного соединения за pool_timeout
+                self.timeouts += 1
+                raise
+            finally:
+                if queued:
+                    self.waiting -= 1
+        
+        engine.raw_connection = counted_raw_connection
+        
+        event.listen(engine, "connect", self._on_connect)
+        event.listen(engine, "checkout", self._on_checkout)
+        event.listen(engine, "invalidate", self._on_invalidate)
+    
+    def _pool_exhausted(self) -> bool:
+        """Все соединения пула выданы и overflow исчерпан: выдача встанет в очередь"""
+        pool = self.engine.pool
+        # Предел overflow у QueuePool не публичный; -1 — без предела
+        max_overflow = getattr(pool, "_max_overflow", -1)
+        if not hasattr(pool, "checkedin") or max_overflow < 0:
+            return False
+        return pool.checkedin() == 0 and pool.overflow() >= max_overflow
+    
+    def _on_connect(self, dbapi_connection, connection_record):
+        self.connects += 1
+    
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        self.checkouts += 1
+        pool = self.engine.pool
+        if hasattr(pool, "overflow") and pool.overflow() > 0 and pool.checkedout() > pool.size():
+            # Соединение выдано сверх pool_size — пул работает на пределе
+            self.overflow_checkouts += 1
+    
+    def _on_invalidate(self, dbapi_connection, connection_record, exception):
+        self.invalidations += 1
+    
+    def snapshot(self) -> dict:
+        """Текущее состояние пула и накопленные счётчики"""
+        pool = self.engine.pool
+        stats = {
+            "pool": type(pool).__name__,
+            "connects": self.connects,
+            "checkouts": self.checkouts,
+            "overflow_checkouts": self.overflow_checkouts,
+            "invalidations": self.invalidations,
+            "timeouts": self.timeouts,
+            "waiting": self.waiting,
+        }
+        # Размеры доступны только у пулов с очередью (QueuePool и его async-вариант)
+        if hasattr(pool, "checkedout"):
+            stats.update(
+                size=pool.size(),
+                checked_in=pool.checkedin(),
+                checked_out=pool.checkedout(),
+                overflow=pool.overflow(),
+            )
+        return stats
 
 
 # Создаём асинхронный движок (для API)
 async_engine = create_async_engine(
     settings.database_url,
-    echo=settings.debug,
+    **_engine_options(settings.database_url),
 )
 
 # Синхронный движок (для SQLAdmin)
@@ -28,9 +158,20 @@ else:
 
 engine = create_engine(
     sync_database_url,
-    echo=settings.debug,
+    **_engine_options(sync_database_url),
 )
 
+# Статистика пулов (отдаётся в /health/db)
+async_pool_stats = PoolStats(async_engine.sync_engine)
+sync_pool_stats = PoolStats(engine)
+
+# Журнал SQL-запросов
+install_query_logging(async_engine.sync_engine)
+install_query_logging(engine)
+
+# Счётчики запросов к БД для метрик HTTP-запросов API
+install_db_metrics(async_engine.sync_engine)
+
 # Фабрика сессий (асинхронная)
 async_session_maker = async_sessionmaker(
     async_engine,
@@ -39,6 +180,142 @@ async_session_maker = async_sessionmaker(
 )
 
 
+def _replica_engine(url: str) -> AsyncEngine:
+    options = _engine_options(url)
+    if make_url(url).get_driver_name() == "asyncpg":
+        # Недоступная реплика не должна держать запрос весь таймаут asyncpg (60 с)
+        options["connect_args"] = {"timeout": settings.db_replica_connect_timeout_seconds}
+    replica = create_async_engine(url, **options)
+    install_query_logging(replica.sync_engine)
+    install_db_metrics(replica.sync_engine)
+    return replica
+
+
+class ReplicaRouter:
+    """Выбор реплики для чтения: по кругу, недоступные временно пропускаются"""
+    
+    def __init__(self, engines: List[AsyncEngine], retry_after: float):
+        self.engines = engines
+        self.retry_after = retry_after
+        self.pool_stats = [PoolStats(replica.sync_engine) for replica in engines]
+        self._session_makers = [
+            async_sessionmaker(replica, class_=AsyncSession, expire_on_commit=False)
+            for replica in engines
+        ]
+        self._next = 0
+        self._down_until = [0.0] * len(engines)
+        self.reads = [0] * len(engines)
+        self.failures = [0] * len(engines)
+        self.primary_reads = 0
+        self.pinned_reads = 0
+    
+    def _candidates(self) -> List[int]:
+        now = time.monotonic()
+        count = len(self.engines)
+        start = self._next
+        self._next = (self._next + 1) % count
+        return [
+            index
+            for index in ((start + offset) % count for offset in range(count))
+            if self._down_until[index] <= now
+        ]
+    
+    async def open_session(self) -> Optional[AsyncSession]:
+        """
+        Сессия на доступной реплике или None, если все реплики недоступны
+        
+        Соединение берётся сразу: ошибку подключения ещё можно обойти,
+        переключившись на другую реплику, а ошибку посреди запроса — нет.
+        """
+        for index in self._candidates():
+            session = self._session_makers[index]()
+            try:
+                await session.connection()
+            except (DBAPIError, OSError, PoolTimeoutError):
+                await session.close()
+                self.failures[index] += 1
+                self._down_until[index] = time.monotonic() + self.retry_after
+                logger.warning("Read replica %s is unavailable, skipping it for %.0fs", index, self.retry_after)
+                continue
+            self.reads[index] += 1
+            return session
+        
+        self.primary_reads += 1
+        return None
+    
+    def stats(self) -> dict:
+        """Чтения по репликам и их доступность"""
+        now = time.monotonic()
+        return {
+            "primary_reads": self.primary_reads,
+            "pinned_reads": self.pinned_reads,
+            "replicas": [
+                {
+                    "reads": self.reads[index],
+                    "failures": self.failures[index],
+                    "available": self._down_until[index] <= now,
+                    "pool": self.pool_stats[index].snapshot(),
+                }
+                for index in range(len(self.engines))
+            ],
+        }
+
+
+replica_router = ReplicaRouter(
+    [_replica_engine(url) for url in settings.database_replica_urls],
+    settings.db_replica_retry_seconds,
+)
+
+READ_PRIMARY_COOKIE = "work21_primary_until"
+READ_PRIMARY_HEADER = "X-Primary-Until"
+
+
+def reads_pinned_to_primary(request: Request) -> bool:
+    """Открыто ли у клиента окно чтения своих записей"""
+    value = request.headers.get(READ_PRIMARY_HEADER) or request.cookies.get(READ_PRIMARY_COOKIE)
+    try:
+        until = float(value)
+    except (TypeError, ValueError):
+        return False
+    now = time.time()
+    # Окно не может быть длиннее настроенного: подделанное значение не закрепит клиента навсегда
+    return now < until <= now + settings.db_read_your_writes_seconds
+
+
+class ReadYourWritesMiddleware:
+    """
+    ASGI middleware: после успешного изменяющего запроса отправляет клиенту
+    момент, до которого его чтения идут в основную БД
+    
+    Браузер вернёт cookie сам; клиенты без cookie передают значение
+    заголовка X-Primary-Until в следующих запросах.
+    """
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] in ("GET", "HEAD", "OPTIONS"):
+            await self.app(scope, receive, send)
+            return
+        
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                window = settings.db_read_your_writes_seconds
+                until = f"{time.time() + window:.3f}"
+                cookie = (
+                    f"{READ_PRIMARY_COOKIE}={until}; Max-Age={math.ceil(window)}; "
+                    "Path=/; HttpOnly; SameSite=Lax"
+                )
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"set-cookie", cookie.encode("latin-1")),
+                    (READ_PRIMARY_HEADER.lower().encode("latin-1"), until.encode("latin-1")),
+                ]
+            await send(message)
+        
+        await self.app(scope, receive, send_wrapper)
+
+
 class Base(DeclarativeBase):
     """Базовый класс для всех моделей"""
     pass
@@ -55,11 +332,38 @@ async def get_db() -> AsyncSession:
             await session.close()
 
 
+async def get_read_db(request: Request, db: AsyncSession = Depends(get_db)) -> AsyncSession:
+    """
+    Dependency сессии для endpoint'ов только для чтения
+    
+    Реплика по кругу; основная БД — если реплик нет, все недоступны
+    или у клиента открыто окно чтения своих записей. Для основной БД
+    отдаётся та же сессия get_db, что и авторизации: запрос не держит
+    два соединения основного пула одновременно.
+    """
+    if not replica_router.engines:
+        yield db
+        return
+    if reads_pinned_to_primary(request):
+        replica_router.pinned_reads += 1
+        yield db
+        return
+    
+    session = await replica_router.open_session()
+    if session is None:
+        yield db
+        return
+    
+    async with session:
+        try:
+            yield session
+        finally:
+            await session.close()
+
+
 async def init_db():
     """
     Инициализация базы данных (создание таблиц)
     """
     async with async_engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
-
-
@@ -0,0 +1,294 @@
+"""
+Хаб событий реального времени
+
+Мутации проектов и заявок публикуют события после commit, а хаб рассылает
+их подписчикам SSE/WebSocket этого воркера. Событие адресовано темам:
+`projects` — общая лента (новые открытые проекты), `user:{id}` — личные
+события пользователя. Подписчик получает только события своих тем.
+
+Доставка между воркерами — через бэкенд:
+- local — в пределах процесса; один LocalEventBackend можно подключить
+  к нескольким хабам, чтобы в тестах имитировать несколько воркеров;
+- redis — Redis pub/sub, события получают хабы всех воркеров
+  (нужен пакет redis).
+
+Очередь подписчика ограничена: клиент, который не успевает читать,
+отключается и при переподключении перечитывает состояние через REST.
+Так медленный клиент не копит память и не тормозит рассылку остальным.
+"""
+import asyncio
+import logging
+from collections import defaultdict
+from dataclasses import dataclass, field
+from functools import cached_property
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+import orjson
+
+from app.core.config import settings
+from app.core.metrics import Counter, Gauge, registry
+
+
+logger = logging.getLogger("work21.events")
+
+events_published = registry.register(Counter(
+    "events_published_total",
+    "Events published by type",
+    ("type",),
+))
+event_subscribers = registry.register(Gauge(
+    "event_subscribers",
+    "Active event stream subscribers in this worker",
+))
+event_subscribers_dropped = registry.register(Counter(
+    "event_subscribers_dropped_total",
+    "Subscribers disconnected because their event queue overflowed",
+))
+
+PROJECTS_TOPIC = "projects"
+
+
+def user_topic(user_id: int) -> str:
+    """Тема личных событий пользователя"""
+    return f"user:{user_id}"
+
+
+@dataclass
+class Event:
+    """Событие для подписчиков"""
+    type: str
+    topics: Tuple[str, ...]
+    data: Dict[str, Any] = field(default_factory=dict)
+    
+    @cached_property
+    def message(self) -> bytes:
+        """JSON для клиента (кодируется один раз на всех подписчиков)"""
+        return orjson.dumps({"type": self.type, "data": self.data})
+    
+    def encode(self) -> bytes:
+        return orjson.dumps({"type": self.type, "topics": self.topics, "data": self.data})
+    
+    @classmethod
+    def decode(cls, raw: bytes) -> "Event":
+        value = orjson.loads(raw)
+        return cls(type=value["type"], topics=tuple(value["topics"]), data=value["data"])
+
+
+class Subscription:
+    """Подписка одного клиента на набор тем"""
+    
+    def __init__(self, topics: Iterable[str], max_queue: int):
+        self.topics = frozenset(topics)
+        self._queue: asyncio.Queue = asyncio.Queue(max_queue)
+        self.closed = False
+    
+    def deliver(self, event: Event) -> bool:
+        """Положить событие в очередь; False — очередь переполнена, подписка закрыта"""
+        if self.closed:
+            return True
+        try:
+            self._queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.close()
+            return False
+        return True
+    
+    def close(self) -> None:
+        """Закрыть подписку: next() вернёт None после уже полученных событий"""
+        if self.closed:
+            return
+        self.closed = True
+        # Освобождаем место под маркер конца, если очередь переполнена
+        while self._queue.full():
+            self._queue.get_nowait()
+        self._queue.put_nowait(None)
+    
+    async def next(self, timeout: float) -> Optional[Event]:
+        """
+        Следующее событие или None, если подписка закрыта
+        
+        Если за timeout событий нет, поднимает asyncio.TimeoutError —
+        в этот момент транспорт отправляет heartbeat.
+        """
+        # asyncio.timeout, а не wait_for: не создаёт задачу на каждое ожидание
+        async with asyncio.timeout(timeout):
+            return await self._queue.get()
+
+
+class EventBackend:
+    """Доставка опубликованных событий хабам всех воркеров"""
+    
+    async def publish(self, event: Event) -> None:
+        raise NotImplementedError
+    
+    async def start(self, handler: Callable[[Event], None]) -> None:
+        raise NotImplementedError
+    
+    async def stop(self, handler: Callable[[Event], None]) -> None:
+        raise NotImplementedError
+
+
+class LocalEventBackend(EventBackend):
+    """Доставка в пределах процесса"""
+    
+    def __init__(self):
+        self._handlers: List[Callable[[Event], None]] = []
+    
+    async def publish(self, event: Event) -> None:
+        for handler in list(self._handlers):
+            handler(event)
+    
+    async def start(self, handler: Callable[[Event], None]) -> None:
+        self._handlers.append(handler)
+    
+    async def stop(self, handler: Callable[[Event], None]) -> None:
+        if handler in self._handlers:
+            self._handlers.remove(handler)
+
+
+class RedisEventBackend(EventBackend):
+    """
+    Redis pub/sub
+    
+    Использует только PUBLISH и SUBSCRIBE, поэтому подходит любой клиент
+    с интерфейсом redis.asyncio.Redis, в том числе fakeredis для тестов.
+    """
+    
+    def __init__(self, client: Any, channel: str = "work21:events"):
+        self.client = client
+        self.channel = channel
+        self._pubsub = None
+        self._task: Optional[asyncio.Task] = None
+    
+    @classmethod
+    def from_url(cls, url: str) -> "RedisEventBackend":
+        try:
+            import redis.asyncio as redis
+        except ImportError as exc:
+            raise RuntimeError(
+                "Для EVENTS_BACKEND=redis установите пакет redis"
+            ) from exc
+        return cls(redis.from_url(url))
+    
+    async def publish(self, event: Event) -> None:
+        await self.client.publish(self.channel, event.encode())
+    
+    async def _listen(self, handler: Callable[[Event], None]) -> None:
+        while True:
+            try:
+                async for message in self._pubsub.listen():
+                    if message.get("type") == "message":
+                        handler(Event.decode(message["data"]))
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Event subscription to Redis failed, retrying")
+                await asyncio.sleep(1.0)
+    
+    async def start(self, handler: Callable[[Event], None]) -> None:
+        self._pubsub = self.client.pubsub()
+        await self._pubsub.subscribe(self.channel)
+        self._task = asyncio.create_task(self._listen(handler))
+    
+    async def stop(self, handler: Callable[[Event], None]) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._pubsub is not None:
+            await self._pubsub.unsubscribe(self.channel)
+            await self._pubsub.aclose()
+            self._pubsub = None
+
+
+class EventHub:
+    """Подписки воркера, сгруппированные по темам"""
+    
+    def __init__(self, backend: EventBackend, max_queue: int):
+        self.backend = backend
+        self.max_queue = max_queue
+        self._by_topic: Dict[str, Set[Subscription]] = defaultdict(set)
+        self._subscriptions: Set[Subscription] = set()
+        self.delivered = 0
+        self.dropped = 0
+    
+    def subscribe(self, topics: Iterable[str]) -> Subscription:
+        """Подписаться на темы (не забудьте unsubscribe при отключении клиента)"""
+        subscription = Subscription(topics, self.max_queue)
+        for topic in subscription.topics:
+            self._by_topic[topic].add(subscription)
+        self._subscriptions.add(subscription)
+        event_subscribers.inc()
+        return subscription
+    
+    def unsubscribe(self, subscription: Subscription) -> None:
+        if subscription not in self._subscriptions:
+            return
+        self._subscriptions.discard(subscription)
+        for topic in subscription.topics:
+            subscribers = self._by_topic.get(topic)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._by_topic[topic]
+        subscription.close()
+        event_subscribers.dec()
+    
+    def dispatch(self, event: Event) -> None:
+        """Разослать событие подписчикам этого воркера"""
+        if len(event.topics) == 1:
+            recipients = self._by_topic.get(event.topics[0], ())
+        else:
+            # Подписчик нескольких тем получает событие один раз
+            recipients = set().union(*(self._by_topic.get(topic, ()) for topic in event.topics))
+        for subscription in list(recipients):
+            if subscription.deliver(event):
+                self.delivered += 1
+            else:
+                self.dropped += 1
+                event_subscribers_dropped.inc()
+    
+    async def publish(self, event_type: str, topics: Iterable[str], **data: Any) -> None:
+        """
+        Опубликовать событие (вызывать после commit)
+        
+        Ошибка доставки только пишется в журнал: событие — подсказка клиенту
+        обновить данные, и оно не должно ронять уже выполненный запрос.
+        """
+        event = Event(type=event_type, topics=tuple(topics), data=data)
+        events_published.inc((event_type,))
+        try:
+            await self.backend.publish(event)
+        except Exception:
+            logger.exception("Failed to publish event %s", event_type)
+    
+    async def start(self) -> None:
+        """Начать получать события от бэкенда"""
+        await self.backend.start(self.dispatch)
+    
+    async def stop(self) -> None:
+        """Отключиться от бэкенда и закрыть все подписки"""
+        await self.backend.stop(self.dispatch)
+        for subscription in list(self._subscriptions):
+            self.unsubscribe(subscription)
+    
+    def stats(self) -> dict:
+        """Число подписчиков и доставленных событий"""
+        return {
+            "subscribers": len(self._subscriptions),
+            "topics": len(self._by_topic),
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+        }
+
+
+def _create_backend() -> EventBackend:
+    if settings.events_backend == "redis":
+        return RedisEventBackend.from_url(settings.redis_url)
+    return LocalEventBackend()
+
+
+event_hub = EventHub(_create_backend(), settings.events_queue_size)
@@ -0,0 +1,95 @@
+"""
+HTTP-кэширование ответов (ETag / Last-Modified / 304)
+
+ETag считается по версионным колонкам (updated_at и т.п.), а не по телу
+ответа, поэтому проверить If-None-Match можно до загрузки и сериализации
+объекта. ETag слабый (W/"..."): одинаковая версия данных означает
+семантически одинаковый ответ, но не побайтно одинаковый.
+"""
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Optional
+
+from fastapi import Request, Response, status
+
+from app.core.config import settings
+
+
+def weak_etag(*parts: Any) -> str:
+    """Слабый ETag из значений, определяющих версию ответа"""
+    raw = "|".join("" if part is None else str(part) for part in parts)
+    return 'W/"%s"' % hashlib.sha1(raw.encode("utf-8")).hexdigest()[:20]
+
+
+def _as_utc(value: datetime) -> datetime:
+    # В БД хранится наивное UTC-время (datetime.utcnow)
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    """Слабое сравнение (RFC 9110): W/ при сравнении не учитывается"""
+    if header.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(
+        candidate.strip().removeprefix("W/") == opaque
+        for candidate in header.split(",")
+    )
+
+
+def _not_modified_since(header: str, last_modified: datetime) -> bool:
+    try:
+        since = parsedate_to_datetime(header)
+    except (TypeError, ValueError):
+        return False
+    if since is None:
+        return False
+    # Last-Modified передаётся с точностью до секунды
+    return _as_utc(last_modified).replace(microsecond=0) <= _as_utc(since)
+
+
+def cache_headers(etag: str, last_modified: Optional[datetime] = None) -> dict:
+    """Заголовки валидаторов и Cache-Control для ответа"""
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={settings.http_cache_max_age_seconds}, must-revalidate",
+    }
+    if last_modified is not None:
+        headers["Last-Modified"] = format_datetime(_as_utc(last_modified), usegmt=True)
+    return headers
+
+
+def conditional_response(
+    request: Request,
+    response: Response,
+    etag: str,
+    last_modified: Optional[datetime] = None,
+) -> Optional[Response]:
+    """
+    Проверить условный GET
+    
+    Возвращает готовый ответ 304, если у клиента актуальная версия;
+    иначе проставляет заголовки кэширования в response и возвращает None.
+    If-Modified-Since учитывается, только если нет If-None-Match.
+    """
+    headers = cache_headers(etag, last_modified)
+    
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        not_modified = _etag_matches(if_none_match, etag)
+    else:
+        if_modified_since = request.headers.get("if-modified-since")
+        not_modified = (
+            if_modified_since is not None
+            and last_modified is not None
+            and _not_modified_since(if_modified_since, last_modified)
+        )
+    
+    if not_modified:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    
+    response.headers.update(headers)
+    return None
@@ -0,0 +1,300 @@
+"""
+Общий HTTP-клиент для исходящих запросов (LLM и другие AI-интеграции)
+
+Один httpx.AsyncClient создаётся в lifespan и закрывается при остановке:
+соединения и TLS-сессии переиспользуются между запросами (keep-alive,
+HTTP/2 при установленном пакете h2), а не открываются заново на каждый
+вызов.
+
+Поверх пула:
+- семафор на хост ограничивает число одновременных запросов к нему
+  (а значит, и соединений); запрос, не дождавшийся слота за
+  outbound_acquire_timeout_seconds, получает OutboundBusyError;
+- автомат (circuit breaker) на хост: после outbound_breaker_failure_threshold
+  ошибок подряд (сеть, таймаут, 429, 5xx) запросы к хосту сразу получают
+  CircuitOpenError на outbound_breaker_reset_seconds, затем проходит один
+  пробный запрос — успех закрывает автомат, ошибка снова открывает.
+  Так деградация провайдера не занимает исполнителей на весь таймаут.
+"""
+import asyncio
+import time
+from collections import defaultdict
+from typing import Any, Dict, Optional
+
+import httpx
+
+from app.core.config import settings
+from app.core.metrics import Counter, Histogram, registry
+
+
+outbound_requests = registry.register(Counter(
+    "outbound_requests_total",
+    "Outbound HTTP requests by host and outcome (2xx..5xx, error, busy, circuit_open)",
+    ("host", "outcome"),
+))
+outbound_request_duration = registry.register(Histogram(
+    "outbound_request_duration_seconds",
+    "Outbound HTTP request latency",
+    ("host",),
+    (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0),
+))
+outbound_circuit_opened = registry.register(Counter(
+    "outbound_circuit_opened_total",
+    "Times the outbound circuit breaker opened",
+    ("host",),
+))
+
+
+class OutboundBusyError(Exception):
+    """Все слоты запросов к хосту заняты дольше допустимого ожидания"""
+    
+    def __init__(self, host: str):
+        super().__init__(f"Превышен лимит одновременных запросов к {host}")
+        self.host = host
+
+
+class CircuitOpenError(Exception):
+    """Хост признан недоступным, запрос не отправлялся"""
+    
+    def __init__(self, host: str, retry_after: float):
+        super().__init__(f"{host} временно недоступен (circuit breaker открыт)")
+        self.host = host
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """Автомат одного хоста: closed → open → half-open → closed"""
+    
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.opens = 0
+        self._probing = False
+    
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if self._probing or time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+    
+    def before_request(self, host: str) -> None:
+        """Пропустить запрос или поднять CircuitOpenError"""
+        if self.opened_at is None:
+            return
+        remaining = self.reset_timeout - (time.monotonic() - self.opened_at)
+        if remaining > 0:
+            raise CircuitOpenError(host, remaining)
+        if self._probing:
+            # Пробный запрос уже идёт: остальные ждут его итога
+            raise CircuitOpenError(host, 1.0)
+        self._probing = True
+    
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+    
+    def record_failure(self) -> bool:
+        """Учесть ошибку; True — автомат только что открылся"""
+        self.failures += 1
+        probe_failed = self._probing
+        self._probing = False
+        if probe_failed or (self.opened_at is None and self.failures >= self.failure_threshold):
+            self.opened_at = time.monotonic()
+            self.opens += 1
+            return True
+        return False
+    
+    def release(self) -> None:
+        """Запрос прерван без итога: отдать право на пробу следующему"""
+        self._probing = False
+
+
+def _is_failure(response: httpx.Response) -> bool:
+    return response.status_code == 429 or response.status_code >= 500
+
+
+class OutboundClient:
+    """Пул исходящих соединений с лимитами и circuit breaker по хостам"""
+    
+    def __init__(
+        self,
+        http2: bool,
+        limits: httpx.Limits,
+        timeout: httpx.Timeout,
+        max_concurrency_per_host: int,
+        acquire_timeout: float,
+        breaker_failure_threshold: int,
+        breaker_reset_timeout: float,
+    ):
+        self.http2 = http2
+        self.limits = limits
+        self.timeout = timeout
+        self.max_concurrency_per_host = max_concurrency_per_host
+        self.acquire_timeout = acquire_timeout
+        self.breaker_failure_threshold = breaker_failure_threshold
+        self.breaker_reset_timeout = breaker_reset_timeout
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self.in_flight: Dict[str, int] = defaultdict(int)
+        self.waiting: Dict[str, int] = defaultdict(int)
+    
+    @classmethod
+    def from_settings(cls) -> "OutboundClient":
+        return cls(
+            http2=settings.outbound_http2,
+            limits=httpx.Limits(
+                max_connections=settings.outbound_max_connections,
+                max_keepalive_connections=settings.outbound_max_keepalive_connections,
+                keepalive_expiry=settings.outbound_keepalive_expiry_seconds,
+            ),
+            timeout=httpx.Timeout(
+                settings.outbound_timeout_seconds,
+                connect=settings.outbound_connect_timeout_seconds,
+            ),
+            max_concurrency_per_host=settings.outbound_max_concurrency_per_host,
+            acquire_timeout=settings.outbound_acquire_timeout_seconds,
+            breaker_failure_threshold=settings.outbound_breaker_failure_threshold,
+            breaker_reset_timeout=settings.outbound_breaker_reset_seconds,
+        )
+    
+    async def start(self) -> None:
+        """Создать клиент (вызывается в lifespan)"""
+        if self._client is not None:
+            return
+        if self.http2:
+            try:
+                import h2  # noqa: F401
+            except ImportError as exc:
+                raise RuntimeError(
+                    "Для OUTBOUND_HTTP2=true установите пакет h2 (httpx[http2])"
+                ) from exc
+        self._client = httpx.AsyncClient(http2=self.http2, limits=self.limits, timeout=self.timeout)
+    
+    async def stop(self) -> None:
+        """Закрыть соединения пула"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+    
+    def request_timeout(self, read: float) -> httpx.Timeout:
+        """Таймаут запроса с собственным временем ответа и общими connect/pool"""
+        return httpx.Timeout(read, connect=self.timeout.connect, pool=self.timeout.pool)
+    
+    def _semaphore(self, host: str) -> asyncio.Semaphore:
+        semaphore = self._semaphores.get(host)
+        if semaphore is None:
+            semaphore = self._semaphores[host] = asyncio.Semaphore(self.max_concurrency_per_host)
+        return semaphore
+    
+    def _breaker(self, host: str) -> CircuitBreaker:
+        breaker = self._breakers.get(host)
+        if breaker is None:
+            breaker = self._breakers[host] = CircuitBreaker(
+                self.breaker_failure_threshold,
+                self.breaker_reset_timeout,
+            )
+        return breaker
+    
+    async def request(self, method: str, url: str, **kwargs: Any) -> httpx.Response:
+        """
+        Отправить запрос через общий пул
+        
+        Поднимает CircuitOpenError, OutboundBusyError или исключения httpx;
+        ответ с любым статусом возвращается как есть.
+        """
+        if self._client is None:
+            raise RuntimeError("HTTP-клиент не запущен: start() вызывается в lifespan")
+        # Хост с портом: лимиты и автомат относятся к конкретному сервису
+        host = httpx.URL(url).netloc.decode("ascii")
+        breaker = self._breaker(host)
+        try:
+            breaker.before_request(host)
+        except CircuitOpenError:
+            outbound_requests.inc((host, "circuit_open"))
+            raise
+        
+        semaphore = self._semaphore(host)
+        self.waiting[host] += 1
+        try:
+            async with asyncio.timeout(self.acquire_timeout):
+                await semaphore.acquire()
+        except asyncio.TimeoutError:
+            breaker.release()
+            outbound_requests.inc((host, "busy"))
+            raise OutboundBusyError(host)
+        except BaseException:
+            breaker.release()
+            raise
+        finally:
+            self.waiting[host] -= 1
+        
+        self.in_flight[host] += 1
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            response = await self._client.request(method, url, **kwargs)
+        except httpx.TransportError:
+            if breaker.record_failure():
+                outbound_circuit_opened.inc((host,))
+            raise
+        except BaseException:
+            breaker.release()
+            raise
+        else:
+            outcome = f"{response.status_code // 100}xx"
+            if not _is_failure(response):
+                breaker.record_success()
+            elif breaker.record_failure():
+                outbound_circuit_opened.inc((host,))
+            return response
+        finally:
+            semaphore.release()
+            self.in_flight[host] -= 1
+            outbound_requests.inc((host, outcome))
+            outbound_request_duration.observe(time.perf_counter() - started, (host,))
+    
+    def pool_stats(self) -> Dict[str, int]:
+        """Соединения пула httpx: всего, занятые и простаивающие"""
+        stats = {
+            "max_connections": self.limits.max_connections or 0,
+            "connections": 0,
+            "active": 0,
+            "idle": 0,
+        }
+        # Внутренности httpcore: при их изменении метрика пула обнулится, а не упадёт
+        pool = getattr(getattr(self._client, "_transport", None), "_pool", None)
+        for connection in getattr(pool, "connections", ()):
+            stats["connections"] += 1
+            if connection.is_idle():
+                stats["idle"] += 1
+            else:
+                stats["active"] += 1
+        return stats
+    
+    def stats(self) -> dict:
+        """Состояние пула, очередей и автоматов по хостам"""
+        hosts = set(self._semaphores) | set(self._breakers)
+        return {
+            "started": self._client is not None,
+            "http2": self.http2,
+            "pool": self.pool_stats(),
+            "hosts": {
+                host: {
+                    "in_flight": self.in_flight[host],
+                    "waiting": self.waiting[host],
+                    "circuit": self._breaker(host).state,
+                    "consecutive_failures": self._breaker(host).failures,
+                    "circuit_opens": self._breaker(host).opens,
+                }
+                for host in sorted(hosts)
+            },
+        }
+
+
+http_client = OutboundClient.from_settings()
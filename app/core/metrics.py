@@ -0,0 +1,274 @@
+"""
+Метрики производительности в формате Prometheus
+
+Middleware измеряет каждый HTTP-запрос (латентность по шаблону маршрута,
+размер ответа, статус), а хуки SQLAlchemy считают запросы к БД и их время
+в рамках текущего HTTP-запроса. Всё хранится в памяти процесса и отдаётся
+текстом на /metrics; квантили (p50/p95/p99) считаются по гистограммам
+через histogram_quantile().
+"""
+import bisect
+import time
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+LabelValues = Tuple[str, ...]
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 10.0)
+DB_TIME_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+DB_STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+
+def _format_labels(names: Sequence[str], values: LabelValues, extra: str = "") -> str:
+    parts = [
+        '%s="%s"' % (name, value.replace("\\", "\\\\").replace('"', '\\"'))
+        for name, value in zip(names, values)
+    ]
+    if extra:
+        parts.append(extra)
+    return "{%s}" % ",".join(parts) if parts else ""
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Монотонный счётчик с метками"""
+    
+    metric_type = "counter"
+    
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[LabelValues, float] = {}
+    
+    def inc(self, labels: LabelValues = (), amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) + amount
+    
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} {self.metric_type}"
+        for labels, value in self._values.items():
+            yield f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+
+
+class Gauge(Counter):
+    """Текущее значение с метками"""
+    
+    metric_type = "gauge"
+    
+    def dec(self, labels: LabelValues = (), amount: float = 1) -> None:
+        self.inc(labels, -amount)
+
+
+class Histogram:
+    """Гистограмма с фиксированными границами корзин"""
+    
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # labels -> [счётчики корзин..., +Inf, сумма]
+        self._values: Dict[LabelValues, List[float]] = {}
+    
+    def observe(self, value: float, labels: LabelValues = ()) -> None:
+        data = self._values.get(labels)
+        if data is None:
+            data = self._values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        data[bisect.bisect_left(self.buckets, value)] += 1
+        data[-1] += value
+    
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} histogram"
+        for labels, data in self._values.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets, data):
+                cumulative += count
+                le = 'le="%s"' % _format_value(bound)
+                yield f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}"
+            cumulative += data[len(self.buckets)]
+            inf = 'le="+Inf"'
+            yield f"{self.name}_bucket{_format_labels(self.labelnames, labels, inf)} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_value(data[-1])}"
+            yield f"{self.name}_count{_format_labels(self.labelnames, labels)} {cumulative}"
+
+
+class MetricsRegistry:
+    """Набор метрик и коллекторов, вычисляемых в момент чтения"""
+    
+    def __init__(self):
+        self._metrics: list = []
+        self._collectors: List[Callable[[], Iterable[str]]] = []
+    
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+    
+    def register_collector(self, collector: Callable[[], Iterable[str]]) -> None:
+        """Добавить функцию, которая при чтении возвращает строки метрик"""
+        self._collectors.append(collector)
+    
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for collector in self._collectors:
+            lines.extend(collector())
+        return "\n".join(lines) + "\n"
+
+
+def _sample_lines(
+    metric_type: str,
+    name: str,
+    documentation: str,
+    samples: Dict[LabelValues, float],
+    labelnames: Sequence[str],
+) -> Iterable[str]:
+    yield f"# HELP {name} {documentation}"
+    yield f"# TYPE {name} {metric_type}"
+    for labels, value in samples.items():
+        yield f"{name}{_format_labels(labelnames, labels)} {_format_value(value)}"
+
+
+def gauge_lines(name: str, documentation: str, samples: Dict[LabelValues, float], labelnames: Sequence[str] = ()) -> Iterable[str]:
+    """Строки gauge-метрики для коллекторов"""
+    return _sample_lines("gauge", name, documentation, samples, labelnames)
+
+
+def counter_lines(name: str, documentation: str, samples: Dict[LabelValues, float], labelnames: Sequence[str] = ()) -> Iterable[str]:
+    """
+    Строки counter-метрики для коллекторов
+    
+    Для накопленных с запуска процесса итогов: к ним применимы rate()
+    и increase(). Имя по соглашению Prometheus заканчивается на _total.
+    """
+    return _sample_lines("counter", name, documentation, samples, labelnames)
+
+
+registry = MetricsRegistry()
+
+HTTP_LABELS = ("method", "route")
+
+http_requests_total = registry.register(Counter(
+    "http_requests_total", "HTTP requests by route and status", HTTP_LABELS + ("status",)
+))
+http_request_duration = registry.register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency", HTTP_LABELS, LATENCY_BUCKETS
+))
+http_response_size = registry.register(Histogram(
+    "http_response_size_bytes", "HTTP response body size", HTTP_LABELS, SIZE_BUCKETS
+))
+http_db_statements = registry.register(Histogram(
+    "http_request_db_statements", "DB statements per HTTP request", HTTP_LABELS, DB_STATEMENT_BUCKETS
+))
+http_db_duration = registry.register(Histogram(
+    "http_request_db_duration_seconds", "DB time per HTTP request", HTTP_LABELS, DB_TIME_BUCKETS
+))
+http_in_flight = registry.register(Gauge(
+    "http_requests_in_flight", "HTTP requests currently being served"
+))
+
+
+class RequestDbStats:
+    """Счётчики обращений к БД в рамках одного HTTP-запроса или WebSocket-соединения"""
+    
+    __slots__ = ("statements", "duration")
+    
+    def __init__(self):
+        self.statements = 0
+        self.duration = 0.0
+
+
+request_db_stats: ContextVar[Optional[RequestDbStats]] = ContextVar("request_db_stats", default=None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._metrics_start_time = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = request_db_stats.get()
+    if stats is not None:
+        stats.statements += 1
+        stats.duration += time.perf_counter() - context._metrics_start_time
+
+
+def install_db_metrics(engine: Engine) -> None:
+    """Считать запросы к БД текущего HTTP-запроса (для async движка — sync_engine)"""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware, измеряющее HTTP-запросы
+    
+    Написано на чистом ASGI, без BaseHTTPMiddleware, чтобы не добавлять
+    лишнюю задачу и буферизацию ответа на каждый запрос.
+    """
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "websocket":
+            # HTTP-метрики к WebSocket не относятся, но запросы к БД
+            # считаются — по ним проверяется бюджет (QueryBudget)
+            token = request_db_stats.set(RequestDbStats())
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                request_db_stats.reset(token)
+            return
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        stats = RequestDbStats()
+        token = request_db_stats.set(stats)
+        status_code = 500
+        response_size = 0
+        
+        async def send_wrapper(message):
+            nonlocal status_code, response_size
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                response_size += len(message.get("body", b""))
+            await send(message)
+        
+        http_in_flight.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration = time.perf_counter() - started
+            http_in_flight.dec()
+            request_db_stats.reset(token)
+            
+            # Шаблон маршрута (/projects/{project_id}), а не сырой путь,
+            # чтобы число серий не росло с количеством объектов
+            route = scope.get("route")
+            route_label = getattr(route, "path", None) or "<other>"
+            labels = (scope["method"], route_label)
+            
+            http_requests_total.inc(labels + (str(status_code),))
+            http_request_duration.observe(duration, labels)
+            http_response_size.observe(response_size, labels)
+            http_db_statements.observe(stats.statements, labels)
+            http_db_duration.observe(stats.duration, labels)
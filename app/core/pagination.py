@@ -0,0 +1,107 @@
+"""
+Keyset (cursor) пагинация
+
+Курсор — непрозрачная строка с ключом сортировки последней строки страницы.
+Следующая страница выбирается условием по ключу, а не OFFSET, поэтому её
+стоимость не зависит от глубины, а вставка новых строк не сдвигает выдачу.
+"""
+import base64
+import json
+import math
+from datetime import datetime
+from typing import Any, Optional, Sequence
+
+from fastapi import HTTPException, status
+from sqlalchemy import and_, or_
+from sqlalchemy.sql.elements import ColumnElement
+
+
+# Заголовок, в котором возвращается курсор следующей страницы
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(*values: Any) -> str:
+    """Упаковать значения ключа сортировки в непрозрачный курсор"""
+    payload = [
+        {"dt": value.isoformat()} if isinstance(value, datetime) else value
+        for value in values
+    ]
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+def _decode_value(value: Any, kind: type) -> Any:
+    """Значение ключа из курсора, приведённое к типу колонки"""
+    if kind is datetime:
+        if isinstance(value, dict) and set(value) == {"dt"} and isinstance(value["dt"], str):
+            moment = datetime.fromisoformat(value["dt"])
+            # Колонки DateTime без часового пояса: asyncpg не сравнит с aware-значением
+            if moment.tzinfo is None:
+                return moment
+    elif kind is float:
+        # json.loads пропускает NaN и Infinity; int — целое значение float-колонки
+        if isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value):
+            return float(value)
+    elif isinstance(value, kind) and not isinstance(value, bool):
+        return value
+    raise ValueError("Некорректный курсор")
+
+
+def decode_cursor(cursor: str, kinds: Sequence[type]) -> list:
+    """
+    Распаковать курсор
+    
+    kinds — типы значений ключа сортировки (datetime, float, int, str):
+    значения другого типа в базу не передаются.
+    
+    Raises:
+        ValueError: курсор повреждён или не подходит к ключу сортировки
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, UnicodeError) as exc:
+        raise ValueError("Некорректный курсор") from exc
+    
+    if not isinstance(payload, list) or len(payload) != len(kinds):
+        raise ValueError("Некорректный курсор")
+    
+    return [_decode_value(value, kind) for value, kind in zip(payload, kinds)]
+
+
+def decode_cursor_or_400(cursor: str, kinds: Sequence[type]) -> list:
+    """Распаковать курсор пагинации, ответив 400 на повреждённый"""
+    try:
+        return decode_cursor(cursor, kinds)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Некорректный курсор пагинации"
+        )
+
+
+def keyset_after_desc(
+    columns: Sequence[ColumnElement],
+    values: Sequence[Any],
+) -> ColumnElement:
+    """
+    Условие «строго после курсора» для сортировки по убыванию всех колонок
+    
+    Разворачивается в a <= x AND ((a < x) OR (a = x AND b < y) ...), что
+    одинаково работает в PostgreSQL и SQLite и использует составной индекс.
+    Ведущее a <= x задаёт диапазон индекса: из одного OR с параметрами
+    SQLite границу не выводит и читает индекс с начала, как OFFSET.
+    """
+    clauses = []
+    for i, (column, value) in enumerate(zip(columns, values)):
+        prefix = [columns[j] == values[j] for j in range(i)]
+        clauses.append(and_(*prefix, column < value))
+    return and_(columns[0] <= values[0], or_(*clauses))
+
+
+def next_cursor(rows: Sequence[Any], limit: int, *attrs: str) -> Optional[str]:
+    """Курсор следующей страницы или None, если страница последняя"""
+    if limit <= 0 or len(rows) < limit:
+        return None
+    last = rows[-1]
+    return encode_cursor(*(getattr(last, attr) for attr in attrs))
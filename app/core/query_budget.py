@@ -0,0 +1,100 @@
+"""
+Бюджет запросов к БД для endpoint'ов
+
+Каждый маршрут объявляет, сколько SQL-запросов он может выполнить
+(`dependencies=[Depends(QueryBudget(n))]`). Превышение — почти всегда N+1
+или лишний перезапрос после commit, поэтому оно пишется в журнал, а в режиме
+`QUERY_BUDGET_MODE=raise` (для тестов) роняет запрос с ошибкой 500.
+
+`count_queries` — тот же подсчёт для произвольного кода (тесты, скрипты).
+"""
+import logging
+from contextlib import contextmanager
+from typing import Iterator, List, Optional
+
+from fastapi.requests import HTTPConnection
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+from app.core.metrics import Counter, registry, request_db_stats
+
+
+logger = logging.getLogger("work21.query_budget")
+
+query_budget_exceeded = registry.register(Counter(
+    "http_query_budget_exceeded_total",
+    "Requests that ran more DB statements than their route budget",
+    ("method", "route"),
+))
+
+
+class QueryBudgetExceeded(RuntimeError):
+    """Endpoint выполнил больше запросов, чем разрешено бюджетом"""
+
+
+class QueryBudget:
+    """
+    Dependency, проверяющая число SQL-запросов за время обработки запроса
+    
+    Запросы считаются хуками из app.core.metrics, поэтому бюджет работает
+    только под MetricsMiddleware. У WebSocket бюджет охватывает всё
+    соединение, от рукопожатия до закрытия.
+    """
+    
+    def __init__(self, max_statements: int):
+        self.max_statements = max_statements
+    
+    async def __call__(self, connection: HTTPConnection):
+        stats = request_db_stats.get()
+        if stats is None or settings.query_budget_mode == "off":
+            yield
+            return
+        
+        started_with = stats.statements
+        yield
+        
+        used = stats.statements - started_with
+        if used <= self.max_statements:
+            return
+        
+        method = connection.scope.get("method", "WEBSOCKET")
+        route = getattr(connection.scope.get("route"), "path", connection.url.path)
+        query_budget_exceeded.inc((method, route))
+        message = (
+            f"{method} {route}: {used} SQL statements, "
+            f"budget is {self.max_statements}"
+        )
+        if settings.query_budget_mode == "raise":
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
+
+
+class QueryCounter:
+    """Результат count_queries: число и тексты выполненных запросов"""
+    
+    def __init__(self):
+        self.statements: List[str] = []
+    
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+
+@contextmanager
+def count_queries(engine: Engine, counter: Optional[QueryCounter] = None) -> Iterator[QueryCounter]:
+    """
+    Посчитать SQL-запросы движка внутри блока
+    
+    Для AsyncEngine передавайте async_engine.sync_engine.
+    """
+    counter = counter or QueryCounter()
+    
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        counter.statements.append(statement)
+    
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield counter
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
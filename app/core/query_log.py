@@ -0,0 +1,137 @@
+"""
+Структурированный журнал SQL-запросов
+
+Вместо echo каждого запроса пишем JSON-строки только для медленных запросов
+и для случайной выборки остальных. Запись в stdout идёт из отдельного потока
+через очередь, поэтому обработчик запроса на ней не блокируется.
+"""
+import hashlib
+import json
+import logging
+import queue
+import random
+import re
+import sys
+import time
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+
+
+logger = logging.getLogger("work21.sql")
+
+_listener: Optional[QueueListener] = None
+_handler: Optional[QueueHandler] = None
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LIST = re.compile(r"\(\s*(?:\?|%s|\$\d+|:\w+)(?:\s*,\s*(?:\?|%s|\$\d+|:\w+))+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+class _JsonFormatter(logging.Formatter):
+    """Форматирует запись журнала как одну JSON-строку"""
+    
+    def format(self, record: logging.LogRecord) -> str:
+        data = {"ts": round(record.created, 3), "level": record.levelname}
+        data.update(getattr(record, "query", {}))
+        return json.dumps(data, ensure_ascii=False)
+
+
+class _DroppingQueueHandler(QueueHandler):
+    """QueueHandler, который отбрасывает записи при переполненной очереди"""
+    
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            pass
+    
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Форматирование выполняет поток слушателя, здесь только передаём запись
+        return record
+
+
+def normalize_statement(statement: str) -> str:
+    """Привести SQL к виду без литералов и с одним плейсхолдером в списках"""
+    statement = _STRING_LITERAL.sub("?", statement)
+    statement = _NUMBER_LITERAL.sub("?", statement)
+    statement = _PLACEHOLDER_LIST.sub("(?)", statement)
+    return _WHITESPACE.sub(" ", statement).strip()
+
+
+def fingerprint(normalized: str) -> str:
+    """Короткий отпечаток нормализованного запроса"""
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()[:16]
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._query_start_time = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    duration_ms = (time.perf_counter() - context._query_start_time) * 1000
+    
+    slow = duration_ms >= settings.query_log_slow_ms
+    if not slow and random.random() >= settings.query_log_sample_rate:
+        return
+    
+    normalized = normalize_statement(statement)
+    logger.log(
+        logging.WARNING if slow else logging.INFO,
+        "sql",
+        extra={
+            "query": {
+                "event": "sql",
+                "fingerprint": fingerprint(normalized),
+                "statement": normalized[:1000],
+                "duration_ms": round(duration_ms, 3),
+                # Для SELECT часть драйверов (sqlite3) не сообщает число строк: -1
+                "rows": cursor.rowcount,
+                "executemany": executemany,
+                "slow": slow,
+                "dialect": conn.dialect.name,
+            }
+        },
+    )
+
+
+def start_query_logging() -> None:
+    """Запустить поток, который пишет журнал в stdout"""
+    global _listener, _handler
+    if _listener is not None or not settings.query_log_enabled:
+        return
+    
+    log_queue: queue.Queue = queue.Queue(maxsize=10000)
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(_JsonFormatter())
+    
+    _handler = _DroppingQueueHandler(log_queue)
+    logger.addHandler(_handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    
+    _listener = QueueListener(log_queue, stream_handler)
+    _listener.start()
+
+
+def install_query_logging(engine: Engine) -> None:
+    """Подключить журнал запросов к движку (для async движка — к sync_engine)"""
+    if not settings.query_log_enabled:
+        return
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def stop_query_logging() -> None:
+    """Дописать очередь журнала и остановить поток записи"""
+    global _listener, _handler
+    if _listener is not None:
+        _listener.stop()
+        logger.removeHandler(_handler)
+        _listener = None
+        _handler = None
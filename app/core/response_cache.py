@@ -0,0 +1,195 @@
+"""
+Общий кэш готовых ответов для публичных лент
+
+Значение — уже сериализованное тело ответа и его заголовки, поэтому попадание
+не трогает ни БД, ни Pydantic. Ключи сгруппированы по областям (например,
+статус проекта): у каждой области есть счётчик поколения, входящий в ключ.
+Мутация увеличивает счётчик (invalidate), и все старые ключи области
+перестают читаться, а затем вытесняются по TTL.
+
+Бэкенды:
+- memory — LRU в памяти процесса; инвалидация видна только этому воркеру,
+  остальные отстают не больше чем на TTL;
+- redis — общий кэш и общие счётчики поколений для всех воркеров
+  (нужен пакет redis; подходит любой совместимый asyncio-клиент).
+
+Одновременные промахи по одному ключу в процессе объединяются
+(single-flight): загрузку выполняет первый запрос, остальные ждут его результат.
+"""
+import asyncio
+import json
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.metrics import Counter, registry
+
+
+response_cache_requests = registry.register(Counter(
+    "response_cache_requests_total",
+    "Response cache lookups by cache and result (hit, miss, coalesced)",
+    ("cache", "result"),
+))
+
+
+@dataclass
+class CachedResponse:
+    """Сериализованный ответ"""
+    body: bytes
+    headers: Dict[str, str] = field(default_factory=dict)
+    
+    def encode(self) -> bytes:
+        return json.dumps(self.headers).encode("utf-8") + b"\n" + self.body
+    
+    @classmethod
+    def decode(cls, raw: bytes) -> "CachedResponse":
+        headers, _, body = raw.partition(b"\n")
+        return cls(body=body, headers=json.loads(headers))
+
+
+class CacheBackend:
+    """Хранилище значений и счётчиков поколений"""
+    
+    async def get(self, key: str) -> Optional[bytes]:
+        raise NotImplementedError
+    
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        raise NotImplementedError
+    
+    async def get_generation(self, name: str) -> int:
+        raise NotImplementedError
+    
+    async def bump_generation(self, name: str) -> int:
+        raise NotImplementedError
+
+
+class MemoryCacheBackend(CacheBackend):
+    """LRU в памяти процесса"""
+    
+    def __init__(self, max_entries: int, ttl: float):
+        self._values = TTLCache(max_entries, ttl)
+        self._generations: Dict[str, int] = {}
+    
+    async def get(self, key: str) -> Optional[bytes]:
+        return self._values.get(key)
+    
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        self._values.set(key, value, ttl)
+    
+    async def get_generation(self, name: str) -> int:
+        return self._generations.get(name, 0)
+    
+    async def bump_generation(self, name: str) -> int:
+        self._generations[name] = self._generations.get(name, 0) + 1
+        return self._generations[name]
+
+
+class RedisCacheBackend(CacheBackend):
+    """
+    Redis (или совместимый сервер)
+    
+    Использует только GET, SET с EX и INCR, поэтому подходит любой клиент
+    с интерфейсом redis.asyncio.Redis, в том числе fakeredis для тестов.
+    """
+    
+    def __init__(self, client: Any, prefix: str = "work21:cache:"):
+        self.client = client
+        self.prefix = prefix
+    
+    @classmethod
+    def from_url(cls, url: str) -> "RedisCacheBackend":
+        try:
+            import redis.asyncio as redis
+        except ImportError as exc:
+            raise RuntimeError(
+                "Для RESPONSE_CACHE_BACKEND=redis установите пакет redis"
+            ) from exc
+        return cls(redis.from_url(url))
+    
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self.client.get(self.prefix + key)
+    
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        await self.client.set(self.prefix + key, value, ex=max(int(ttl), 1))
+    
+    async def get_generation(self, name: str) -> int:
+        value = await self.client.get(self.prefix + "gen:" + name)
+        return int(value) if value is not None else 0
+    
+    async def bump_generation(self, name: str) -> int:
+        return await self.client.incr(self.prefix + "gen:" + name)
+
+
+class ResponseCache:
+    """Кэш ответов с поколениями по областям и single-flight загрузкой"""
+    
+    def __init__(self, name: str, backend: CacheBackend, ttl: float):
+        self.name = name
+        self.backend = backend
+        self.ttl = ttl
+        self._inflight: Dict[str, asyncio.Future] = {}
+    
+    async def get_or_load(
+        self,
+        scope: str,
+        key: str,
+        loader: Callable[[], Awaitable[CachedResponse]],
+    ) -> CachedResponse:
+        """Вернуть ответ из кэша или загрузить его через loader"""
+        if self.ttl <= 0:
+            return await loader()
+        
+        generation = await self.backend.get_generation(f"{self.name}:{scope}")
+        full_key = f"{self.name}:{scope}:{generation}:{key}"
+        
+        raw = await self.backend.get(full_key)
+        if raw is not None:
+            response_cache_requests.inc((self.name, "hit"))
+            return CachedResponse.decode(raw)
+        
+        inflight = self._inflight.get(full_key)
+        if inflight is not None:
+            response_cache_requests.inc((self.name, "coalesced"))
+            try:
+                return await asyncio.shield(inflight)
+            except asyncio.CancelledError:
+                # Отменили загружавший запрос, а не нас — загружаем сами
+                if not inflight.cancelled():
+                    raise
+                return await self.get_or_load(scope, key, loader)
+        
+        response_cache_requests.inc((self.name, "miss"))
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[full_key] = future
+        try:
+            value = await loader()
+            await self.backend.set(full_key, value.encode(), self.ttl)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as exc:
+            future.set_exception(exc)
+            # Ожидающих может не быть: помечаем исключение полученным
+            future.exception()
+            raise
+        else:
+            future.set_result(value)
+            return value
+        finally:
+            self._inflight.pop(full_key, None)
+    
+    async def invalidate(self, *scopes: str) -> None:
+        """Сделать недействительными все ключи областей"""
+        for scope in set(scopes):
+            await self.backend.bump_generation(f"{self.name}:{scope}")
+
+
+def _create_backend() -> CacheBackend:
+    if settings.response_cache_backend == "redis":
+        return RedisCacheBackend.from_url(settings.redis_url)
+    return MemoryCacheBackend(settings.response_cache_max_entries, settings.response_cache_ttl_seconds)
+
+
+# Публичные ленты проектов; область — статус проекта
+project_feed_cache = ResponseCache("project_feed", _create_backend(), settings.response_cache_ttl_seconds)
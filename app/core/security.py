@@ -1,8 +1,11 @@
 """
 Модуль безопасности: хеширование паролей и JWT токены
 """
+import asyncio
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Callable, Optional, TypeVar
 
 import bcrypt
 from jose import JWTError, jwt
@@ -10,6 +13,91 @@ from jose import JWTError, jwt
 from app.core.config import settings
 
 
+T = TypeVar("T")
+
+
+class PasswordHashingBusy(Exception):
+    """Пул хеширования паролей переполнен"""
+
+
+class PasswordHashingPool:
+    """
+    Ограниченный пул потоков для bcrypt
+    
+    bcrypt отпускает GIL, поэтому потоки дают реальный параллелизм, а event loop
+    не блокируется на 100–300 мс на каждый вход. Если и воркеры, и очередь
+    заняты, новая задача сразу отклоняется — это лучше, чем копить ожидание.
+    """
+    
+    def __init__(self, workers: int, queue_size: int):
+        self.workers = workers
+        self.capacity = workers + queue_size
+        self.in_flight = 0
+        self.completed = 0
+        # Функция упала или задачу отменили до запуска
+        self.failed = 0
+        self.rejected = 0
+        self._executor: Optional[ThreadPoolExecutor] = None
+        # Слот освобождается в потоке пула: счётчики меняются из разных потоков
+        self._lock = threading.Lock()
+    
+    async def run(self, func: Callable[..., T], *args) -> T:
+        """Выполнить функцию в пуле или отклонить при переполнении"""
+        with self._lock:
+            if self.in_flight >= self.capacity:
+                self.rejected += 1
+                raise PasswordHashingBusy()
+            self.in_flight += 1
+        
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.workers,
+                thread_name_prefix="password-hash",
+            )
+        
+        try:
+            future = self._executor.submit(func, *args)
+        except BaseException:
+            self._release(None)
+            raise
+        # Слот занят, пока работает поток, а не пока ждёт корутина: отменённый
+        # запрос не освобождает место под новый bcrypt, уже идущий в пуле
+        future.add_done_callback(self._release)
+        return await asyncio.wrap_future(future)
+    
+    def _release(self, future: Optional[Future]) -> None:
+        with self._lock:
+            self.in_flight -= 1
+            if future is None or future.cancelled() or future.exception() is not None:
+                self.failed += 1
+            else:
+                self.completed += 1
+    
+    def stats(self) -> dict:
+        """Текущая загрузка пула"""
+        return {
+            "workers": self.workers,
+            "capacity": self.capacity,
+            "in_flight": self.in_flight,
+            "queued": max(0, self.in_flight - self.workers),
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+        }
+    
+    def shutdown(self) -> None:
+        """Остановить потоки пула"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+password_hashing_pool = PasswordHashingPool(
+    workers=settings.password_hash_workers,
+    queue_size=settings.password_hash_queue_size,
+)
+
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Проверка пароля"""
     return bcrypt.checkpw(
@@ -20,11 +108,21 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 
 def get_password_hash(password: str) -> str:
     """Хеширование пароля"""
-    salt = bcrypt.gensalt()
+    salt = bcrypt.gensalt(rounds=settings.bcrypt_rounds)
     hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
     return hashed.decode('utf-8')
 
 
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Проверка пароля в пуле хеширования (не блокирует event loop)"""
+    return await password_hashing_pool.run(verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    """Хеширование пароля в пуле хеширования (не блокирует event loop)"""
+    return await password_hashing_pool.run(get_password_hash, password)
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Создание JWT токена"""
     to_encode = data.copy()
@@ -47,5 +145,3 @@ def decode_access_token(token: str) -> Optional[dict]:
         return payload
     except JWTError:
         return None
-
-
@@ -0,0 +1,44 @@
+"""
+Быстрая сериализация ответов из ORM-объектов
+
+Обычный путь FastAPI для response_model: валидация результата endpoint,
+затем field.serialize в python-словари, затем json.dumps всего дерева.
+Для собственных ORM-объектов, которые заведомо соответствуют схеме, это
+лишние проходы: orm_response валидирует данные один раз (from_attributes)
+и сразу собирает JSON в pydantic-core, минуя промежуточные словари.
+
+response_model в декораторе роутера при этом оставляйте — он нужен
+для OpenAPI-документации.
+"""
+from functools import lru_cache
+from typing import Any, Mapping, Optional
+
+from fastapi import Response
+from pydantic import TypeAdapter
+
+
+@lru_cache(maxsize=None)
+def _adapter(schema: Any) -> TypeAdapter:
+    # Построение TypeAdapter дорогое: по одному на тип за процесс
+    return TypeAdapter(schema)
+
+
+def dump_orm(schema: Any, data: Any) -> bytes:
+    """Сериализовать ORM-объекты в JSON по схеме (например, List[ProjectResponse])"""
+    adapter = _adapter(schema)
+    return adapter.dump_json(adapter.validate_python(data, from_attributes=True))
+
+
+def orm_response(
+    schema: Any,
+    data: Any,
+    status_code: int = 200,
+    headers: Optional[Mapping[str, str]] = None,
+) -> Response:
+    """Ответ с ORM-объектами, сериализованными по схеме за один проход"""
+    return Response(
+        content=dump_orm(schema, data),
+        status_code=status_code,
+        headers=headers,
+        media_type="application/json",
+    )
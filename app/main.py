@@ -3,14 +3,35 @@ WORK21 Backend - FastAPI Application
 """
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, status
+from fastapi.responses import JSONResponse, ORJSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from starlette.middleware.sessions import SessionMiddleware
 
 from app.core.config import settings
-from app.core.database import init_db
+from app.core.events import event_hub
+from app.core.http_client import http_client
+from app.core.database import (
+    READ_PRIMARY_HEADER,
+    PoolStats,
+    ReadYourWritesMiddleware,
+    init_db,
+    async_engine,
+    async_pool_stats,
+    replica_router,
+    sync_pool_stats,
+)
+from app.api.deps import token_cache, user_cache
+from app.core.metrics import MetricsMiddleware, counter_lines, gauge_lines, registry
+from app.core.pagination import NEXT_CURSOR_HEADER
+from app.core.query_log import start_query_logging, stop_query_logging
+from app.core.security import PasswordHashingBusy, password_hashing_pool
 from app.api import api_router
 from app.admin import create_admin
+from app.services.leaderboard import leaderboard
+from app.services.jobs import job_queue
+from app.services.matcher import talent_matcher
+from app.services.search import setup_project_search
 
 
 @asynccontextmanager
@@ -19,10 +40,21 @@ async def lifespan(app: FastAPI):
     Lifecycle events: startup and shutdown
     """
     # Startup
+    start_query_logging()
     await init_db()
+    await setup_project_search(async_engine)
+    leaderboard.start()
+    await event_hub.start()
+    await http_client.start()
+    job_queue.start()
     yield
     # Shutdown
-    pass
+    await job_queue.stop()
+    await http_client.stop()
+    await event_hub.stop()
+    await leaderboard.stop()
+    password_hashing_pool.shutdown()
+    stop_query_logging()
 
 
 # Создаём приложение
@@ -47,6 +79,8 @@ app = FastAPI(
     """,
     version=settings.app_version,
     lifespan=lifespan,
+    # orjson кодирует ответы в несколько раз быстрее стандартного json
+    default_response_class=ORJSONResponse,
 )
 
 # CORS middleware
@@ -56,6 +90,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, READ_PRIMARY_HEADER],
 )
 
 # Session middleware (для админ-панели) - должен быть ПОСЛЕ CORS
@@ -66,6 +101,23 @@ app.add_middleware(
     https_only=False,
 )
 
+@app.exception_handler(PasswordHashingBusy)
+async def password_hashing_busy_handler(request: Request, exc: PasswordHashingBusy):
+    """Пул хеширования паролей переполнен — просим клиента повторить позже"""
+    return JSONResponse(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        content={"detail": "Сервер перегружен, повторите попытку позже"},
+        headers={"Retry-After": "1"},
+    )
+
+
+# Окно чтения своих записей нужно, только если чтения уходят на реплики
+if replica_router.engines:
+    app.add_middleware(ReadYourWritesMiddleware)
+
+# Метрики запросов — самый внешний слой, чтобы учитывать всё время обработки
+app.add_middleware(MetricsMiddleware)
+
 # Подключаем роутеры
 app.include_router(api_router, prefix="/api/v1")
 
@@ -95,3 +147,160 @@ async def health_check():
     return {"status": "healthy"}
 
 
+@app.get("/health/hashing", tags=["health"])
+async def health_hashing():
+    """
+    Загрузка пула хеширования паролей
+    """
+    return password_hashing_pool.stats()
+
+
+@app.get("/health/leaderboard", tags=["health"])
+async def health_leaderboard():
+    """
+    Возраст снимков лидерборда
+    """
+    return leaderboard.stats()
+
+
+@app.get("/health/events", tags=["health"])
+async def health_events():
+    """
+    Подписчики событий реального времени в этом воркере
+    """
+    return event_hub.stats()
+
+
+@app.get("/health/jobs", tags=["health"])
+async def health_jobs():
+    """
+    Исполнители фоновых задач LLM в этом воркере
+    """
+    return job_queue.stats()
+
+
+@app.get("/health/outbound", tags=["health"])
+async def health_outbound():
+    """
+    Пул исходящих HTTP-соединений и circuit breaker по хостам
+    """
+    return http_client.stats()
+
+
+@app.get("/health/matcher", tags=["health"])
+async def health_matcher():
+    """
+    Размер индекса Talent Matcher и число его обновлений
+    """
+    return talent_matcher.stats()
+
+
+@app.get("/health/auth-cache", tags=["health"])
+async def health_auth_cache():
+    """
+    Попадания и промахи кэша авторизации
+    """
+    return {
+        "tokens": token_cache.stats(),
+        "users": user_cache.stats(),
+    }
+
+
+@app.get("/health/db", tags=["health"])
+async def health_db():
+    """
+    Состояние пулов соединений с БД
+    """
+    return {
+        "api": async_pool_stats.snapshot(),
+        "admin": sync_pool_stats.snapshot(),
+        "read_routing": replica_router.stats(),
+    }
+
+
+_CIRCUIT_STATES = {"closed": 0, "half_open": 1, "open": 2}
+
+
+def _collect_runtime_metrics():
+    """Состояние пулов и кэшей на момент чтения /metrics"""
+    hashing = password_hashing_pool.stats()
+    yield from gauge_lines(
+        "password_hash_pool",
+        "Password hashing jobs running or waiting for a worker thread",
+        {(key,): hashing[key] for key in ("in_flight", "queued")},
+        ("state",),
+    )
+    yield from counter_lines(
+        "password_hash_pool_jobs_total",
+        "Password hashing jobs by result (completed, failed, rejected)",
+        {(key,): hashing[key] for key in ("completed", "failed", "rejected")},
+        ("result",),
+    )
+    
+    auth_caches = (("tokens", token_cache), ("users", user_cache))
+    auth_stats = {name: cache.stats() for name, cache in auth_caches}
+    yield from gauge_lines(
+        "auth_cache_size",
+        "Auth cache entries",
+        {(name,): stats["size"] for name, stats in auth_stats.items()},
+        ("cache",),
+    )
+    yield from counter_lines(
+        "auth_cache_requests_total",
+        "Auth cache lookups by result (hit, miss)",
+        {
+            (name, result): stats[key]
+            for name, stats in auth_stats.items()
+            for key, result in (("hits", "hit"), ("misses", "miss"))
+        },
+        ("cache", "result"),
+    )
+    
+    gauges, counters = {}, {}
+    replicas = [(f"replica{index}", stats) for index, stats in enumerate(replica_router.pool_stats)]
+    for name, pool_stats in [("api", async_pool_stats), ("admin", sync_pool_stats)] + replicas:
+        for key, value in pool_stats.snapshot().items():
+            if key in PoolStats.COUNTERS:
+                counters[(name, key)] = value
+            elif isinstance(value, int):
+                gauges[(name, key)] = value
+    yield from gauge_lines("db_pool", "DB connection pool state", gauges, ("engine", "stat"))
+    yield from counter_lines(
+        "db_pool_events_total",
+        "DB connection pool events (connects, checkouts, overflow_checkouts, invalidations, timeouts)",
+        counters,
+        ("engine", "event"),
+    )
+    
+    outbound = http_client.stats()
+    yield from gauge_lines(
+        "outbound_pool",
+        "Outbound HTTP connection pool state",
+        {(key,): value for key, value in outbound["pool"].items()},
+        ("stat",),
+    )
+    yield from gauge_lines(
+        "outbound_host",
+        "Outbound requests in flight and waiting for a slot, circuit state (0 closed, 1 half-open, 2 open)",
+        {
+            (host, key): _CIRCUIT_STATES[value] if key == "circuit" else value
+            for host, host_stats in outbound["hosts"].items()
+            for key, value in host_stats.items()
+            if key in ("in_flight", "waiting", "circuit")
+        },
+        ("host", "stat"),
+    )
+
+
+registry.register_collector(_collect_runtime_metrics)
+
+
+@app.get("/metrics", tags=["health"], response_class=PlainTextResponse)
+async def metrics():
+    """
+    Метрики в формате Prometheus
+    """
+    return PlainTextResponse(
+        registry.render(),
+        media_type="text/plain; version=0.0.4; charset=utf-8",
+    )
@@ -3,8 +3,11 @@ SQLAlchemy модели для WORK21
 """
 from app.models.user import User
 from app.models.project import Project, Task, Application
-from app.models.rating import Rating
+from app.models.rating import Rating, UserRatingStats
 from app.models.contract import Contract
+from app.models.tag import Tag, project_tags, user_skills
+from app.models.job import Job
+from app.models.llm_cache import LLMCacheEntry
 
 __all__ = [
     "User",
@@ -12,7 +15,13 @@ __all__ = [
     "Task",
     "Application",
     "Rating",
+    "UserRatingStats",
     "Contract",
+    "Tag",
+    "project_tags",
+    "user_skills",
+    "Job",
+    "LLMCacheEntry",
 ]
 
 
@@ -0,0 +1,79 @@
+"""
+Модель фоновой задачи (очередь генерации ТЗ и оценок LLM)
+"""
+from datetime import datetime
+from enum import Enum
+from typing import Optional
+
+from sqlalchemy import String, Text, Integer, DateTime, ForeignKey, Index, Enum as SQLEnum
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.database import Base
+
+
+class JobKind(str, Enum):
+    """Виды фоновых задач"""
+    GENERATE_SPEC = "generate_spec"
+    ESTIMATE = "estimate"
+
+
+class JobStatus(str, Enum):
+    """Статусы фоновой задачи"""
+    PENDING = "pending"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+
+class Job(Base):
+    """Фоновая задача: строка таблицы jobs — элемент очереди"""
+    
+    __tablename__ = "jobs"
+    __table_args__ = (
+        # Выбор следующей задачи воркером
+        Index("ix_jobs_status_run_after", "status", "run_after"),
+        # Повтор запроса с тем же Idempotency-Key возвращает ту же задачу
+        Index("uq_jobs_created_by_id_idempotency_key", "created_by_id", "idempotency_key", unique=True),
+        # Активная задача того же вида для проекта
+        Index("ix_jobs_project_id_kind", "project_id", "kind"),
+    )
+    
+    id: Mapped[int] = mapped_column(primary_key=True, index=True)
+    
+    kind: Mapped[JobKind] = mapped_column(SQLEnum(JobKind))
+    status: Mapped[JobStatus] = mapped_column(
+        SQLEnum(JobStatus),
+        default=JobStatus.PENDING
+    )
+    
+    # Связи
+    project_id: Mapped[int] = mapped_column(ForeignKey("projects.id", ondelete="CASCADE"))
+    created_by_id: Mapped[int] = mapped_column(ForeignKey("users.id"))
+    
+    # Ключ идемпотентности клиента (заголовок Idempotency-Key)
+    idempotency_key: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
+    
+    # Не брать результат из кэша LLM (свежий ответ всё равно попадёт в кэш)
+    bypass_cache: Mapped[bool] = mapped_column(default=False)
+    
+    # Попытки и расписание повторов
+    attempts: Mapped[int] = mapped_column(Integer, default=0)
+    max_attempts: Mapped[int] = mapped_column(Integer)
+    run_after: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    
+    # Время захвата воркером; зависшая задача перезахватывается по истечении аренды
+    locked_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    
+    last_error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    
+    # Метаданные
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime,
+        default=datetime.utcnow,
+        onupdate=datetime.utcnow
+    )
+    finished_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    
+    def __repr__(self) -> str:
+        return f"<Job {self.kind.value} project={self.project_id} ({self.status.value})>"
@@ -0,0 +1,31 @@
+"""
+Модель кэша ответов LLM
+"""
+from datetime import datetime
+
+from sqlalchemy import String, Text, Integer, DateTime
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.database import Base
+
+
+class LLMCacheEntry(Base):
+    """Ответ LLM по хешу нормализованного входа (общий для всех воркеров)"""
+    
+    __tablename__ = "llm_cache"
+    
+    # sha256 от пространства имён (вид задачи, модель, версия промпта) и полей проекта
+    key: Mapped[str] = mapped_column(String(64), primary_key=True)
+    namespace: Mapped[str] = mapped_column(String(255))
+    output: Mapped[str] = mapped_column(Text)
+    hits: Mapped[int] = mapped_column(Integer, default=0)
+    
+    # Метаданные
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    # Удаление просроченных записей
+    expires_at: Mapped[datetime] = mapped_column(DateTime, index=True)
+    # Вытеснение давно не использованных записей при превышении размера
+    last_used_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, index=True)
+    
+    def __repr__(self) -> str:
+        return f"<LLMCacheEntry {self.namespace} {self.key[:12]}>"
@@ -5,7 +5,7 @@ from datetime import datetime
 from enum import Enum
 from typing import Optional, List
 
-from sqlalchemy import String, Text, Float, Integer, DateTime, ForeignKey, Enum as SQLEnum
+from sqlalchemy import String, Text, Float, Integer, DateTime, ForeignKey, Index, text, Enum as SQLEnum
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.core.database import Base
@@ -40,6 +40,19 @@ class Project(Base):
     """Модель проекта"""
     
     __tablename__ = "projects"
+    __table_args__ = (
+        # Ленты: фильтр по статусу, сортировка (created_at, id)
+        Index("ix_projects_status_created_at", "status", "created_at", "id"),
+        # Проекты заказчика
+        Index("ix_projects_customer_id_created_at", "customer_id", "created_at"),
+        # Проекты исполнителя; у большинства проектов исполнителя нет
+        Index(
+            "ix_projects_assignee_id",
+            "assignee_id",
+            postgresql_where=text("assignee_id IS NOT NULL"),
+            sqlite_where=text("assignee_id IS NOT NULL"),
+        ),
+    )
     
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
     
@@ -83,8 +96,15 @@ class Project(Base):
         onupdate=datetime.utcnow
     )
     
+    # Полнотекстовый поиск: колонка search_vector (PostgreSQL) или таблица
+    # projects_fts (SQLite) создаются вне модели — см. app/services/search.py
+    
     # Relationships
-    tasks: Mapped[List["Task"]] = relationship("Task", back_populates="project")
+    tasks: Mapped[List["Task"]] = relationship(
+        "Task",
+        back_populates="project",
+        order_by="[Task.order, Task.id]",
+    )
     applications: Mapped[List["Application"]] = relationship("Application", back_populates="project")
     
     def __repr__(self) -> str:
@@ -95,6 +115,17 @@ class Task(Base):
     """Модель задачи (подзадачи проекта)"""
     
     __tablename__ = "tasks"
+    __table_args__ = (
+        # Задачи проекта по порядку, max(order) при создании
+        Index("ix_tasks_project_id_order", "project_id", "order"),
+        # Загрузка исполнителей в Talent Matcher
+        Index(
+            "ix_tasks_assignee_id",
+            "assignee_id",
+            postgresql_where=text("assignee_id IS NOT NULL"),
+            sqlite_where=text("assignee_id IS NOT NULL"),
+        ),
+    )
     
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
     
@@ -134,6 +165,12 @@ class Application(Base):
     """Модель заявки студента на проект"""
     
     __tablename__ = "applications"
+    __table_args__ = (
+        # Одна заявка студента на проект
+        Index("uq_applications_project_id_student_id", "project_id", "student_id", unique=True),
+        # Заявки студента, новые сверху
+        Index("ix_applications_student_id_created_at", "student_id", "created_at"),
+    )
     
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
     
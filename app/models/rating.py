@@ -4,7 +4,7 @@
 from datetime import datetime
 from typing import Optional
 
-from sqlalchemy import String, Text, Integer, ForeignKey, DateTime
+from sqlalchemy import String, Text, Integer, ForeignKey, DateTime, Index
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.core.database import Base
@@ -14,6 +14,12 @@ class Rating(Base):
     """Модель рейтинга/отзыва"""
     
     __tablename__ = "ratings"
+    __table_args__ = (
+        # Один отзыв участника на проект
+        Index("uq_ratings_project_id_reviewer_id", "project_id", "reviewer_id", unique=True),
+        # Отзывы о пользователе, новые сверху; окна лидерборда
+        Index("ix_ratings_reviewee_id_created_at", "reviewee_id", "created_at"),
+    )
     
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
     
@@ -42,3 +48,33 @@ class Rating(Base):
         return f"<Rating project={self.project_id} score={self.score}>"
 
 
+class UserRatingStats(Base):
+    """
+    Накопленные суммы оценок пользователя
+    
+    Обновляются атомарным upsert вместе с каждым новым отзывом
+    (см. app/services/ratings.py), поэтому средние не требуют AVG по ratings.
+    """
+    
+    __tablename__ = "user_rating_stats"
+    
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    
+    # Общая оценка
+    ratings_count: Mapped[int] = mapped_column(Integer, default=0)
+    score_sum: Mapped[int] = mapped_column(Integer, default=0)
+    
+    # Категории оценки (необязательны, поэтому у каждой свой счётчик)
+    quality_sum: Mapped[int] = mapped_column(Integer, default=0)
+    quality_count: Mapped[int] = mapped_column(Integer, default=0)
+    communication_sum: Mapped[int] = mapped_column(Integer, default=0)
+    communication_count: Mapped[int] = mapped_column(Integer, default=0)
+    deadline_sum: Mapped[int] = mapped_column(Integer, default=0)
+    deadline_count: Mapped[int] = mapped_column(Integer, default=0)
+    
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    
+    def __repr__(self) -> str:
+        return f"<UserRatingStats user={self.user_id} count={self.ratings_count}>"
+
+
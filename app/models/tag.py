@@ -0,0 +1,44 @@
+"""
+Модель тегов (технологии проектов и навыки студентов)
+"""
+from sqlalchemy import Column, ForeignKey, Index, String, Table
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.database import Base
+
+
+class Tag(Base):
+    """Тег технологии/навыка"""
+    
+    __tablename__ = "tags"
+    
+    id: Mapped[int] = mapped_column(primary_key=True, index=True)
+    
+    # Название в том виде, в каком его впервые ввели ("React Native")
+    name: Mapped[str] = mapped_column(String(100))
+    
+    # Нормализованный ключ для поиска и фильтрации ("react native")
+    slug: Mapped[str] = mapped_column(String(100), unique=True, index=True)
+    
+    def __repr__(self) -> str:
+        return f"<Tag {self.slug}>"
+
+
+# Технологии проекта (дублирует Project.tech_stack в индексируемом виде)
+project_tags = Table(
+    "project_tags",
+    Base.metadata,
+    Column("project_id", ForeignKey("projects.id", ondelete="CASCADE"), primary_key=True),
+    Column("tag_id", ForeignKey("tags.id", ondelete="CASCADE"), primary_key=True),
+    # Фильтр «проекты с тегом X» идёт от тега к проектам
+    Index("ix_project_tags_tag_id_project_id", "tag_id", "project_id"),
+)
+
+# Навыки студента (дублирует User.skills в индексируемом виде)
+user_skills = Table(
+    "user_skills",
+    Base.metadata,
+    Column("user_id", ForeignKey("users.id", ondelete="CASCADE"), primary_key=True),
+    Column("tag_id", ForeignKey("tags.id", ondelete="CASCADE"), primary_key=True),
+    Index("ix_user_skills_tag_id_user_id", "tag_id", "user_id"),
+)
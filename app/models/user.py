@@ -5,7 +5,7 @@ from datetime import datetime
 from enum import Enum
 from typing import Optional, List
 
-from sqlalchemy import String, Text, Float, DateTime, Enum as SQLEnum
+from sqlalchemy import String, Text, Float, DateTime, Index, Enum as SQLEnum
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.core.database import Base
@@ -22,6 +22,10 @@ class User(Base):
     """Модель пользователя платформы"""
     
     __tablename__ = "users"
+    __table_args__ = (
+        # Лидерборд и список студентов: фильтр по роли/активности, сортировка по рейтингу
+        Index("ix_users_role_active_rating", "role", "is_active", "rating_score", "id"),
+    )
     
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
     email: Mapped[str] = mapped_column(String(255), unique=True, index=True)
@@ -12,11 +12,13 @@ from app.schemas.project import (
     ProjectCreate,
     ProjectUpdate,
     ProjectResponse,
+    ProjectSummaryResponse,
     TaskCreate,
     TaskResponse,
     ApplicationCreate,
     ApplicationResponse,
 )
+from app.schemas.job import JobCreate, JobResponse
 
 __all__ = [
     "UserCreate",
@@ -27,10 +29,13 @@ __all__ = [
     "ProjectCreate",
     "ProjectUpdate",
     "ProjectResponse",
+    "ProjectSummaryResponse",
     "TaskCreate",
     "TaskResponse",
     "ApplicationCreate",
     "ApplicationResponse",
+    "JobCreate",
+    "JobResponse",
 ]
 
 
@@ -0,0 +1,41 @@
+"""
+Pydantic схемы для фоновых задач
+"""
+from datetime import datetime
+from typing import Optional
+
+from pydantic import BaseModel
+
+from app.models.job import JobKind, JobStatus
+
+
+class JobCreate(BaseModel):
+    """Схема для постановки задачи в очередь"""
+    kind: JobKind
+    project_id: int
+    # Не брать готовый ответ из кэша LLM, а сгенерировать заново
+    bypass_cache: bool = False
+
+
+class JobResponse(BaseModel):
+    """
+    Состояние фоновой задачи
+    
+    Результат записывается в проект: generated_spec для generate_spec,
+    llm_estimation для estimate.
+    """
+    id: int
+    kind: JobKind
+    status: JobStatus
+    project_id: int
+    bypass_cache: bool
+    attempts: int
+    max_attempts: int
+    run_after: datetime
+    last_error: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+    finished_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
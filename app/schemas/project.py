@@ -3,9 +3,10 @@ Pydantic схемы для проектов, задач и заявок
 """
 import json
 from datetime import datetime
+from functools import lru_cache
 from typing import Optional, List
 
-from pydantic import BaseModel, Field, model_validator
+from pydantic import BaseModel, Field, field_validator
 
 from app.models.project import ProjectStatus, TaskStatus, ApplicationStatus
 
@@ -46,6 +47,16 @@ class TaskResponse(TaskCreate):
         from_attributes = True
 
 
+class TaskBatchCreate(BaseModel):
+    """Схема для пакетного создания задач"""
+    tasks: List[TaskCreate] = Field(..., min_length=1, max_length=100)
+
+
+class TaskReorder(BaseModel):
+    """Новый порядок задач: id всех задач проекта в нужной последовательности"""
+    task_ids: List[int] = Field(..., min_length=1)
+
+
 class ProjectBase(BaseModel):
     """Базовая схема проекта"""
     title: str = Field(..., min_length=1, max_length=255)
@@ -85,6 +96,29 @@ class ProjectUpdate(BaseModel):
     status: Optional[ProjectStatus] = None
 
 
+@lru_cache(maxsize=4096)
+def _parse_tech_stack_json(value: str) -> Optional[tuple]:
+    # Кортеж, а не список: закэшированное значение не должно изменяться
+    try:
+        data = json.loads(value)
+    except (json.JSONDecodeError, TypeError):
+        return None
+    return tuple(data) if isinstance(data, list) else None
+
+
+def parse_tech_stack_column(value):
+    """
+    Значение колонки tech_stack (JSON-строка) для схемы ответа
+    
+    Стеки у проектов часто повторяются, поэтому разбор кэшируется по строке:
+    в большой выдаче json.loads выполняется один раз на уникальное значение.
+    ORM-объект не изменяется.
+    """
+    if isinstance(value, str):
+        return _parse_tech_stack_json(value) if value else None
+    return value
+
+
 class ProjectAssigneeInfo(BaseModel):
     """Информация об исполнителе проекта"""
     id: int
@@ -98,6 +132,47 @@ class ProjectAssigneeInfo(BaseModel):
         from_attributes = True
 
 
+class ProjectSummaryResponse(BaseModel):
+    """Краткая схема проекта для лент (без дерева задач)"""
+    id: int
+    title: str
+    description: str
+    budget: float
+    deadline: Optional[datetime] = None
+    tech_stack: Optional[List[str]] = None
+    status: ProjectStatus
+    customer_id: int
+    assignee_id: Optional[int] = None
+    created_at: datetime
+    updated_at: datetime
+    task_count: int = 0
+    completed_task_count: int = 0
+    
+    @field_validator('tech_stack', mode='before')
+    @classmethod
+    def parse_tech_stack(cls, value):
+        """Преобразует tech_stack из JSON строки в список"""
+        return parse_tech_stack_column(value)
+    
+    class Config:
+        from_attributes = True
+
+
+class ProjectCandidateResponse(BaseModel):
+    """Кандидат на проект от Talent Matcher"""
+    student: ProjectAssigneeInfo
+    score: float
+    matched_skills: List[str]
+    completed_projects: int
+    active_assignments: int
+
+
+class ProjectSearchResult(ProjectSummaryResponse):
+    """Результат полнотекстового поиска по проектам"""
+    rank: float
+    highlight: Optional[str] = None
+
+
 class ProjectResponse(ProjectBase):
     """Схема ответа с данными проекта"""
     id: int
@@ -111,27 +186,11 @@ class ProjectResponse(ProjectBase):
     updated_at: datetime
     tasks: List[TaskResponse] = []
     
-    @model_validator(mode='before')
+    @field_validator('tech_stack', mode='before')
     @classmethod
-    def parse_tech_stack(cls, data):
+    def parse_tech_stack(cls, value):
         """Преобразует tech_stack из JSON строки в список"""
-        if isinstance(data, dict):
-            tech_stack = data.get('tech_stack')
-            if isinstance(tech_stack, str) and tech_stack:
-                try:
-                    data['tech_stack'] = json.loads(tech_stack)
-                except (json.JSONDecodeError, TypeError):
-                    data['tech_stack'] = None
-        elif hasattr(data, '__dict__'):
-            # Если это объект модели SQLAlchemy или другой объект
-            tech_stack = getattr(data, 'tech_stack', None)
-            if isinstance(tech_stack, str) and tech_stack:
-                try:
-                    # Временно изменяем атрибут для сериализации
-                    object.__setattr__(data, 'tech_stack', json.loads(tech_stack))
-                except (json.JSONDecodeError, TypeError):
-                    object.__setattr__(data, 'tech_stack', None)
-        return data
+        return parse_tech_stack_column(value)
     
     class Config:
         from_attributes = True
@@ -7,6 +7,7 @@ from typing import Optional, List
 from pydantic import BaseModel, EmailStr, Field
 
 from app.models.user import UserRole
+from app.services.leaderboard import LeaderboardWindow
 
 
 class UserBase(BaseModel):
@@ -58,6 +59,16 @@ class UserResponse(UserBase):
         from_attributes = True
 
 
+class LeaderboardRankResponse(BaseModel):
+    """Место пользователя в лидерборде"""
+    user_id: int
+    window: LeaderboardWindow
+    rank: Optional[int] = None
+    score: Optional[float] = None
+    ratings_count: int = 0
+    total: int
+
+
 class UserLogin(BaseModel):
     """Схема для входа"""
     email: EmailStr
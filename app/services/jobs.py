@@ -0,0 +1,405 @@
+"""
+Очередь фоновых задач LLM (генерация ТЗ и оценка сроков)
+
+Очередь хранится в таблице jobs, поэтому задачи переживают перезапуск
+и видны всем воркерам API. Каждый процесс запускает jobs_concurrency
+циклов-исполнителей — это и есть предел одновременных вызовов LLM
+на процесс. Исполнитель захватывает задачу одним UPDATE ... WHERE id =
+(SELECT ... FOR UPDATE SKIP LOCKED): в PostgreSQL параллельные
+исполнители пропускают чужие строки, в SQLite запись и так
+сериализована, а повтор условия в UPDATE не даёт захватить задачу дважды.
+
+Вызов LLM идёт вне транзакции. Результат записывается в Project вместе
+со статусом задачи одной транзакцией и только если задача всё ещё
+принадлежит этому исполнителю (locked_at не изменился). Временные ошибки
+повторяются с экспоненциальной задержкой и джиттером, постоянные
+(нет ключа, 4xx) завершают задачу сразу. Задача, брошенная упавшим
+процессом, перезахватывается по истечении jobs_lease_seconds.
+
+Перед вызовом LLM исполнитель ищет ответ в кэше (app/services/llm_cache.py)
+по полям проекта, если задача не поставлена с bypass_cache.
+"""
+import asyncio
+import logging
+import random
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import Update, and_, or_, select, update
+
+from app.core.config import settings
+from app.core.database import async_session_maker
+from app.core.events import event_hub, user_topic
+from app.core.metrics import Counter, Gauge, registry
+from app.core.response_cache import project_feed_cache
+from app.models.job import Job, JobKind, JobStatus
+from app.models.project import Project
+from app.schemas.project import parse_tech_stack_column
+from app.services.llm import LLMClient, LLMError, llm_client
+from app.services.llm_cache import LLMCache, cache_key, llm_cache
+
+
+logger = logging.getLogger("work21.jobs")
+
+jobs_finished = registry.register(Counter(
+    "jobs_finished_total",
+    "Background jobs finished by kind and final status",
+    ("kind", "status"),
+))
+jobs_retried = registry.register(Counter(
+    "jobs_retried_total",
+    "Background job attempts that failed and were rescheduled",
+    ("kind",),
+))
+jobs_running = registry.register(Gauge(
+    "jobs_running",
+    "Background jobs executing in this process",
+))
+
+# Длина сохраняемого текста ошибки
+MAX_ERROR_LENGTH = 2000
+
+
+# Версия промптов: входит в ключ кэша LLM, поднимайте при изменении промптов
+PROMPT_VERSION = 1
+
+
+def project_fields(project: Project, with_budget: bool) -> Dict[str, Any]:
+    """Поля проекта, которые передаются LLM и образуют ключ кэша"""
+    fields = {
+        "title": project.title,
+        "description": project.description,
+        "requirements": project.requirements or "",
+        "tech_stack": list(parse_tech_stack_column(project.tech_stack) or ()),
+    }
+    if with_budget:
+        fields["budget"] = project.budget
+    return fields
+
+
+def _project_brief(fields: Dict[str, Any]) -> str:
+    """Описание проекта для промпта"""
+    lines = [
+        f"Название: {fields['title']}",
+        f"Описание: {fields['description']}",
+    ]
+    if fields["requirements"]:
+        lines.append(f"Требования: {fields['requirements']}")
+    if fields["tech_stack"]:
+        lines.append(f"Технологии: {', '.join(fields['tech_stack'])}")
+    if "budget" in fields:
+        lines.append(f"Бюджет: {fields['budget']:g} ₽")
+    return "\n".join(lines)
+
+
+@dataclass(frozen=True)
+class JobHandler:
+    """Промпт задачи и поле Project для результата"""
+    system_prompt: str
+    result_field: str
+    # Оценка сверяется с бюджетом, ТЗ от бюджета не зависит
+    with_budget: bool = False
+    
+    def messages(self, fields: Dict[str, Any]) -> List[Dict[str, str]]:
+        return [
+            {"role": "system", "content": self.system_prompt},
+            {"role": "user", "content": _project_brief(fields)},
+        ]
+
+
+JOB_HANDLERS: Dict[JobKind, JobHandler] = {
+    JobKind.GENERATE_SPEC: JobHandler(
+        "Ты — Task Analyst платформы WORK21. Составь по идее заказчика "
+        "техническое задание в Markdown: цель, функциональные требования, "
+        "этапы с подзадачами и зависимостями, сложность подзадач (1-5), "
+        "риски и рекомендации по стеку.",
+        "generated_spec",
+    ),
+    JobKind.ESTIMATE: JobHandler(
+        "Ты — Task Analyst платформы WORK21. Оцени трудоёмкость проекта "
+        "для студента-исполнителя: часы по этапам, общий срок в неделях "
+        "и соответствие бюджету. Ответ — короткий Markdown.",
+        "llm_estimation",
+        with_budget=True,
+    ),
+}
+
+
+class PermanentJobError(Exception):
+    """Ошибка, которую повтор не исправит"""
+
+
+def backoff_delay(attempts: int, base: float, maximum: float) -> float:
+    """Задержка перед повтором: base * 2^(attempts-1) не больше maximum, с джиттером"""
+    delay = min(base * 2 ** max(attempts - 1, 0), maximum)
+    # Половина задержки фиксирована, половина случайна: повторы не идут пачкой
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+class JobQueue:
+    """Исполнители фоновых задач этого процесса"""
+    
+    def __init__(
+        self,
+        client: LLMClient,
+        cache: LLMCache,
+        concurrency: int,
+        poll_interval: float,
+        lease: float,
+        backoff_base: float,
+        backoff_max: float,
+    ):
+        self.client = client
+        self.cache = cache
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.lease = lease
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._wakeup = asyncio.Event()
+        self._tasks: List[asyncio.Task] = []
+        # Задачи, прерванные остановкой исполнителей
+        self._interrupted: List[Job] = []
+        self.running = 0
+        self.succeeded = 0
+        self.failed = 0
+        self.retried = 0
+    
+    def notify(self) -> None:
+        """Разбудить исполнителей этого процесса (новая задача в очереди)"""
+        self._wakeup.set()
+    
+    def _claim_statement(self, now: datetime) -> Update:
+        """UPDATE, захватывающий следующую готовую задачу или задачу с истёкшей арендой"""
+        claimable = or_(
+            and_(Job.status == JobStatus.PENDING, Job.run_after <= now),
+            and_(Job.status == JobStatus.RUNNING, Job.locked_at < now - timedelta(seconds=self.lease)),
+        )
+        next_job = (
+            select(Job.id)
+            .where(claimable)
+            .order_by(Job.run_after, Job.id)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+            .scalar_subquery()
+        )
+        return (
+            update(Job)
+            .where(Job.id == next_job, claimable)
+            .values(status=JobStatus.RUNNING, locked_at=now, attempts=Job.attempts + 1)
+            .returning(Job)
+        )
+    
+    async def _claim(self) -> Optional[Job]:
+        async with async_session_maker() as db:
+            result = await db.execute(self._claim_statement(datetime.utcnow()))
+            job = result.scalar_one_or_none()
+            await db.commit()
+        return job
+    
+    async def _finish(self, job: Job, values: dict, result_field: Optional[str] = None, output: Optional[str] = None) -> bool:
+        """
+        Записать итог попытки, если задача всё ещё наша
+        
+        Возвращает False, если задачу перезахватил другой исполнитель
+        (истекла аренда) — тогда результат этой попытки отбрасывается.
+        """
+        project_status = None
+        async with async_session_maker() as db:
+            result = await db.execute(
+                update(Job)
+                .where(Job.id == job.id, Job.status == JobStatus.RUNNING, Job.locked_at == job.locked_at)
+                .values(**values)
+            )
+            if result.rowcount == 0:
+                await db.rollback()
+                logger.warning("Job %s lease lost, result of attempt %s discarded", job.id, job.attempts)
+                return False
+            if result_field is not None:
+                project_result = await db.execute(
+                    update(Project)
+                    .where(Project.id == job.project_id)
+                    .values({result_field: output})
+                    .returning(Project.status)
+                )
+                project_status = project_result.scalar_one_or_none()
+            await db.commit()
+        
+        if project_status is not None:
+            # generated_spec и llm_estimation входят в полные ленты проектов
+            await project_feed_cache.invalidate(project_status.value)
+        return True
+    
+    async def _succeed(self, job: Job, handler: JobHandler, output: str) -> None:
+        values = dict(status=JobStatus.SUCCEEDED, finished_at=datetime.utcnow(), last_error=None)
+        if await self._finish(job, values, handler.result_field, output):
+            self.succeeded += 1
+            jobs_finished.inc((job.kind.value, JobStatus.SUCCEEDED.value))
+            await self._publish(job, JobStatus.SUCCEEDED)
+    
+    async def _fail(self, job: Job, error: str, retryable: bool, retry_after: Optional[float] = None) -> None:
+        now = datetime.utcnow()
+        values = dict(last_error=error[:MAX_ERROR_LENGTH])
+        final = not retryable or job.attempts >= job.max_attempts
+        if final:
+            values.update(status=JobStatus.FAILED, finished_at=now)
+        else:
+            delay = max(backoff_delay(job.attempts, self.backoff_base, self.backoff_max), retry_after or 0)
+            values.update(status=JobStatus.PENDING, run_after=now + timedelta(seconds=delay), locked_at=None)
+        
+        if not await self._finish(job, values):
+            return
+        if final:
+            self.failed += 1
+            jobs_finished.inc((job.kind.value, JobStatus.FAILED.value))
+            await self._publish(job, JobStatus.FAILED)
+        else:
+            self.retried += 1
+            jobs_retried.inc((job.kind.value,))
+    
+    async def _publish(self, job: Job, job_status: JobStatus) -> None:
+        await event_hub.publish(
+            "job.finished",
+            [user_topic(job.created_by_id)],
+            job_id=job.id,
+            kind=job.kind.value,
+            project_id=job.project_id,
+            status=job_status.value,
+        )
+    
+    async def _generate(self, job: Job, handler: JobHandler, fields: Dict[str, Any]) -> str:
+        """Ответ LLM: из кэша, если вход уже встречался, иначе вызов модели"""
+        namespace = f"{job.kind.value}:{self.client.model}:v{PROMPT_VERSION}"
+        key = cache_key(namespace, fields)
+        if job.bypass_cache:
+            self.cache.record_bypass(namespace)
+        else:
+            try:
+                cached = await self.cache.get(namespace, key)
+            except Exception:
+                logger.exception("LLM cache lookup failed for job %s", job.id)
+                cached = None
+            if cached is not None:
+                return cached
+        
+        output = await self.client.complete(handler.messages(fields))
+        try:
+            await self.cache.set(namespace, key, output)
+        except Exception:
+            # Ответ уже получен: ошибка кэша не должна стоить повторного вызова LLM
+            logger.exception("Failed to store LLM output of job %s in cache", job.id)
+        return output
+    
+    async def run_job(self, job: Job) -> None:
+        """Выполнить одну захваченную попытку задачи"""
+        handler = JOB_HANDLERS[job.kind]
+        if job.attempts > job.max_attempts:
+            # Попытки исчерпаны процессами, упавшими во время выполнения
+            await self._fail(job, "Превышено число попыток", retryable=False)
+            return
+        
+        self.running += 1
+        jobs_running.inc()
+        try:
+            async with async_session_maker() as db:
+                project = await db.get(Project, job.project_id)
+            if project is None:
+                raise PermanentJobError("Проект не найден")
+            output = await self._generate(job, handler, project_fields(project, handler.with_budget))
+        except PermanentJobError as exc:
+            await self._fail(job, str(exc), retryable=False)
+        except LLMError as exc:
+            await self._fail(job, str(exc), exc.retryable, exc.retry_after)
+        except Exception as exc:
+            logger.exception("Job %s failed", job.id)
+            await self._fail(job, repr(exc), retryable=True)
+        else:
+            await self._succeed(job, handler, output)
+        finally:
+            self.running -= 1
+            jobs_running.dec()
+    
+    async def _wait_for_work(self) -> None:
+        try:
+            async with asyncio.timeout(self.poll_interval):
+                await self._wakeup.wait()
+        except asyncio.TimeoutError:
+            pass
+        self._wakeup.clear()
+    
+    async def _worker_loop(self) -> None:
+        while True:
+            try:
+                job = await self._claim()
+            except Exception:
+                logger.exception("Failed to claim a background job")
+                job = None
+            if job is None:
+                await self._wait_for_work()
+                continue
+            try:
+                await self.run_job(job)
+            except asyncio.CancelledError:
+                self._interrupted.append(job)
+                raise
+            except Exception:
+                # Ошибка записи итога: задача вернётся в очередь по истечении аренды
+                logger.exception("Failed to record result of job %s", job.id)
+    
+    def start(self) -> None:
+        """Запустить исполнителей"""
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._worker_loop()) for _ in range(self.concurrency)]
+    
+    async def _release(self, jobs: List[Job]) -> None:
+        # Прерванная попытка не считается: задача сразу возвращается в очередь
+        async with async_session_maker() as db:
+            for job in jobs:
+                await db.execute(
+                    update(Job)
+                    .where(Job.id == job.id, Job.status == JobStatus.RUNNING, Job.locked_at == job.locked_at)
+                    .values(status=JobStatus.PENDING, locked_at=None, attempts=Job.attempts - 1)
+                )
+            await db.commit()
+    
+    async def stop(self) -> None:
+        """
+        Остановить исполнителей
+        
+        Прерванные задачи возвращаются в очередь; если процесс упал и не
+        успел это сделать, их перезахватят по истечении аренды.
+        """
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        
+        interrupted, self._interrupted = self._interrupted, []
+        if interrupted:
+            try:
+                await self._release(interrupted)
+            except Exception:
+                logger.exception("Failed to release %s interrupted jobs", len(interrupted))
+    
+    def stats(self) -> dict:
+        """Исполнители и итоги задач этого процесса"""
+        return {
+            "workers": len(self._tasks),
+            "running": self.running,
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "retried": self.retried,
+            "cache": self.cache.stats(),
+        }
+
+
+job_queue = JobQueue(
+    llm_client,
+    llm_cache,
+    settings.jobs_concurrency,
+    settings.jobs_poll_seconds,
+    settings.jobs_lease_seconds,
+    settings.jobs_backoff_base_seconds,
+    settings.jobs_backoff_max_seconds,
+)
@@ -0,0 +1,192 @@
+"""
+Лидерборд студентов
+
+Рейтинг материализуется в память процесса: снимок упорядоченных студентов
+строится одним запросом и отдаётся без обращения к БД, пока он не старше
+leaderboard_max_staleness_seconds. Фоновая задача обновляет снимки вдвое
+чаще, поэтому запросы почти никогда не ждут перестройки. Место студента
+ищется бинарным поиском по отсортированным ключам — O(log n).
+
+Окна 30d/90d ранжируют по средней оценке отзывов за период, all — по
+rating_score (накопленному среднему).
+"""
+import asyncio
+import bisect
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from enum import Enum
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import async_session_maker
+from app.models.rating import Rating, UserRatingStats
+from app.models.user import User, UserRole
+
+
+logger = logging.getLogger("work21.leaderboard")
+
+
+class LeaderboardWindow(str, Enum):
+    """Период, за который считается рейтинг"""
+    ALL = "all"
+    DAYS_30 = "30d"
+    DAYS_90 = "90d"
+
+
+_WINDOW_DAYS = {
+    LeaderboardWindow.DAYS_30: 30,
+    LeaderboardWindow.DAYS_90: 90,
+}
+
+
+@dataclass(frozen=True)
+class LeaderboardEntry:
+    """Место студента в лидерборде"""
+    user_id: int
+    rank: int
+    score: float
+    ratings_count: int
+
+
+class LeaderboardSnapshot:
+    """
+    Неизменяемый упорядоченный снимок лидерборда
+    
+    Студенты с одинаковыми score и ratings_count делят место
+    (1, 2, 2, 4 ...).
+    """
+    
+    def __init__(self, rows: List[Tuple[int, float, int]]):
+        rows = sorted(rows, key=lambda row: (-row[1], -row[2], row[0]))
+        # Ключи по возрастанию: bisect_left даёт число студентов строго выше
+        self._keys: List[Tuple[float, int]] = [(-score, -count) for _, score, count in rows]
+        self._entries: List[LeaderboardEntry] = []
+        self._by_user: Dict[int, Tuple[float, int]] = {}
+        rank = 0
+        for position, (user_id, score, count) in enumerate(rows):
+            key = self._keys[position]
+            if position == 0 or key != self._keys[position - 1]:
+                rank = position + 1
+            self._entries.append(LeaderboardEntry(user_id, rank, score, count))
+            self._by_user[user_id] = key
+        self.built_at = time.monotonic()
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    @property
+    def age(self) -> float:
+        return time.monotonic() - self.built_at
+    
+    def top(self, limit: int, offset: int = 0) -> List[LeaderboardEntry]:
+        """Страница лидерборда"""
+        return self._entries[offset:offset + limit]
+    
+    def rank_of(self, user_id: int) -> Optional[LeaderboardEntry]:
+        """Место пользователя или None, если его нет в лидерборде"""
+        key = self._by_user.get(user_id)
+        if key is None:
+            return None
+        position = bisect.bisect_left(self._keys, key)
+        return LeaderboardEntry(user_id, position + 1, -key[0], -key[1])
+
+
+async def _load_rows(db: AsyncSession, window: LeaderboardWindow) -> List[Tuple[int, float, int]]:
+    days = _WINDOW_DAYS.get(window)
+    if days is None:
+        query = (
+            select(User.id, User.rating_score, func.coalesce(UserRatingStats.ratings_count, 0))
+            .outerjoin(UserRatingStats, UserRatingStats.user_id == User.id)
+        )
+    else:
+        since = datetime.utcnow() - timedelta(days=days)
+        query = (
+            select(User.id, func.avg(Rating.score), func.count(Rating.id))
+            .join(Rating, Rating.reviewee_id == User.id)
+            .where(Rating.created_at >= since)
+            .group_by(User.id)
+        )
+    query = query.where(User.role == UserRole.STUDENT, User.is_active.is_(True))
+    result = await db.execute(query)
+    return [(user_id, float(score or 0.0), count) for user_id, score, count in result.all()]
+
+
+class Leaderboard:
+    """Снимки лидерборда по окнам с ограниченной устарелостью"""
+    
+    def __init__(self, max_staleness: float):
+        self.max_staleness = max_staleness
+        self._snapshots: Dict[LeaderboardWindow, LeaderboardSnapshot] = {}
+        self._locks = {window: asyncio.Lock() for window in LeaderboardWindow}
+        self._task: Optional[asyncio.Task] = None
+        self.rebuilds = 0
+    
+    def _fresh(self, window: LeaderboardWindow) -> Optional[LeaderboardSnapshot]:
+        snapshot = self._snapshots.get(window)
+        if snapshot is not None and snapshot.age <= self.max_staleness:
+            return snapshot
+        return None
+    
+    async def rebuild(self, db: AsyncSession, window: LeaderboardWindow) -> LeaderboardSnapshot:
+        """Построить снимок окна заново"""
+        snapshot = LeaderboardSnapshot(await _load_rows(db, window))
+        self._snapshots[window] = snapshot
+        self.rebuilds += 1
+        return snapshot
+    
+    async def get(self, db: AsyncSession, window: LeaderboardWindow = LeaderboardWindow.ALL) -> LeaderboardSnapshot:
+        """Снимок не старше max_staleness (при необходимости строится в этом запросе)"""
+        snapshot = self._fresh(window)
+        if snapshot is not None:
+            return snapshot
+        async with self._locks[window]:
+            # Пока ждали блокировку, снимок мог построить другой запрос
+            snapshot = self._fresh(window)
+            if snapshot is None:
+                snapshot = await self.rebuild(db, window)
+            return snapshot
+    
+    async def _refresh_loop(self) -> None:
+        interval = max(self.max_staleness / 2, 1.0)
+        while True:
+            for window in LeaderboardWindow:
+                try:
+                    async with async_session_maker() as db, self._locks[window]:
+                        await self.rebuild(db, window)
+                except Exception:
+                    logger.exception("Leaderboard refresh failed for window %s", window.value)
+            await asyncio.sleep(interval)
+    
+    def start(self) -> None:
+        """Запустить фоновое обновление снимков"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._refresh_loop())
+    
+    async def stop(self) -> None:
+        """Остановить фоновое обновление"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+    
+    def stats(self) -> dict:
+        """Размер и возраст снимков"""
+        return {
+            "max_staleness_seconds": self.max_staleness,
+            "rebuilds": self.rebuilds,
+            "windows": {
+                window.value: {"students": len(snapshot), "age_seconds": round(snapshot.age, 3)}
+                for window, snapshot in self._snapshots.items()
+            },
+        }
+
+
+leaderboard = Leaderboard(settings.leaderboard_max_staleness_seconds)
@@ -0,0 +1,98 @@
+"""
+Клиент LLM (OpenAI-совместимый API chat completions)
+
+Вызовы LLM длятся десятки секунд, поэтому выполняются только в фоновых
+задачах (app/services/jobs.py), а не в обработчиках запросов. Для
+разработки без ключа OpenAI запустите fake_llm_server.py и укажите
+LLM_BASE_URL=http://localhost:8090/v1.
+
+Запросы идут через общий пул app.core.http_client: отказ автомата
+(circuit breaker) и переполнение лимита хоста превращаются во временную
+LLMError, и задача повторяется позже, не дожидаясь таймаута.
+"""
+from typing import Dict, List, Optional
+
+import httpx
+
+from app.core.config import settings
+from app.core.http_client import CircuitOpenError, OutboundBusyError, OutboundClient, http_client
+
+
+class LLMError(Exception):
+    """
+    Ошибка вызова LLM
+    
+    retryable — имеет ли смысл повторить вызов позже (сеть, 429, 5xx);
+    retry_after — пауза из заголовка Retry-After, если сервер её указал.
+    """
+    
+    def __init__(self, message: str, retryable: bool = True, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retryable = retryable
+        self.retry_after = retry_after
+
+
+def _retry_after(response: httpx.Response) -> Optional[float]:
+    try:
+        return float(response.headers["retry-after"])
+    except (KeyError, ValueError):
+        return None
+
+
+class LLMClient:
+    """Запросы к chat completions"""
+    
+    def __init__(self, http: OutboundClient, base_url: str, api_key: Optional[str], model: str, timeout: float):
+        self.http = http
+        self.base_url = base_url.rstrip("/")
+        self.api_key = api_key
+        self.model = model
+        self.timeout = timeout
+    
+    async def complete(self, messages: List[Dict[str, str]]) -> str:
+        """Текст ответа модели на диалог messages"""
+        if not self.api_key:
+            raise LLMError("LLM не настроен: задайте OPENAI_API_KEY", retryable=False)
+        
+        try:
+            response = await self.http.request(
+                "POST",
+                f"{self.base_url}/chat/completions",
+                json={"model": self.model, "messages": messages, "temperature": 0.2},
+                headers={"Authorization": f"Bearer {self.api_key}"},
+                timeout=self.http.request_timeout(self.timeout),
+            )
+        except CircuitOpenError as exc:
+            raise LLMError(str(exc), retry_after=exc.retry_after) from exc
+        except OutboundBusyError as exc:
+            raise LLMError(str(exc)) from exc
+        except httpx.TransportError as exc:
+            raise LLMError(f"LLM недоступен: {exc!r}") from exc
+        
+        if response.status_code == 429 or response.status_code >= 500:
+            raise LLMError(
+                f"LLM ответил {response.status_code}",
+                retry_after=_retry_after(response),
+            )
+        if response.status_code >= 400:
+            raise LLMError(
+                f"LLM отклонил запрос: {response.status_code} {response.text[:500]}",
+                retryable=False,
+            )
+        
+        try:
+            content = response.json()["choices"][0]["message"]["content"]
+        except (ValueError, KeyError, IndexError, TypeError) as exc:
+            raise LLMError("Некорректный ответ LLM") from exc
+        if not isinstance(content, str) or not content.strip():
+            raise LLMError("LLM вернул пустой ответ")
+        return content.strip()
+
+
+llm_client = LLMClient(
+    http_client,
+    settings.llm_base_url,
+    settings.openai_api_key,
+    settings.llm_model,
+    settings.llm_timeout_seconds,
+)
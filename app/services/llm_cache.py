@@ -0,0 +1,191 @@
+"""
+Кэш ответов LLM с адресацией по содержимому
+
+Заказчики часто присылают почти одинаковые описания, а каждый вызов LLM —
+это десятки секунд и деньги. Ответ сохраняется в таблице llm_cache под
+sha256 от нормализованного входа: регистр, Unicode-формы и пробелы не
+влияют на ключ, теги стека сортируются. В пространство имён ключа входят
+вид задачи, модель и версия промпта, поэтому смена любого из них
+даёт промах, а не устаревший ответ.
+
+Записи живут llm_cache_ttl_seconds. Не чаще раза в llm_cache_prune_seconds
+процесс удаляет просроченные записи и вытесняет давно не использованные,
+если их больше llm_cache_max_entries.
+"""
+import hashlib
+import logging
+import time
+import unicodedata
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+import orjson
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from app.core.config import settings
+from app.core.database import async_session_maker
+from app.core.metrics import Counter, registry
+from app.models.llm_cache import LLMCacheEntry
+
+
+logger = logging.getLogger("work21.llm_cache")
+
+llm_cache_requests = registry.register(Counter(
+    "llm_cache_requests_total",
+    "LLM cache lookups by namespace and result (hit, miss, bypass)",
+    ("namespace", "result"),
+))
+llm_cache_evictions = registry.register(Counter(
+    "llm_cache_evictions_total",
+    "LLM cache entries removed by reason (expired, size)",
+    ("reason",),
+))
+
+
+def normalize_text(value: Optional[str]) -> str:
+    """Текст для ключа: NFKC, без учёта регистра, пробелы схлопнуты"""
+    return " ".join(unicodedata.normalize("NFKC", value or "").casefold().split())
+
+
+def _normalize(value: Any) -> Any:
+    if isinstance(value, str) or value is None:
+        return normalize_text(value)
+    if isinstance(value, (list, tuple)):
+        # Списки (теги стека) сравниваются как множества
+        return sorted({normalize_text(item) for item in value} - {""})
+    return value
+
+
+def cache_key(namespace: str, fields: Dict[str, Any]) -> str:
+    """Ключ кэша: sha256 от пространства имён и нормализованных полей"""
+    payload = orjson.dumps(
+        [namespace, {name: _normalize(value) for name, value in fields.items()}],
+        option=orjson.OPT_SORT_KEYS,
+    )
+    return hashlib.sha256(payload).hexdigest()
+
+
+class LLMCache:
+    """Кэш ответов LLM в БД"""
+    
+    def __init__(self, ttl: float, max_entries: int, prune_interval: float):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.prune_interval = prune_interval
+        self._pruned_at = 0.0
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self.stored = 0
+        self.evicted = 0
+    
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0
+    
+    def record_bypass(self, namespace: str) -> None:
+        """Учесть запрос, который намеренно пошёл мимо кэша"""
+        self.bypassed += 1
+        llm_cache_requests.inc((namespace, "bypass"))
+    
+    async def get(self, namespace: str, key: str) -> Optional[str]:
+        """Непросроченный ответ или None; попадание продлевает запись в LRU"""
+        if not self.enabled:
+            return None
+        now = datetime.utcnow()
+        async with async_session_maker() as db:
+            # Чтение и отметка использования — одним запросом
+            result = await db.execute(
+                update(LLMCacheEntry)
+                .where(LLMCacheEntry.key == key, LLMCacheEntry.expires_at > now)
+                .values(hits=LLMCacheEntry.hits + 1, last_used_at=now)
+                .returning(LLMCacheEntry.output)
+            )
+            output = result.scalar_one_or_none()
+            await db.commit()
+        
+        if output is None:
+            self.misses += 1
+            llm_cache_requests.inc((namespace, "miss"))
+        else:
+            self.hits += 1
+            llm_cache_requests.inc((namespace, "hit"))
+        return output
+    
+    async def set(self, namespace: str, key: str, output: str) -> None:
+        """Сохранить ответ (перезаписывает запись с тем же ключом)"""
+        if not self.enabled:
+            return
+        now = datetime.utcnow()
+        values = dict(
+            key=key,
+            namespace=namespace,
+            output=output,
+            hits=0,
+            created_at=now,
+            expires_at=now + timedelta(seconds=self.ttl),
+            last_used_at=now,
+        )
+        async with async_session_maker() as db:
+            insert_fn = pg_insert if db.bind.dialect.name == "postgresql" else sqlite_insert
+            statement = insert_fn(LLMCacheEntry).values(**values)
+            await db.execute(statement.on_conflict_do_update(
+                index_elements=["key"],
+                set_={name: statement.excluded[name] for name in values if name != "key"},
+            ))
+            await db.commit()
+        self.stored += 1
+        
+        if time.monotonic() - self._pruned_at >= self.prune_interval:
+            await self.prune()
+    
+    async def prune(self) -> int:
+        """Удалить просроченные записи и вытеснить лишние по last_used_at"""
+        self._pruned_at = time.monotonic()
+        async with async_session_maker() as db:
+            result = await db.execute(
+                delete(LLMCacheEntry).where(LLMCacheEntry.expires_at <= datetime.utcnow())
+            )
+            expired = result.rowcount or 0
+            
+            count = (await db.execute(select(func.count()).select_from(LLMCacheEntry))).scalar_one()
+            overflow = count - self.max_entries
+            evicted = 0
+            if overflow > 0:
+                oldest = (
+                    select(LLMCacheEntry.key)
+                    .order_by(LLMCacheEntry.last_used_at)
+                    .limit(overflow)
+                )
+                result = await db.execute(
+                    delete(LLMCacheEntry).where(LLMCacheEntry.key.in_(oldest))
+                )
+                evicted = result.rowcount or 0
+            await db.commit()
+        
+        if expired:
+            llm_cache_evictions.inc(("expired",), expired)
+        if evicted:
+            llm_cache_evictions.inc(("size",), evicted)
+        self.evicted += expired + evicted
+        return expired + evicted
+    
+    def stats(self) -> dict:
+        """Попадания и промахи кэша в этом процессе"""
+        return {
+            "enabled": self.enabled,
+            "hits": self.hits,
+            "misses": self.misses,
+            "bypassed": self.bypassed,
+            "stored": self.stored,
+            "evicted": self.evicted,
+        }
+
+
+llm_cache = LLMCache(
+    settings.llm_cache_ttl_seconds,
+    settings.llm_cache_max_entries,
+    settings.llm_cache_prune_seconds,
+)
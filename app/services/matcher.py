@@ -0,0 +1,343 @@
+"""
+Talent Matcher — подбор студентов-исполнителей для проекта
+
+Признаки всех активных студентов (навыки, рейтинг, опыт, текущая загрузка)
+держатся в памяти процесса: инвертированный индекс навык -> студенты и список
+студентов, отсортированный по части оценки, не зависящей от проекта. Запрос
+кандидатов раскладывает студентов по числу совпавших навыков операциями над
+множествами и берёт top-k через heapq, не перебирая студентов в Python.
+
+Индекс обновляется инкрементально: перед выдачей перечитываются пользователи
+с users.updated_at новее последнего обновления и помеченные через mark_dirty
+(смена исполнителя проекта или задачи). Раз в matcher_full_rebuild_seconds
+индекс строится заново — так подтягиваются изменения из других воркеров,
+которые не меняют users.updated_at.
+"""
+import asyncio
+import bisect
+import heapq
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import func, or_, select, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.project import Project, ProjectStatus, Task, TaskStatus
+from app.models.tag import Tag, user_skills
+from app.models.user import User, UserRole
+from app.services.tags import normalize_tag
+
+
+# Веса составляющих оценки (в сумме 1.0)
+SKILL_WEIGHT = 0.5
+RATING_WEIGHT = 0.25
+EXPERIENCE_WEIGHT = 0.15
+AVAILABILITY_WEIGHT = 0.10
+
+# Число завершённых проектов, при котором опыт даёт половину веса
+EXPERIENCE_HALF = 5
+
+# Запас при инкрементальном чтении: транзакции, закоммиченные с задержкой,
+# но с более ранним updated_at, всё равно попадут в следующее обновление
+_WATERMARK_OVERLAP = timedelta(seconds=2)
+
+_ACTIVE_PROJECT_STATUSES = (ProjectStatus.IN_PROGRESS, ProjectStatus.REVIEW)
+_CLOSED_PROJECT_STATUSES = (ProjectStatus.COMPLETED, ProjectStatus.CANCELLED)
+
+
+def base_score(rating_score: float, completed_projects: int, active_assignments: int) -> float:
+    """Часть оценки, не зависящая от проекта"""
+    rating = min(max(rating_score, 0.0), 5.0) / 5.0
+    experience = completed_projects / (completed_projects + EXPERIENCE_HALF)
+    availability = 1.0 / (1 + active_assignments)
+    return (
+        RATING_WEIGHT * rating
+        + EXPERIENCE_WEIGHT * experience
+        + AVAILABILITY_WEIGHT * availability
+    )
+
+
+@dataclass(frozen=True)
+class StudentFeatures:
+    """Признаки студента в индексе"""
+    user_id: int
+    skills: FrozenSet[str]
+    rating_score: float
+    completed_projects: int
+    active_assignments: int
+    base_score: float
+
+
+@dataclass
+class Candidate:
+    """Кандидат на проект с итоговой оценкой"""
+    user_id: int
+    score: float
+    matched_skills: List[str]
+    completed_projects: int
+    active_assignments: int
+
+
+class TalentMatcher:
+    """
+    In-memory индекс студентов для подбора кандидатов
+    
+    Не потокобезопасен: рассчитан на один event loop, обновления
+    сериализуются asyncio.Lock.
+    """
+    
+    def __init__(self, full_rebuild_seconds: float):
+        self.full_rebuild_seconds = full_rebuild_seconds
+        self._students: Dict[int, StudentFeatures] = {}
+        self._postings: Dict[str, Set[int]] = {}
+        # (-base_score, user_id) по возрастанию — лучшие студенты первыми
+        self._by_base: List[Tuple[float, int]] = []
+        self._dirty: Set[int] = set()
+        self._watermark: Optional[datetime] = None
+        self._built_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+        self.full_rebuilds = 0
+        self.incremental_updates = 0
+    
+    def mark_dirty(self, *user_ids: Optional[int]) -> None:
+        """Перечитать признаки пользователей при следующем обращении"""
+        self._dirty.update(user_id for user_id in user_ids if user_id is not None)
+    
+    def invalidate(self) -> None:
+        """Построить индекс заново при следующем обращении"""
+        self._built_at = None
+    
+    async def refresh(self, db: AsyncSession) -> None:
+        """Привести индекс в актуальное состояние"""
+        async with self._lock:
+            if (
+                self._built_at is None
+                or time.monotonic() - self._built_at >= self.full_rebuild_seconds
+            ):
+                await self._rebuild(db)
+            else:
+                await self._update(db)
+    
+    async def _rebuild(self, db: AsyncSession) -> None:
+        dirty = set(self._dirty)
+        users = (await db.execute(
+            select(User.id, User.rating_score, User.completed_projects, User.updated_at)
+            .where(User.role == UserRole.STUDENT, User.is_active.is_(True))
+        )).all()
+        skills = await self._load_skills(db, None)
+        loads = await self._load_assignments(db, None)
+        
+        self._students = {}
+        self._postings = {}
+        for user_id, rating_score, completed_projects, _ in users:
+            features = self._features(user_id, rating_score, completed_projects, skills, loads)
+            self._students[user_id] = features
+            for slug in features.skills:
+                self._postings.setdefault(slug, set()).add(user_id)
+        self._by_base = sorted((-f.base_score, f.user_id) for f in self._students.values())
+        
+        self._watermark = max((row.updated_at for row in users if row.updated_at), default=None)
+        self._dirty -= dirty
+        self._built_at = time.monotonic()
+        self.full_rebuilds += 1
+    
+    async def _update(self, db: AsyncSession) -> None:
+        dirty = set(self._dirty)
+        conditions = []
+        if self._watermark is not None:
+            conditions.append(User.updated_at >= self._watermark - _WATERMARK_OVERLAP)
+        if dirty:
+            conditions.append(User.id.in_(dirty))
+        if not conditions:
+            return
+        
+        users = (await db.execute(
+            select(
+                User.id, User.role, User.is_active,
+                User.rating_score, User.completed_projects, User.updated_at,
+            ).where(or_(*conditions))
+        )).all()
+        changed = [row.id for row in users]
+        if changed:
+            skills = await self._load_skills(db, changed)
+            loads = await self._load_assignments(db, changed)
+        
+        for row in users:
+            self._remove(row.id)
+            if row.role == UserRole.STUDENT and row.is_active:
+                self._insert(self._features(row.id, row.rating_score, row.completed_projects, skills, loads))
+            if row.updated_at and (self._watermark is None or row.updated_at > self._watermark):
+                self._watermark = row.updated_at
+        
+        self._dirty -= dirty
+        self.incremental_updates += 1
+    
+    @staticmethod
+    async def _load_skills(db: AsyncSession, user_ids: Optional[List[int]]) -> Dict[int, Set[str]]:
+        query = select(user_skills.c.user_id, Tag.slug).join(Tag, Tag.id == user_skills.c.tag_id)
+        if user_ids is not None:
+            query = query.where(user_skills.c.user_id.in_(user_ids))
+        skills: Dict[int, Set[str]] = {}
+        for user_id, slug in (await db.execute(query)).all():
+            skills.setdefault(user_id, set()).add(slug)
+        return skills
+    
+    @staticmethod
+    async def _load_assignments(db: AsyncSession, user_ids: Optional[List[int]]) -> Dict[int, int]:
+        """Текущая загрузка: активные проекты и незавершённые задачи"""
+        projects = select(Project.assignee_id.label("user_id")).where(
+            Project.assignee_id.is_not(None),
+            Project.status.in_(_ACTIVE_PROJECT_STATUSES),
+        )
+        tasks = (
+            select(Task.assignee_id.label("user_id"))
+            .join(Project, Project.id == Task.project_id)
+            .where(
+                Task.assignee_id.is_not(None),
+                Task.status != TaskStatus.COMPLETED,
+                Project.status.not_in(_CLOSED_PROJECT_STATUSES),
+            )
+        )
+        if user_ids is not None:
+            projects = projects.where(Project.assignee_id.in_(user_ids))
+            tasks = tasks.where(Task.assignee_id.in_(user_ids))
+        
+        assignments = union_all(projects, tasks).subquery()
+        result = await db.execute(
+            select(assignments.c.user_id, func.count()).group_by(assignments.c.user_id)
+        )
+        return dict(result.all())
+    
+    @staticmethod
+    def _features(
+        user_id: int,
+        rating_score: Optional[float],
+        completed_projects: Optional[int],
+        skills: Dict[int, Set[str]],
+        loads: Dict[int, int],
+    ) -> StudentFeatures:
+        rating_score = rating_score or 0.0
+        completed_projects = completed_projects or 0
+        active_assignments = loads.get(user_id, 0)
+        return StudentFeatures(
+            user_id=user_id,
+            skills=frozenset(skills.get(user_id, ())),
+            rating_score=rating_score,
+            completed_projects=completed_projects,
+            active_assignments=active_assignments,
+            base_score=base_score(rating_score, completed_projects, active_assignments),
+        )
+    
+    def _insert(self, features: StudentFeatures) -> None:
+        self._students[features.user_id] = features
+        for slug in features.skills:
+            self._postings.setdefault(slug, set()).add(features.user_id)
+        bisect.insort(self._by_base, (-features.base_score, features.user_id))
+    
+    def _remove(self, user_id: int) -> None:
+        features = self._students.pop(user_id, None)
+        if features is None:
+            return
+        for slug in features.skills:
+            posting = self._postings.get(slug)
+            if posting is not None:
+                posting.discard(user_id)
+                if not posting:
+                    del self._postings[slug]
+        key = (-features.base_score, user_id)
+        index = bisect.bisect_left(self._by_base, key)
+        if index < len(self._by_base) and self._by_base[index] == key:
+            del self._by_base[index]
+    
+    def rank(self, skills: Iterable[str], limit: int) -> List[Candidate]:
+        """
+        Top-k студентов для набора навыков по текущему индексу
+        
+        Студенты делятся на уровни по числу общих с проектом навыков
+        (множества строятся операциями над списками индекса, без обхода
+        студентов в Python). Внутри уровня оценка растёт вместе с base_score,
+        поэтому из каждого уровня достаточно взять limit лучших по base_score.
+        """
+        slugs = frozenset(normalize_tag(name) for name in skills) - {""}
+        if limit <= 0:
+            return []
+        
+        # at_least[k] — студенты, у которых не меньше k + 1 навыков проекта
+        at_least: List[Set[int]] = []
+        for slug in slugs:
+            posting = self._postings.get(slug)
+            if not posting:
+                continue
+            for k in range(len(at_least) - 1, -1, -1):
+                common = at_least[k] & posting
+                if not common:
+                    continue
+                if k + 1 == len(at_least):
+                    at_least.append(common)
+                else:
+                    at_least[k + 1] |= common
+            if at_least:
+                at_least[0] |= posting
+            else:
+                at_least.append(set(posting))
+        
+        skill_step = SKILL_WEIGHT / len(slugs) if slugs else 0.0
+        best: List[Tuple[float, int]] = []
+        for k, members in enumerate(at_least):
+            if k + 1 < len(at_least):
+                members = members - at_least[k + 1]
+            for user_id in self._top_by_base(limit, members=members):
+                best.append((skill_step * (k + 1) + self._students[user_id].base_score, -user_id))
+        matched_any = at_least[0] if at_least else set()
+        for user_id in self._top_by_base(limit, excluded=matched_any):
+            best.append((self._students[user_id].base_score, -user_id))
+        
+        candidates = []
+        for score, neg_user_id in heapq.nlargest(limit, best):
+            features = self._students[-neg_user_id]
+            candidates.append(Candidate(
+                user_id=features.user_id,
+                score=round(score, 4),
+                matched_skills=sorted(features.skills & slugs),
+                completed_projects=features.completed_projects,
+                active_assignments=features.active_assignments,
+            ))
+        return candidates
+    
+    def _top_by_base(self, limit: int, members: Optional[Set[int]] = None, excluded: Set[int] = frozenset()) -> List[int]:
+        """Лучшие по base_score студенты из members (или все, кроме excluded)"""
+        total = len(self._by_base)
+        if members is not None and len(members) ** 2 <= limit * total:
+            # Небольшое множество дешевле отсортировать целиком
+            students = self._students
+            return heapq.nlargest(limit, members, key=lambda user_id: (students[user_id].base_score, -user_id))
+        
+        # Плотное множество: первые limit подходящих в отсортированном списке
+        top = []
+        for _, user_id in self._by_base:
+            if (user_id in members) if members is not None else (user_id not in excluded):
+                top.append(user_id)
+                if len(top) >= limit:
+                    break
+        return top
+    
+    async def top_candidates(self, db: AsyncSession, skills: Iterable[str], limit: int) -> List[Candidate]:
+        """Обновить индекс и вернуть top-k кандидатов"""
+        await self.refresh(db)
+        return self.rank(skills, limit)
+    
+    def stats(self) -> dict:
+        """Размер индекса и число обновлений"""
+        return {
+            "students": len(self._students),
+            "skills": len(self._postings),
+            "pending_dirty": len(self._dirty),
+            "full_rebuilds": self.full_rebuilds,
+            "incremental_updates": self.incremental_updates,
+        }
+
+
+talent_matcher = TalentMatcher(settings.matcher_full_rebuild_seconds)
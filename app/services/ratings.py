@@ -0,0 +1,100 @@
+"""
+Накопительные агрегаты рейтингов
+
+Каждый новый отзыв прибавляется к строке user_rating_stats одним атомарным
+upsert в транзакции отзыва. Одновременные отзывы об одном пользователе
+сериализуются блокировкой этой строки, поэтому обновления не теряются,
+а средний рейтинг пересчитывается из сумм без AVG по всем отзывам.
+"""
+from datetime import datetime
+from typing import List
+
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import Executable
+
+from app.models.rating import Rating, UserRatingStats
+from app.models.user import User
+
+
+# Необязательные категории оценки: Rating.<name>_score -> <name>_sum/<name>_count
+RATING_CATEGORIES = ("quality", "communication", "deadline")
+
+
+def _increments(rating: Rating) -> dict:
+    values = {"ratings_count": 1, "score_sum": rating.score}
+    for category in RATING_CATEGORIES:
+        value = getattr(rating, f"{category}_score")
+        values[f"{category}_sum"] = value or 0
+        values[f"{category}_count"] = 0 if value is None else 1
+    return values
+
+
+async def apply_rating(db: AsyncSession, rating: Rating, completed_project: bool = False) -> None:
+    """
+    Учесть новый отзыв в агрегатах получателя и обновить его rating_score
+    
+    completed_project — отзыв заказчика о завершённом проекте, засчитывает
+    студенту ещё один выполненный проект.
+    """
+    increments = _increments(rating)
+    now = datetime.utcnow()
+    
+    insert_fn = pg_insert if db.bind.dialect.name == "postgresql" else sqlite_insert
+    statement = insert_fn(UserRatingStats).values(user_id=rating.reviewee_id, updated_at=now, **increments)
+    statement = statement.on_conflict_do_update(
+        index_elements=[UserRatingStats.user_id],
+        set_={
+            **{
+                column: getattr(UserRatingStats, column) + statement.excluded[column]
+                for column in increments
+            },
+            "updated_at": now,
+        },
+    ).returning(UserRatingStats.ratings_count, UserRatingStats.score_sum)
+    ratings_count, score_sum = (await db.execute(statement)).one()
+    
+    values = {"rating_score": score_sum / ratings_count}
+    if completed_project:
+        # Инкремент в SQL, а не в Python, чтобы параллельные отзывы не затирали друг друга
+        values["completed_projects"] = User.completed_projects + 1
+    await db.execute(
+        update(User)
+        .where(User.id == rating.reviewee_id)
+        .values(**values)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def rebuild_rating_stats_statements() -> List[Executable]:
+    """
+    Запросы полного пересчёта агрегатов по таблице ratings
+    
+    Используются скриптом rebuild_rating_stats.py; в миграциях — копия
+    этих запросов в SQL.
+    """
+    columns = ["user_id", "ratings_count", "score_sum"]
+    aggregates = [Rating.reviewee_id, func.count(), func.sum(Rating.score)]
+    for category in RATING_CATEGORIES:
+        score = getattr(Rating, f"{category}_score")
+        columns += [f"{category}_sum", f"{category}_count"]
+        aggregates += [func.coalesce(func.sum(score), 0), func.count(score)]
+    columns.append("updated_at")
+    aggregates.append(func.current_timestamp())
+    
+    average = (
+        select(UserRatingStats.score_sum * 1.0 / UserRatingStats.ratings_count)
+        .where(UserRatingStats.user_id == User.id)
+        .scalar_subquery()
+    )
+    return [
+        delete(UserRatingStats),
+        insert(UserRatingStats).from_select(
+            columns, select(*aggregates).group_by(Rating.reviewee_id)
+        ),
+        update(User)
+        .where(User.id.in_(select(UserRatingStats.user_id)))
+        .values(rating_score=average),
+    ]
@@ -0,0 +1,182 @@
+"""
+Полнотекстовый поиск по проектам
+
+PostgreSQL: генерируемая колонка projects.search_vector (tsvector) с GIN
+индексом — база сама пересчитывает её при INSERT/UPDATE. Колонку и индекс
+создаёт миграция add_project_search.
+SQLite (разработка): внешняя FTS5-таблица projects_fts, которую держат
+в актуальном состоянии триггеры.
+"""
+import html
+import logging
+import re
+from dataclasses import dataclass
+from typing import Optional
+
+from sqlalchemy import Float, Integer, String, func, literal_column, text
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.sql.elements import ColumnElement
+from sqlalchemy.sql.selectable import Subquery
+
+from app.models.project import Project
+
+
+# Конфигурация текстового поиска PostgreSQL: русская морфология,
+# латинские слова обрабатываются английским стеммером. Должна совпадать
+# с конфигурацией search_vector из миграции add_project_search
+SEARCH_CONFIG = "russian"
+
+# База выделяет совпадения символами из Private Use Area, а не тегами:
+# название и описание — пользовательский текст, его нужно экранировать
+# до того, как в подсветке появится HTML (см. render_highlight)
+HIGHLIGHT_START = "\ue000"
+HIGHLIGHT_STOP = "\ue001"
+
+_POSTGRES_INDEX_EXISTS = """
+    SELECT 1 FROM pg_attribute a
+    JOIN pg_index i ON i.indrelid = a.attrelid
+    JOIN pg_class c ON c.oid = i.indexrelid
+    WHERE a.attrelid = 'projects'::regclass AND a.attname = 'search_vector'
+      AND NOT a.attisdropped AND c.relname = 'ix_projects_search_vector' AND i.indisvalid
+"""
+
+_SQLITE_SETUP = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS projects_fts USING fts5(
+        title, description, requirements,
+        content='projects', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS projects_fts_ai AFTER INSERT ON projects BEGIN
+        INSERT INTO projects_fts(rowid, title, description, requirements)
+        VALUES (new.id, new.title, new.description, new.requirements);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS projects_fts_ad AFTER DELETE ON projects BEGIN
+        INSERT INTO projects_fts(projects_fts, rowid, title, description, requirements)
+        VALUES ('delete', old.id, old.title, old.description, old.requirements);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS projects_fts_au AFTER UPDATE ON projects BEGIN
+        INSERT INTO projects_fts(projects_fts, rowid, title, description, requirements)
+        VALUES ('delete', old.id, old.title, old.description, old.requirements);
+        INSERT INTO projects_fts(rowid, title, description, requirements)
+        VALUES (new.id, new.title, new.description, new.requirements);
+    END
+    """,
+]
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+logger = logging.getLogger("work21.search")
+
+
+async def setup_project_search(engine: AsyncEngine) -> None:
+    """
+    Подготовить поисковый индекс при старте (идемпотентно)
+    
+    SQLite: создаёт FTS5-таблицу и триггеры. PostgreSQL: только проверяет
+    каталог — колонку и GIN индекс создаёт миграция add_project_search
+    (CREATE INDEX CONCURRENTLY); ALTER TABLE с пересчётом всех строк при
+    старте каждого воркера держал бы блокировку на projects.
+    """
+    async with engine.begin() as conn:
+        if conn.dialect.name == "postgresql":
+            if not await conn.scalar(text(_POSTGRES_INDEX_EXISTS)):
+                logger.warning(
+                    "projects.search_vector or a valid ix_projects_search_vector is missing, "
+                    "project search will fail: run 'alembic upgrade head'"
+                )
+        elif conn.dialect.name == "sqlite":
+            exists = await conn.scalar(text(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'projects_fts'"
+            ))
+            for statement in _SQLITE_SETUP:
+                await conn.execute(text(statement))
+            if not exists:
+                # Индексируем проекты, созданные до появления FTS-таблицы
+                await conn.execute(text("INSERT INTO projects_fts(projects_fts) VALUES ('rebuild')"))
+
+
+@dataclass
+class ProjectSearch:
+    """Части запроса поиска для подстановки в выборку проектов"""
+    condition: ColumnElement
+    rank: ColumnElement
+    highlight: ColumnElement
+    join: Optional[Subquery] = None
+
+
+def sqlite_match_query(query: str) -> Optional[str]:
+    """Безопасный запрос FTS5: все слова обязательны, поиск по префиксу"""
+    tokens = _TOKEN.findall(query)
+    if not tokens:
+        return None
+    return " ".join(f'"{token}"*' for token in tokens)
+
+
+def render_highlight(highlight: Optional[str]) -> Optional[str]:
+    """
+    HTML подсветки: текст проекта экранирован, совпадения в `<mark>`
+    
+    Из HTML-тегов в результате только `<mark>` и `</mark>`, поэтому его
+    можно вставлять в разметку как есть.
+    """
+    if highlight is None:
+        return None
+    return (
+        html.escape(highlight)
+        .replace(HIGHLIGHT_START, "<mark>")
+        .replace(HIGHLIGHT_STOP, "</mark>")
+    )
+
+
+def build_project_search(query: str, dialect_name: str) -> Optional[ProjectSearch]:
+    """
+    Условие, ранг (больше — релевантнее) и подсветка для поиска по проектам
+    
+    Возвращает None, если в запросе нет слов для поиска. Подсветка
+    размечена символами HIGHLIGHT_START/HIGHLIGHT_STOP, в HTML её
+    превращает render_highlight.
+    """
+    if dialect_name == "postgresql":
+        if not _TOKEN.search(query):
+            return None
+        ts_query = func.websearch_to_tsquery(SEARCH_CONFIG, query)
+        search_vector = literal_column("projects.search_vector")
+        return ProjectSearch(
+            condition=search_vector.op("@@")(ts_query),
+            rank=func.ts_rank_cd(search_vector, ts_query, 32),
+            highlight=func.ts_headline(
+                SEARCH_CONFIG,
+                Project.title + " — " + Project.description,
+                ts_query,
+                f"StartSel={HIGHLIGHT_START}, StopSel={HIGHLIGHT_STOP}, "
+                "MaxFragments=2, MaxWords=30, MinWords=10",
+            ),
+        )
+    
+    match = sqlite_match_query(query)
+    if match is None:
+        return None
+    fts = (
+        text(
+            "SELECT rowid AS id, "
+            "-bm25(projects_fts, 10.0, 3.0, 1.0) AS rank, "
+            "snippet(projects_fts, -1, :start, :stop, '…', 16) AS highlight "
+            "FROM projects_fts WHERE projects_fts MATCH :match"
+        )
+        .bindparams(start=HIGHLIGHT_START, stop=HIGHLIGHT_STOP, match=match)
+        .columns(id=Integer, rank=Float, highlight=String)
+        .subquery("projects_fts_hits")
+    )
+    return ProjectSearch(
+        condition=fts.c.id == Project.id,
+        rank=fts.c.rank,
+        highlight=fts.c.highlight,
+        join=fts,
+    )
@@ -0,0 +1,130 @@
+"""
+Синхронизация и фильтрация тегов
+
+JSON-колонки Project.tech_stack и User.skills остаются источником для
+ответов API, а таблицы project_tags/user_skills — индексом для фильтров.
+Endpoint'ы, меняющие эти колонки, вызывают sync_* в той же транзакции.
+"""
+import json
+from enum import Enum
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import Table, delete, distinct, func, insert, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql.elements import ColumnElement
+
+from app.models.tag import Tag, project_tags, user_skills
+
+
+class TagMatch(str, Enum):
+    """Семантика фильтра по нескольким тегам"""
+    ANY = "any"  # есть хотя бы один из тегов
+    ALL = "all"  # есть все теги
+
+
+def normalize_tag(name: str) -> str:
+    """Ключ тега: без лишних пробелов и без учёта регистра"""
+    return " ".join(name.split()).lower()[:100]
+
+
+def parse_tag_list(value: Optional[str]) -> List[str]:
+    """Разобрать JSON-список тегов из Text-колонки"""
+    if not value:
+        return []
+    try:
+        data = json.loads(value)
+    except (json.JSONDecodeError, TypeError):
+        return []
+    if not isinstance(data, list):
+        return []
+    return [item for item in data if isinstance(item, str) and item.strip()]
+
+
+async def get_or_create_tags(db: AsyncSession, names: Iterable[str]) -> Dict[str, int]:
+    """Найти или создать теги, вернуть slug -> id"""
+    wanted: Dict[str, str] = {}
+    for name in names:
+        slug = normalize_tag(name)
+        if slug:
+            wanted.setdefault(slug, " ".join(name.split())[:100])
+    if not wanted:
+        return {}
+    
+    result = await db.execute(select(Tag.slug, Tag.id).where(Tag.slug.in_(wanted)))
+    tag_ids = dict(result.all())
+    
+    missing = [slug for slug in wanted if slug not in tag_ids]
+    if missing:
+        dialect = db.bind.dialect.name
+        rows = [{"slug": slug, "name": wanted[slug]} for slug in missing]
+        if dialect in ("postgresql", "sqlite"):
+            # Параллельный запрос мог успеть создать тот же тег
+            insert_fn = pg_insert if dialect == "postgresql" else sqlite_insert
+            statement = insert_fn(Tag).values(rows).on_conflict_do_nothing(index_elements=["slug"])
+        else:
+            statement = insert(Tag).values(rows)
+        result = await db.execute(statement.returning(Tag.slug, Tag.id))
+        tag_ids.update(result.all())
+        
+        still_missing = [slug for slug in missing if slug not in tag_ids]
+        if still_missing:
+            result = await db.execute(select(Tag.slug, Tag.id).where(Tag.slug.in_(still_missing)))
+            tag_ids.update(result.all())
+    
+    return tag_ids
+
+
+async def _sync_links(
+    db: AsyncSession,
+    table: Table,
+    owner_column: str,
+    owner_id: int,
+    names: Iterable[str],
+    replace: bool,
+) -> None:
+    if replace:
+        await db.execute(delete(table).where(table.c[owner_column] == owner_id))
+    tag_ids = await get_or_create_tags(db, names)
+    if tag_ids:
+        await db.execute(
+            insert(table),
+            [{owner_column: owner_id, "tag_id": tag_id} for tag_id in tag_ids.values()],
+        )
+
+
+async def sync_project_tags(db: AsyncSession, project_id: int, names: Iterable[str], replace: bool = True) -> None:
+    """Привести project_tags в соответствие с tech_stack проекта (replace=False — для нового проекта)"""
+    await _sync_links(db, project_tags, "project_id", project_id, names, replace)
+
+
+async def sync_user_skills(db: AsyncSession, user_id: int, names: Iterable[str], replace: bool = True) -> None:
+    """Привести user_skills в соответствие с навыками пользователя"""
+    await _sync_links(db, user_skills, "user_id", user_id, names, replace)
+
+
+def _tag_filter(table: Table, owner_column: str, owner_id_column: ColumnElement, names: List[str], match: TagMatch) -> Optional[ColumnElement]:
+    slugs = sorted({normalize_tag(name) for name in names} - {""})
+    if not slugs:
+        return None
+    
+    owner = table.c[owner_column]
+    owners = (
+        select(owner)
+        .join(Tag, Tag.id == table.c.tag_id)
+        .where(Tag.slug.in_(slugs))
+    )
+    if match == TagMatch.ALL:
+        owners = owners.group_by(owner).having(func.count(distinct(table.c.tag_id)) == len(slugs))
+    return owner_id_column.in_(owners)
+
+
+def project_tag_filter(project_id_column: ColumnElement, names: List[str], match: TagMatch = TagMatch.ANY) -> Optional[ColumnElement]:
+    """Условие «у проекта есть теги» или None, если теги не заданы"""
+    return _tag_filter(project_tags, "project_id", project_id_column, names, match)
+
+
+def user_skill_filter(user_id_column: ColumnElement, names: List[str], match: TagMatch = TagMatch.ANY) -> Optional[ColumnElement]:
+    """Условие «у пользователя есть навыки» или None, если навыки не заданы"""
+    return _tag_filter(user_skills, "user_id", user_id_column, names, match)
@@ -0,0 +1,82 @@
+"""
+Fake LLM server for local development and tests
+
+Implements the OpenAI-compatible POST /v1/chat/completions endpoint and
+answers with deterministic Markdown built from the prompt, so the job
+queue can be exercised without an OpenAI key.
+
+Usage:
+    uvicorn fake_llm_server:app --port 8090
+    LLM_BASE_URL=http://localhost:8090/v1 OPENAI_API_KEY=fake uvicorn app.main:app
+
+Environment:
+    FAKE_LLM_DELAY_SECONDS  - response delay (default 0)
+    FAKE_LLM_FAILURE_RATE   - share of requests answered with 503 (default 0)
+"""
+import asyncio
+import hashlib
+import os
+import random
+import time
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+
+app = FastAPI(title="Fake LLM")
+
+stats = {"requests": 0, "failures": 0}
+
+
+def _answer(messages: list) -> str:
+    """Детерминированный ответ: одинаковый промпт — одинаковый текст"""
+    prompt = "\n".join(str(message.get("content", "")) for message in messages)
+    digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:12]
+    user_prompt = str(messages[-1].get("content", "")) if messages else ""
+    title = user_prompt.splitlines()[0] if user_prompt else "Проект"
+    return (
+        f"# {title}\n\n"
+        "## Этапы\n\n"
+        "1. Анализ и проектирование — 16 ч\n"
+        "2. Разработка — 40 ч\n"
+        "3. Тестирование и сдача — 12 ч\n\n"
+        f"_fake-llm {digest}_"
+    )
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    stats["requests"] += 1
+    body = await request.json()
+    
+    delay = float(os.environ.get("FAKE_LLM_DELAY_SECONDS", "0"))
+    if delay:
+        await asyncio.sleep(delay)
+    
+    if random.random() < float(os.environ.get("FAKE_LLM_FAILURE_RATE", "0")):
+        stats["failures"] += 1
+        return JSONResponse(
+            status_code=503,
+            content={"error": {"message": "fake overload"}},
+            headers={"Retry-After": "1"},
+        )
+    
+    return {
+        "id": f"chatcmpl-fake-{stats['requests']}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "fake"),
+        "choices": [
+            {
+                "index": 0,
+                "message": {"role": "assistant", "content": _answer(body.get("messages", []))},
+                "finish_reason": "stop",
+            }
+        ],
+    }
+
+
+@app.get("/stats")
+async def get_stats():
+    """Число запросов и отказов (для проверок в тестах)"""
+    return stats
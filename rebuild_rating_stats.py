@@ -0,0 +1,40 @@
+"""
+Script to rebuild WORK21 rating aggregates from the ratings table
+Supports both PostgreSQL and SQLite
+
+Usage: python rebuild_rating_stats.py
+"""
+import sys
+from pathlib import Path
+
+# Добавляем корневую директорию проекта в путь
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from sqlalchemy import func, select
+from app.core.database import engine
+from app.models import UserRatingStats
+from app.services.ratings import rebuild_rating_stats_statements
+
+
+def main():
+    print("=" * 50)
+    print("REBUILD RATING STATS - WORK21")
+    print("=" * 50)
+    
+    try:
+        # Все запросы в одной транзакции: агрегаты не бывают наполовину пересчитаны
+        with engine.begin() as conn:
+            for statement in rebuild_rating_stats_statements():
+                conn.execute(statement)
+            users = conn.execute(select(func.count()).select_from(UserRatingStats)).scalar()
+        print(f"\n✅ Rebuilt rating stats for {users} users")
+    except Exception as e:
+        print(f"\n❌ Error: {e}")
+        print("   Run migrations first: alembic upgrade head")
+        sys.exit(1)
+    
+    print("\n" + "=" * 50)
+
+
+if __name__ == "__main__":
+    main()
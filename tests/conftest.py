@@ -0,0 +1,116 @@
+"""
+Общие фикстуры тестов
+
+Поднимается всё приложение (app.main: api_router под MetricsMiddleware)
+на временной SQLite-базе через aiosqlite. QUERY_BUDGET_MODE=raise:
+превышение бюджета запросов endpoint'а пробрасывается в тест исключением
+QueryBudgetExceeded.
+"""
+import os
+import tempfile
+
+_DB_PATH = os.path.join(tempfile.mkdtemp(prefix="work21-tests-"), "test.db")
+
+# Настройки читаются при импорте app, поэтому окружение задаётся до него
+os.environ.update({
+    "DATABASE_URL": f"sqlite+aiosqlite:///{_DB_PATH}",
+    "DATABASE_REPLICA_URLS": "[]",
+    "DEBUG": "false",
+    "QUERY_BUDGET_MODE": "raise",
+    # Кэши выключены: каждый запрос идёт в БД, бюджет проверяется по худшему случаю
+    "AUTH_CACHE_TTL_SECONDS": "0",
+    "RESPONSE_CACHE_TTL_SECONDS": "0",
+    "LEADERBOARD_MAX_STALENESS_SECONDS": "0",
+    # Задачи LLM ставятся в очередь, но не выполняются
+    "JOBS_CONCURRENCY": "0",
+    "OUTBOUND_HTTP2": "false",
+    "BCRYPT_ROUNDS": "4",
+})
+
+from typing import Awaitable, Callable, Dict, Set, Tuple  # noqa: E402
+
+import httpx  # noqa: E402
+import pytest_asyncio  # noqa: E402
+from sqlalchemy import update  # noqa: E402
+
+from app.core.database import async_engine, async_session_maker  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models.user import User, UserRole  # noqa: E402
+from app.services.matcher import talent_matcher  # noqa: E402
+
+
+Headers = Dict[str, str]
+
+
+class RouteRecorder:
+    """ASGI-обёртка: запоминает шаблоны маршрутов, которые обработало приложение"""
+    
+    def __init__(self, app):
+        self.app = app
+        self.routes: Set[Tuple[str, str]] = set()
+    
+    async def __call__(self, scope, receive, send):
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            route = scope.get("route")
+            if route is not None:
+                self.routes.add((scope.get("method", "WEBSOCKET"), route.path))
+
+
+@pytest_asyncio.fixture
+async def asgi_app():
+    """Приложение на пустой базе с выполненным lifespan"""
+    if os.path.exists(_DB_PATH):
+        os.remove(_DB_PATH)
+    # Индекс матчера остался от базы предыдущего теста
+    talent_matcher.invalidate()
+    
+    recorder = RouteRecorder(app)
+    async with app.router.lifespan_context(app):
+        yield recorder
+    # Соединения aiosqlite привязаны к циклу событий теста
+    await async_engine.dispose()
+
+
+@pytest_asyncio.fixture
+async def client(asgi_app):
+    transport = httpx.ASGITransport(app=asgi_app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client
+
+
+@pytest_asyncio.fixture
+async def register(client) -> Callable[..., Awaitable[Headers]]:
+    """Зарегистрировать пользователя и вернуть заголовки с его токеном"""
+    
+    async def register(email: str, role: UserRole) -> Headers:
+        response = await client.post("/api/v1/auth/register", json={
+            "email": email,
+            "first_name": "Тест",
+            "last_name": "Тестов",
+            # Администраторов через API не зарегистрировать: повышаем заказчика
+            "role": (UserRole.CUSTOMER if role == UserRole.ADMIN else role).value,
+            "password": "password123",
+        })
+        assert response.status_code == 201, response.text
+        if role == UserRole.ADMIN:
+            async with async_session_maker() as db:
+                await db.execute(update(User).where(User.email == email).values(role=UserRole.ADMIN))
+                await db.commit()
+        
+        response = await client.post("/api/v1/auth/login", data={"username": email, "password": "password123"})
+        assert response.status_code == 200, response.text
+        return {"Authorization": f"Bearer {response.json()['access_token']}"}
+    
+    return register
+
+
+@pytest_asyncio.fixture
+async def customer(register) -> Headers:
+    return await register("customer@test.ru", UserRole.CUSTOMER)
+
+
+@pytest_asyncio.fixture
+async def student(register) -> Headers:
+    return await register("student@test.ru", UserRole.STUDENT)
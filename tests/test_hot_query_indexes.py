@@ -0,0 +1,145 @@
+"""
+Индексы горячих запросов (миграция add_hot_query_indexes)
+
+Планы SQLite (EXPLAIN QUERY PLAN) для выборок, которые строят endpoint'ы,
+и уникальные индексы заявок и отзывов: дубль из параллельных запросов
+превращается в ответ 400, а не 500.
+"""
+import asyncio
+from contextlib import contextmanager
+from typing import Iterator, List
+
+import pytest
+from sqlalchemy import event, func, select, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.sql import Select
+
+from app.api.projects import _apply_feed_filters, _my_projects_filter, _project_summary_query
+from app.core.database import async_engine, async_session_maker
+from app.models.project import Application, Project, ProjectStatus, Task
+from app.models.rating import Rating
+from app.models.user import User, UserRole
+from tests.test_ratings import complete_project
+
+
+pytestmark = pytest.mark.asyncio
+
+
+async def query_plan(statement: Select) -> str:
+    """План запроса одной строкой: детали шагов через ' | '"""
+    sql = statement.compile(dialect=async_engine.dialect, compile_kwargs={"literal_binds": True})
+    async with async_session_maker() as db:
+        rows = (await db.execute(text(f"EXPLAIN QUERY PLAN {sql}"))).all()
+    return " | ".join(row.detail for row in rows)
+
+
+CUSTOMER = User(id=1, role=UserRole.CUSTOMER)
+STUDENT = User(id=2, role=UserRole.STUDENT)
+
+# (запрос, индекс, сортировка берётся из индекса)
+HOT_QUERIES = {
+    "feed": (
+        _apply_feed_filters(select(Project), ProjectStatus.OPEN, 0, 20, None),
+        "ix_projects_status_created_at", True,
+    ),
+    "feed_summary": (
+        _apply_feed_filters(_project_summary_query(), ProjectStatus.IN_PROGRESS, 20, 20, None),
+        "ix_projects_status_created_at", False,
+    ),
+    "customer_projects": (
+        select(Project).where(_my_projects_filter(CUSTOMER)).order_by(Project.created_at.desc()),
+        "ix_projects_customer_id_created_at", True,
+    ),
+    "student_assigned_projects": (
+        select(Project).where(_my_projects_filter(STUDENT)),
+        "ix_projects_assignee_id", False,
+    ),
+    "project_tasks": (
+        select(Task).where(Task.project_id.in_([1, 2])).order_by(Task.order, Task.id),
+        "ix_tasks_project_id_order", False,
+    ),
+    "assignee_tasks": (
+        select(Task.project_id).where(Task.assignee_id == STUDENT.id),
+        "ix_tasks_assignee_id", False,
+    ),
+    "student_applications": (
+        select(Application).where(Application.student_id == STUDENT.id).order_by(Application.created_at.desc()),
+        "ix_applications_student_id_created_at", True,
+    ),
+    "application_exists": (
+        select(Application).where(Application.project_id == 1, Application.student_id == STUDENT.id),
+        "uq_applications_project_id_student_id", False,
+    ),
+    "user_ratings": (
+        select(Rating).where(Rating.reviewee_id == STUDENT.id).order_by(Rating.created_at.desc()).limit(20),
+        "ix_ratings_reviewee_id_created_at", True,
+    ),
+    "rating_exists": (
+        select(Rating).where(Rating.project_id == 1, Rating.reviewer_id == CUSTOMER.id),
+        "uq_ratings_project_id_reviewer_id", False,
+    ),
+}
+
+
+@pytest.mark.parametrize("name", HOT_QUERIES)
+async def test_hot_query_uses_index(asgi_app, name):
+    statement, index, ordered_by_index = HOT_QUERIES[name]
+    plan = await query_plan(statement)
+    assert f"USING INDEX {index}" in plan or f"USING COVERING INDEX {index}" in plan, plan
+    if ordered_by_index:
+        assert "TEMP B-TREE FOR ORDER BY" not in plan, plan
+
+
+@contextmanager
+def integrity_errors() -> Iterator[List[IntegrityError]]:
+    """Ошибки целостности, которые БД вернула внутри блока"""
+    errors: List[IntegrityError] = []
+    
+    def handle_error(context):
+        if isinstance(context.sqlalchemy_exception, IntegrityError):
+            errors.append(context.sqlalchemy_exception)
+    
+    event.listen(async_engine.sync_engine, "handle_error", handle_error)
+    try:
+        yield errors
+    finally:
+        event.remove(async_engine.sync_engine, "handle_error", handle_error)
+
+
+async def test_parallel_duplicate_application_is_400(client, customer, student):
+    """Одновременные заявки проходят проверку дубля; вторую отсекает уникальный индекс"""
+    response = await client.post("/api/v1/projects/", headers=customer, json={
+        "title": "Проект", "description": "d", "budget": 1,
+    })
+    project_id = response.json()["id"]
+    await client.post(f"/api/v1/projects/{project_id}/publish", headers=customer)
+    
+    with integrity_errors() as errors:
+        responses = await asyncio.gather(*(
+            client.post(f"/api/v1/projects/{project_id}/apply", headers=student, json={"project_id": project_id})
+            for _ in range(8)
+        ))
+    
+    assert sorted(response.status_code for response in responses) == [201] + [400] * 7
+    assert errors, "ни один запрос не дошёл до уникального индекса"
+    async with async_session_maker() as db:
+        count = await db.scalar(select(func.count()).where(Application.project_id == project_id))
+    assert count == 1
+
+
+async def test_parallel_duplicate_rating_is_400(client, customer, student):
+    student_id = (await client.get("/api/v1/users/me", headers=student)).json()["id"]
+    project_id = await complete_project(client, customer, student, student_id)
+    
+    with integrity_errors() as errors:
+        responses = await asyncio.gather(*(
+            client.post("/api/v1/ratings/", headers=customer, json={
+                "project_id": project_id, "reviewee_id": student_id, "score": 5,
+            })
+            for _ in range(8)
+        ))
+    
+    assert sorted(response.status_code for response in responses) == [201] + [400] * 7
+    assert errors, "ни один запрос не дошёл до уникального индекса"
+    response = await client.get(f"/api/v1/ratings/user/{student_id}/summary")
+    assert response.json()["ratings_count"] == 1
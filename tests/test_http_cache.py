@@ -0,0 +1,105 @@
+"""
+Условные GET (ETag / Last-Modified / 304) проектов, профилей и отзывов
+"""
+import pytest
+
+from app.models.user import UserRole
+from tests.test_ratings import complete_project
+
+
+pytestmark = pytest.mark.asyncio
+
+
+async def get_cached(client, path: str, **headers):
+    """GET с заголовками; ответ и его ETag"""
+    response = await client.get(path, headers=headers)
+    assert response.status_code in (200, 304), response.text
+    return response, response.headers["etag"]
+
+
+async def assert_not_modified(client, path: str, etag: str, last_modified: str = None) -> None:
+    response = await client.get(path, headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == etag
+    # Слабое сравнение и список кандидатов
+    response = await client.get(path, headers={"If-None-Match": f'W/"stale", {etag.removeprefix("W/")}'})
+    assert response.status_code == 304
+    if last_modified is not None:
+        response = await client.get(path, headers={"If-Modified-Since": last_modified})
+        assert response.status_code == 304
+
+
+async def assert_changed(client, path: str, old_etag: str) -> str:
+    response = await client.get(path, headers={"If-None-Match": old_etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != old_etag
+    return response.headers["etag"]
+
+
+async def test_project_etag(client, customer, student):
+    student_id = (await client.get("/api/v1/users/me", headers=student)).json()["id"]
+    response = await client.post("/api/v1/projects/", headers=customer, json={
+        "title": "Проект", "description": "d", "budget": 1,
+    })
+    path = f"/api/v1/projects/{response.json()['id']}"
+    
+    response, etag = await get_cached(client, path)
+    assert response.status_code == 200
+    assert response.headers["cache-control"].startswith("public, max-age=")
+    await assert_not_modified(client, path, etag, response.headers["last-modified"])
+    
+    response = await client.put(path, headers=customer, json={"title": "Новое название"})
+    assert response.status_code == 200, response.text
+    etag = await assert_changed(client, path, etag)
+    assert (await client.get(path)).json()["title"] == "Новое название"
+    
+    response = await client.put(f"{path}/assign", headers=customer, json={"assignee_id": student_id})
+    assert response.status_code == 200, response.text
+    etag = await assert_changed(client, path, etag)
+    
+    # Профиль исполнителя входит в ответ: его правка меняет версию проекта
+    response = await client.put("/api/v1/users/me", headers=student, json={"first_name": "Иван"})
+    assert response.status_code == 200, response.text
+    etag = await assert_changed(client, path, etag)
+    await assert_not_modified(client, path, etag)
+
+
+async def test_user_profile_etag(client, student):
+    student_id = (await client.get("/api/v1/users/me", headers=student)).json()["id"]
+    path = f"/api/v1/users/{student_id}"
+    
+    response, etag = await get_cached(client, path)
+    await assert_not_modified(client, path, etag, response.headers["last-modified"])
+    
+    response = await client.put("/api/v1/users/me", headers=student, json={"bio": "Python-разработчик"})
+    assert response.status_code == 200, response.text
+    etag = await assert_changed(client, path, etag)
+    await assert_not_modified(client, path, etag)
+
+
+async def test_user_ratings_etag(client, register, student):
+    student_id = (await client.get("/api/v1/users/me", headers=student)).json()["id"]
+    path = f"/api/v1/ratings/user/{student_id}"
+    customers = [await register(f"customer{index}@test.ru", UserRole.CUSTOMER) for index in range(2)]
+    project_ids = [await complete_project(client, customer, student, student_id) for customer in customers]
+    
+    # Отзывов ещё нет: ETag есть, Last-Modified — нет
+    response, etag = await get_cached(client, path)
+    assert response.json() == []
+    assert "last-modified" not in response.headers
+    await assert_not_modified(client, path, etag)
+    
+    for customer, project_id in zip(customers, project_ids):
+        response = await client.post("/api/v1/ratings/", headers=customer, json={
+            "project_id": project_id, "reviewee_id": student_id, "score": 5,
+        })
+        assert response.status_code == 201, response.text
+        etag = await assert_changed(client, path, etag)
+        await assert_not_modified(client, path, etag)
+    
+    response, _ = await get_cached(client, path)
+    assert len(response.json()) == 2
+    # Страница входит в версию: у другой страницы свой ETag
+    _, other_page_etag = await get_cached(client, f"{path}?limit=1")
+    assert other_page_etag != etag
@@ -0,0 +1,307 @@
+"""
+Фоновые задачи LLM: постановка в очередь и исполнители
+
+Воркеры приложения выключены (JOBS_CONCURRENCY=0), поэтому поставленная
+задача остаётся в очереди. Тесты исполнителя запускают свой JobQueue
+с fake_llm_server.py (через ASGI-транспорт) или с ScriptedLLM и
+захватывают задачи напрямую, без ожидания опроса.
+"""
+import asyncio
+from datetime import datetime, timedelta
+
+import httpx
+import pytest
+import pytest_asyncio
+from sqlalchemy import update
+from sqlalchemy.dialects import postgresql
+
+import fake_llm_server
+from app.core.database import async_session_maker
+from app.core.http_client import OutboundClient
+from app.models.job import Job, JobStatus
+from app.models.project import Project
+from app.services.jobs import JobQueue, backoff_delay
+from app.services.llm import LLMClient, LLMError
+from app.services.llm_cache import LLMCache
+
+
+pytestmark = pytest.mark.asyncio
+
+
+async def create_project(client, customer: dict) -> int:
+    response = await client.post("/api/v1/projects/", headers=customer, json={
+        "title": "Проект", "description": "d", "budget": 1,
+    })
+    assert response.status_code == 201, response.text
+    return response.json()["id"]
+
+
+async def enqueue(client, headers: dict, project_id: int, expected: int = 202, **fields) -> dict:
+    response = await client.post("/api/v1/jobs/", headers=headers, json={
+        "kind": "generate_spec", "project_id": project_id, **fields,
+    })
+    assert response.status_code == expected, response.text
+    return response.json()
+
+
+async def test_bypass_cache_not_served_by_cached_job(client, customer):
+    """Запрос в обход кэша не получает активную задачу, которая может ответить из кэша"""
+    project_id = await create_project(client, customer)
+    
+    cached = await enqueue(client, customer, project_id)
+    fresh = await enqueue(client, customer, project_id, bypass_cache=True)
+    assert fresh["id"] != cached["id"]
+    
+    # Задача в обход кэша уже есть: повторы переиспользуют её
+    assert (await enqueue(client, customer, project_id, bypass_cache=True))["id"] == fresh["id"]
+
+
+async def test_plain_request_reuses_bypass_job(client, customer):
+    """Свежий ответ подходит и обычному запросу: вторая задача не создаётся"""
+    project_id = await create_project(client, customer)
+    
+    fresh = await enqueue(client, customer, project_id, bypass_cache=True)
+    assert (await enqueue(client, customer, project_id))["id"] == fresh["id"]
+
+
+async def test_idempotency_key_with_other_bypass_cache(client, customer):
+    """Idempotency-Key, повторённый с другим bypass_cache, — это другой запрос"""
+    project_id = await create_project(client, customer)
+    headers = {**customer, "Idempotency-Key": "spec-1"}
+    
+    job = await enqueue(client, headers, project_id)
+    assert (await enqueue(client, headers, project_id))["id"] == job["id"]
+    
+    error = await enqueue(client, headers, project_id, expected=400, bypass_cache=True)
+    assert error["detail"] == "Idempotency-Key уже использован для другой задачи"
+
+
+class ScriptedLLM(LLMClient):
+    """LLMClient без сети: отвечает по очереди заданными текстами или ошибками"""
+    
+    def __init__(self, *replies):
+        super().__init__(http=None, base_url="http://llm.test/v1", api_key="test", model="test", timeout=1)
+        self.replies = list(replies)
+        self.calls = 0
+    
+    async def complete(self, messages):
+        self.calls += 1
+        reply = self.replies.pop(0)
+        if isinstance(reply, Exception):
+            raise reply
+        return reply
+
+
+def make_queue(client: LLMClient, lease: float = 600) -> JobQueue:
+    # Кэш LLM выключен: каждая попытка доходит до клиента
+    return JobQueue(
+        client,
+        LLMCache(ttl=0, max_entries=100, prune_interval=60),
+        concurrency=1,
+        poll_interval=0.05,
+        lease=lease,
+        backoff_base=5,
+        backoff_max=600,
+    )
+
+
+@pytest_asyncio.fixture
+async def fake_llm(monkeypatch) -> LLMClient:
+    """LLMClient, который ходит в fake_llm_server.py через ASGI-транспорт"""
+    monkeypatch.setenv("FAKE_LLM_FAILURE_RATE", "0")
+    http = OutboundClient.from_settings()
+    # Вместо сети — приложение фейкового сервера в том же процессе
+    http._client = httpx.AsyncClient(transport=httpx.ASGITransport(app=fake_llm_server.app))
+    yield LLMClient(http, "http://fake-llm/v1", "fake", "fake-model", timeout=5)
+    await http.stop()
+
+
+async def load_job(job_id: int) -> Job:
+    async with async_session_maker() as db:
+        return await db.get(Job, job_id)
+
+
+async def update_job(job_id: int, **values) -> None:
+    async with async_session_maker() as db:
+        await db.execute(update(Job).where(Job.id == job_id).values(**values))
+        await db.commit()
+
+
+async def test_worker_writes_result_to_project(client, customer, fake_llm):
+    """Исполнитель берёт задачи из очереди и записывает ответы LLM в проект"""
+    project_id = await create_project(client, customer)
+    spec = await enqueue(client, customer, project_id)
+    estimate = await enqueue(client, customer, project_id, kind="estimate")
+    
+    queue = make_queue(fake_llm)
+    queue.start()
+    try:
+        async with asyncio.timeout(5):
+            while queue.succeeded < 2:
+                await asyncio.sleep(0.02)
+    finally:
+        await queue.stop()
+    
+    for job in (spec, estimate):
+        response = await client.get(f"/api/v1/jobs/{job['id']}", headers=customer)
+        assert response.json()["status"] == "succeeded"
+        assert response.json()["attempts"] == 1
+    
+    project = (await client.get(f"/api/v1/projects/{project_id}")).json()
+    assert project["generated_spec"].startswith("# Название: Проект")
+    assert project["llm_estimation"].startswith("# Название: Проект")
+    # Оценка сверяется с бюджетом: промпт и ответ отличаются от ТЗ
+    assert project["generated_spec"] != project["llm_estimation"]
+
+
+async def test_claim_takes_each_job_once(client, customer):
+    """Параллельные захваты не получают одну задачу дважды; отложенная не захватывается"""
+    jobs = [await enqueue(client, customer, await create_project(client, customer)) for _ in range(3)]
+    await update_job(jobs[2]["id"], run_after=datetime.utcnow() + timedelta(hours=1))
+    queue = make_queue(ScriptedLLM())
+    
+    claimed = await asyncio.gather(*(queue._claim() for _ in range(4)))
+    claimed_ids = sorted(job.id for job in claimed if job is not None)
+    assert claimed_ids == [jobs[0]["id"], jobs[1]["id"]]
+    for job_id in claimed_ids:
+        job = await load_job(job_id)
+        assert (job.status, job.attempts) == (JobStatus.RUNNING, 1)
+        assert job.locked_at is not None
+
+
+async def test_claim_skips_locked_rows_on_postgres():
+    """В PostgreSQL параллельные исполнители пропускают строки, захваченные другими"""
+    statement = make_queue(ScriptedLLM())._claim_statement(datetime.utcnow())
+    sql = str(statement.compile(dialect=postgresql.dialect()))
+    assert "FOR UPDATE SKIP LOCKED" in sql
+    assert "RETURNING" in sql
+
+
+async def test_retry_uses_backoff_and_retry_after(client, customer):
+    """Временная ошибка возвращает задачу в очередь с задержкой, не меньшей Retry-After"""
+    project_id = await create_project(client, customer)
+    job_id = (await enqueue(client, customer, project_id))["id"]
+    llm = ScriptedLLM(
+        LLMError("LLM ответил 429", retry_after=120),
+        LLMError("LLM ответил 503"),
+        "# ТЗ",
+    )
+    queue = make_queue(llm)
+    
+    started = datetime.utcnow()
+    await queue.run_job(await queue._claim())
+    job = await load_job(job_id)
+    assert (job.status, job.attempts, job.locked_at) == (JobStatus.PENDING, 1, None)
+    assert job.last_error == "LLM ответил 429"
+    # Retry-After больше экспоненциальной задержки (5 с на первой попытке)
+    assert job.run_after >= started + timedelta(seconds=120)
+    assert await queue._claim() is None
+    
+    await update_job(job_id, run_after=datetime.utcnow())
+    started = datetime.utcnow()
+    await queue.run_job(await queue._claim())
+    job = await load_job(job_id)
+    assert job.attempts == 2
+    # Вторая попытка: 10 с, из них случайна половина
+    assert started + timedelta(seconds=5) <= job.run_after <= datetime.utcnow() + timedelta(seconds=10)
+    
+    await update_job(job_id, run_after=datetime.utcnow())
+    await queue.run_job(await queue._claim())
+    job = await load_job(job_id)
+    assert (job.status, job.attempts, job.last_error) == (JobStatus.SUCCEEDED, 3, None)
+    assert (queue.retried, queue.succeeded) == (2, 1)
+
+
+async def test_backoff_delay_bounds():
+    for attempts, full in ((1, 5), (2, 10), (4, 40), (20, 600)):
+        for _ in range(20):
+            assert full / 2 <= backoff_delay(attempts, 5, 600) <= full
+
+
+async def test_fails_after_max_attempts(client, customer):
+    """После max_attempts временных ошибок задача завершается неудачей"""
+    project_id = await create_project(client, customer)
+    job_id = (await enqueue(client, customer, project_id))["id"]
+    await update_job(job_id, max_attempts=2)
+    queue = make_queue(ScriptedLLM(LLMError("LLM ответил 503"), LLMError("LLM ответил 502")))
+    
+    for _ in range(2):
+        await update_job(job_id, run_after=datetime.utcnow())
+        await queue.run_job(await queue._claim())
+    
+    job = await load_job(job_id)
+    assert (job.status, job.attempts, job.last_error) == (JobStatus.FAILED, 2, "LLM ответил 502")
+    assert job.finished_at is not None
+    assert (queue.retried, queue.failed) == (1, 1)
+    assert await queue._claim() is None
+
+
+async def test_permanent_error_fails_at_once(client, customer):
+    project_id = await create_project(client, customer)
+    job_id = (await enqueue(client, customer, project_id))["id"]
+    queue = make_queue(ScriptedLLM(LLMError("LLM отклонил запрос: 400", retryable=False)))
+    
+    await queue.run_job(await queue._claim())
+    job = await load_job(job_id)
+    assert (job.status, job.attempts) == (JobStatus.FAILED, 1)
+
+
+async def test_fake_server_overload_is_retried_after_its_pause(client, customer, fake_llm, monkeypatch):
+    """503 с Retry-After от сервера LLM — временная ошибка с паузой из заголовка"""
+    monkeypatch.setenv("FAKE_LLM_FAILURE_RATE", "1")
+    with pytest.raises(LLMError) as error:
+        await fake_llm.complete([{"role": "user", "content": "Проект"}])
+    assert (error.value.retryable, error.value.retry_after) == (True, 1.0)
+    
+    project_id = await create_project(client, customer)
+    job_id = (await enqueue(client, customer, project_id))["id"]
+    queue = make_queue(fake_llm)
+    await queue.run_job(await queue._claim())
+    job = await load_job(job_id)
+    assert (job.status, job.last_error) == (JobStatus.PENDING, "LLM ответил 503")
+
+
+async def test_lease_reclaim_after_crash(client, customer):
+    """Задачу упавшего исполнителя перезахватывают после аренды, его итог отбрасывается"""
+    project_id = await create_project(client, customer)
+    job_id = (await enqueue(client, customer, project_id))["id"]
+    queue = make_queue(ScriptedLLM("# ТЗ упавшего", "# ТЗ"), lease=60)
+    
+    crashed = await queue._claim()
+    # Аренда не истекла: задача занята
+    assert await queue._claim() is None
+    
+    await update_job(job_id, locked_at=datetime.utcnow() - timedelta(seconds=61))
+    reclaimed = await queue._claim()
+    assert (reclaimed.id, reclaimed.attempts) == (job_id, 2)
+    
+    # «Упавший» исполнитель очнулся: задача уже не его, проект не меняется
+    await queue.run_job(crashed)
+    async with async_session_maker() as db:
+        assert (await db.get(Project, project_id)).generated_spec is None
+    
+    await queue.run_job(reclaimed)
+    job = await load_job(job_id)
+    assert (job.status, job.attempts) == (JobStatus.SUCCEEDED, 2)
+    async with async_session_maker() as db:
+        assert (await db.get(Project, project_id)).generated_spec == "# ТЗ"
+    assert queue.succeeded == 1
+
+
+async def test_crashes_exhaust_attempts(client, customer):
+    """Задача, на которой исполнители раз за разом падают, не перезахватывается вечно"""
+    project_id = await create_project(client, customer)
+    job_id = (await enqueue(client, customer, project_id))["id"]
+    await update_job(job_id, max_attempts=2)
+    llm = ScriptedLLM()
+    queue = make_queue(llm, lease=60)
+    
+    # Две попытки оборвались вместе с процессом, третья превышает max_attempts
+    for _ in range(2):
+        assert await queue._claim() is not None
+        await update_job(job_id, locked_at=datetime.utcnow() - timedelta(seconds=61))
+    await queue.run_job(await queue._claim())
+    
+    job = await load_job(job_id)
+    assert (job.status, job.last_error) == (JobStatus.FAILED, "Превышено число попыток")
+    assert llm.calls == 0
@@ -0,0 +1,126 @@
+"""
+Кэш ответов LLM (app/services/llm_cache.py)
+"""
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select, update
+
+from app.core.database import async_session_maker
+from app.models.llm_cache import LLMCacheEntry
+from app.services.llm_cache import LLMCache, cache_key, llm_cache_evictions, llm_cache_requests
+
+
+pytestmark = pytest.mark.asyncio
+
+NAMESPACE = "generate_spec:test-model:v1"
+
+FIELDS = {
+    "title": "Интернет-магазин",
+    "description": "Каталог товаров и корзина",
+    "requirements": "",
+    "tech_stack": ["React", "Python"],
+}
+
+
+def make_cache(max_entries: int = 100) -> LLMCache:
+    # Очистка только явным вызовом prune()
+    return LLMCache(ttl=3600, max_entries=max_entries, prune_interval=3600)
+
+
+async def test_cache_key_ignores_case_whitespace_and_stack_order():
+    variants = [
+        FIELDS,
+        {**FIELDS, "title": "  интернет-МАГАЗИН "},
+        {**FIELDS, "description": "Каталог  товаров\nи\tкорзина"},
+        {**FIELDS, "tech_stack": ["python", "react", "React"]},
+        {**FIELDS, "requirements": None},
+    ]
+    assert {cache_key(NAMESPACE, fields) for fields in variants} == {cache_key(NAMESPACE, FIELDS)}
+    
+    # Другой вход, вид задачи, модель или версия промпта — другой ключ
+    assert cache_key(NAMESPACE, {**FIELDS, "title": "Блог"}) != cache_key(NAMESPACE, FIELDS)
+    assert cache_key(NAMESPACE, {**FIELDS, "tech_stack": ["React"]}) != cache_key(NAMESPACE, FIELDS)
+    for namespace in ("estimate:test-model:v1", "generate_spec:other-model:v1", "generate_spec:test-model:v2"):
+        assert cache_key(namespace, FIELDS) != cache_key(NAMESPACE, FIELDS)
+
+
+def requests_total(result: str) -> float:
+    return llm_cache_requests._values.get((NAMESPACE, result), 0)
+
+
+async def test_get_set_and_counters(asgi_app):
+    cache = make_cache()
+    key = cache_key(NAMESPACE, FIELDS)
+    before = {result: requests_total(result) for result in ("hit", "miss", "bypass")}
+    
+    assert await cache.get(NAMESPACE, key) is None
+    await cache.set(NAMESPACE, key, "# ТЗ")
+    normalized_key = cache_key(NAMESPACE, {**FIELDS, "title": "ИНТЕРНЕТ-магазин"})
+    assert await cache.get(NAMESPACE, normalized_key) == "# ТЗ"
+    assert await cache.get("estimate:test-model:v1", cache_key("estimate:test-model:v1", FIELDS)) is None
+    cache.record_bypass(NAMESPACE)
+    
+    assert cache.stats() == {
+        "enabled": True, "hits": 1, "misses": 2, "bypassed": 1, "stored": 1, "evicted": 0,
+    }
+    # Промах в другом пространстве имён считается под своей меткой
+    assert {result: requests_total(result) - before[result] for result in before} == {
+        "hit": 1, "miss": 1, "bypass": 1,
+    }
+    async with async_session_maker() as db:
+        entry = await db.get(LLMCacheEntry, key)
+    assert (entry.namespace, entry.hits) == (NAMESPACE, 1)
+
+
+async def test_expired_entry_misses(asgi_app):
+    cache = make_cache()
+    key = cache_key(NAMESPACE, FIELDS)
+    await cache.set(NAMESPACE, key, "# ТЗ")
+    async with async_session_maker() as db:
+        await db.execute(
+            update(LLMCacheEntry).values(expires_at=datetime.utcnow() - timedelta(seconds=1))
+        )
+        await db.commit()
+    
+    assert await cache.get(NAMESPACE, key) is None
+    assert (cache.hits, cache.misses) == (0, 1)
+    
+    assert await cache.prune() == 1
+    async with async_session_maker() as db:
+        assert await db.get(LLMCacheEntry, key) is None
+
+
+async def test_prune_evicts_least_recently_used(asgi_app):
+    cache = make_cache(max_entries=3)
+    keys = [cache_key(NAMESPACE, {**FIELDS, "title": f"Проект {index}"}) for index in range(5)]
+    for key in keys:
+        await cache.set(NAMESPACE, key, key)
+    
+    # Давно созданные, но недавно прочитанные записи остаются
+    started = datetime.utcnow() - timedelta(hours=1)
+    async with async_session_maker() as db:
+        for index, key in enumerate(keys):
+            await db.execute(
+                update(LLMCacheEntry)
+                .where(LLMCacheEntry.key == key)
+                .values(last_used_at=started + timedelta(minutes=index))
+            )
+        await db.commit()
+    assert await cache.get(NAMESPACE, keys[0]) == keys[0]
+    
+    evicted_before = llm_cache_evictions._values.get(("size",), 0)
+    assert await cache.prune() == 2
+    assert llm_cache_evictions._values[("size",)] - evicted_before == 2
+    async with async_session_maker() as db:
+        remaining = set((await db.execute(select(LLMCacheEntry.key))).scalars())
+    assert remaining == {keys[0], keys[3], keys[4]}
+    assert cache.stats()["evicted"] == 2
+
+
+async def test_disabled_cache(asgi_app):
+    cache = LLMCache(ttl=0, max_entries=100, prune_interval=3600)
+    key = cache_key(NAMESPACE, FIELDS)
+    await cache.set(NAMESPACE, key, "# ТЗ")
+    assert await cache.get(NAMESPACE, key) is None
+    assert (cache.stored, cache.misses) == (0, 0)
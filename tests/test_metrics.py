@@ -0,0 +1,58 @@
+"""
+Экспорт метрик Prometheus (/metrics)
+"""
+import re
+from typing import Dict, List, Tuple
+
+import pytest
+
+from app.core.database import PoolStats
+
+
+pytestmark = pytest.mark.asyncio
+
+SAMPLE = re.compile(r'^(\w+)(?:\{(.*)\})? (\S+)$')
+
+
+def parse_metrics(text: str) -> Tuple[Dict[str, str], List[Tuple[str, Dict[str, str], float]]]:
+    """Типы семейств и сэмплы из текстового формата Prometheus"""
+    types, samples = {}, []
+    for line in text.splitlines():
+        if line.startswith("# TYPE "):
+            _, _, name, metric_type = line.split()
+            types[name] = metric_type
+        elif line and not line.startswith("#"):
+            name, labels, value = SAMPLE.match(line).groups()
+            samples.append((name, dict(re.findall(r'(\w+)="([^"]*)"', labels or "")), float(value)))
+    return types, samples
+
+
+async def test_totals_are_exported_as_counters(client, student):
+    # Регистрация и вход прошли через пул хеширования паролей
+    response = await client.get("/metrics")
+    assert response.status_code == 200
+    types, samples = parse_metrics(response.text)
+    
+    for name, metric_type in types.items():
+        # rate() и increase() корректны только для counter с суффиксом _total
+        assert (metric_type == "counter") == name.endswith("_total"), name
+    
+    def labels_of(family: str, label: str) -> set:
+        return {labels[label] for name, labels, _ in samples if name == family}
+    
+    assert types["password_hash_pool"] == "gauge"
+    assert labels_of("password_hash_pool", "state") == {"in_flight", "queued"}
+    assert labels_of("password_hash_pool_jobs_total", "result") == {"completed", "failed", "rejected"}
+    completed = [
+        value for name, labels, value in samples
+        if name == "password_hash_pool_jobs_total" and labels["result"] == "completed"
+    ]
+    assert completed[0] >= 2
+    
+    assert labels_of("auth_cache_size", "cache") == {"tokens", "users"}
+    assert labels_of("auth_cache_requests_total", "result") == {"hit", "miss"}
+    
+    db_pool_stats = labels_of("db_pool", "stat")
+    assert "waiting" in db_pool_stats
+    assert not db_pool_stats & set(PoolStats.COUNTERS)
+    assert labels_of("db_pool_events_total", "event") == set(PoolStats.COUNTERS)
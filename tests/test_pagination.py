@@ -0,0 +1,126 @@
+"""
+Keyset-пагинация лент проектов и студентов
+"""
+import base64
+from datetime import datetime
+from typing import List, Tuple
+
+import pytest
+from sqlalchemy import event
+
+from app.core.database import async_engine, async_session_maker
+from app.core.pagination import NEXT_CURSOR_HEADER, decode_cursor, encode_cursor
+from app.models.user import UserRole
+
+
+pytestmark = pytest.mark.asyncio
+
+
+def raw_cursor(payload: str) -> str:
+    return base64.urlsafe_b64encode(payload.encode()).rstrip(b"=").decode()
+
+
+async def test_cursor_round_trip():
+    created_at = datetime(2026, 10, 18, 12, 30, 0, 123456)
+    assert decode_cursor(encode_cursor(created_at, 7), (datetime, int)) == [created_at, 7]
+    assert decode_cursor(encode_cursor(4.5, 7), (float, int)) == [4.5, 7]
+    # Целый рейтинг в JSON — int, но слот float
+    assert decode_cursor(raw_cursor("[5,7]"), (float, int)) == [5.0, 7]
+
+
+@pytest.mark.parametrize("payload", [
+    '[{"dt":5},1]',
+    '[{"dt":"вчера"},1]',
+    '[{"dt":"2026-10-18T12:00:00+03:00"},1]',
+    '[{"dt":"2026-10-18T12:00:00","x":1},1]',
+    '["2026-10-18T12:00:00",1]',
+    '[{"dt":"2026-10-18T12:00:00"},"1"]',
+    '[{"dt":"2026-10-18T12:00:00"},true]',
+    '[{"dt":"2026-10-18T12:00:00"},1.5]',
+    '[{"dt":"2026-10-18T12:00:00"}]',
+    '{"dt":"2026-10-18T12:00:00"}',
+])
+async def test_project_cursor_rejected(client, payload):
+    response = await client.get("/api/v1/projects/", params={"cursor": raw_cursor(payload)})
+    assert response.status_code == 400, response.text
+    assert response.json()["detail"] == "Некорректный курсор пагинации"
+
+
+@pytest.mark.parametrize("cursor", [
+    raw_cursor('["4.5",1]'),
+    raw_cursor('[NaN,1]'),
+    raw_cursor('[Infinity,1]'),
+    raw_cursor('[null,1]'),
+    raw_cursor('[4.5,{"dt":"2026-10-18T12:00:00"}]'),
+    "не base64",
+    raw_cursor("не json"),
+])
+async def test_student_cursor_rejected(client, customer, cursor):
+    response = await client.get("/api/v1/users/", headers=customer, params={"cursor": cursor})
+    assert response.status_code == 400, response.text
+    assert response.json()["detail"] == "Некорректный курсор пагинации"
+
+
+async def test_cursor_pages_match_offset(client, customer, register):
+    """Листание курсором даёт те же строки, что и skip, без пропусков и повторов"""
+    for index in range(7):
+        response = await client.post("/api/v1/projects/", headers=customer, json={
+            "title": f"Проект {index}", "description": "d", "budget": 1,
+        })
+        await client.post(f"/api/v1/projects/{response.json()['id']}/publish", headers=customer)
+    for index in range(5):
+        await register(f"student{index}@test.ru", UserRole.STUDENT)
+    
+    for path, headers in (("/api/v1/projects/", None), ("/api/v1/users/", customer)):
+        expected = [item["id"] for item in (await client.get(path, headers=headers, params={"limit": 100})).json()]
+        pages, cursor = [], None
+        while True:
+            params = {"limit": 3, **({"cursor": cursor} if cursor else {})}
+            response = await client.get(path, headers=headers, params=params)
+            assert response.status_code == 200, response.text
+            pages.extend(item["id"] for item in response.json())
+            cursor = response.headers.get(NEXT_CURSOR_HEADER)
+            if cursor is None:
+                break
+        assert pages == expected and len(expected) >= 5
+
+
+@pytest.mark.parametrize("path, cursor, index_range", [
+    (
+        "/api/v1/projects/",
+        encode_cursor(datetime(2026, 10, 18, 12, 0), 100),
+        "ix_projects_status_created_at (status=? AND created_at<?)",
+    ),
+    (
+        "/api/v1/users/",
+        encode_cursor(4.5, 100),
+        "ix_users_role_active_rating (role=? AND is_active=? AND rating_score<?)",
+    ),
+])
+async def test_cursor_page_seeks_index(client, customer, path, cursor, index_range):
+    """
+    Страница по курсору начинается с поиска по индексу, а не с его начала
+    
+    План строится для того же SQL и тех же параметров, что отправил
+    endpoint: с литералами вместо параметров SQLite выбирает другой план.
+    """
+    statements: List[Tuple[str, tuple]] = []
+    
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if "ORDER BY" in statement:
+            statements.append((statement, parameters))
+    
+    event.listen(async_engine.sync_engine, "before_cursor_execute", capture)
+    try:
+        response = await client.get(path, headers=customer, params={"cursor": cursor})
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", capture)
+    assert response.status_code == 200, response.text
+    
+    [(statement, parameters)] = statements
+    async with async_session_maker() as db:
+        conn = await db.connection()
+        plan = " | ".join(
+            row[-1] for row in await conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)
+        )
+    assert index_range in plan
@@ -0,0 +1,226 @@
+"""
+Бюджеты SQL-запросов endpoint'ов (QueryBudget)
+
+Сценарий проходит по всем маршрутам с бюджетом в режиме
+QUERY_BUDGET_MODE=raise: N+1 или лишний перезапрос роняет тест
+исключением QueryBudgetExceeded.
+"""
+import asyncio
+from typing import List, Optional, Set, Tuple
+from urllib.parse import urlencode
+
+import httpx
+import pytest
+from fastapi import Depends, FastAPI
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api import api_router
+from app.core.database import get_db
+from app.core.metrics import MetricsMiddleware
+from app.core.query_budget import QueryBudget, QueryBudgetExceeded
+from app.models.user import UserRole
+
+
+pytestmark = pytest.mark.asyncio
+
+API = "/api/v1"
+
+
+def budgeted_routes() -> Set[Tuple[str, str]]:
+    """Маршруты api_router, у которых объявлен QueryBudget"""
+    routes = set()
+    for route in api_router.routes:
+        if not any(isinstance(dependency.call, QueryBudget) for dependency in route.dependant.dependencies):
+            continue
+        for method in getattr(route, "methods", None) or ("WEBSOCKET",):
+            routes.add((method, API + route.path))
+    return routes
+
+
+def _scope(scope_type: str, path: str, params: dict, headers: dict) -> dict:
+    return {
+        "type": scope_type,
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "scheme": "ws" if scope_type == "websocket" else "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": urlencode(params).encode(),
+        "root_path": "",
+        "headers": [(b"host", b"test")] + [
+            (name.lower().encode(), value.encode()) for name, value in headers.items()
+        ],
+        "client": ("test", 1),
+        "server": ("test", 80),
+        "subprotocols": [],
+    }
+
+
+async def open_event_stream(app, headers: dict) -> Tuple[int, bytes]:
+    """
+    Открыть SSE-поток и отключиться после первой порции
+    
+    httpx.ASGITransport ждёт конца тела ответа, а поток бесконечен.
+    """
+    scope = {**_scope("http", f"{API}/events/stream", {"topics": "projects"}, headers), "method": "GET"}
+    sent: List[dict] = []
+    disconnected = asyncio.Event()
+    request_read = False
+    
+    async def receive():
+        nonlocal request_read
+        if not request_read:
+            request_read = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await disconnected.wait()
+        return {"type": "http.disconnect"}
+    
+    async def send(message):
+        sent.append(message)
+        if message["type"] == "http.response.body" and message.get("body"):
+            disconnected.set()
+    
+    await asyncio.wait_for(app(scope, receive, send), timeout=5)
+    return sent[0]["status"], sent[1]["body"]
+
+
+async def open_event_websocket(app, access_token: str) -> Optional[dict]:
+    """Подключиться к /events/ws и сразу отключиться; вернуть ответ на рукопожатие"""
+    scope = _scope("websocket", f"{API}/events/ws", {"access_token": access_token}, {})
+    sent: List[dict] = []
+    accepted = asyncio.Event()
+    connected = False
+    
+    async def receive():
+        nonlocal connected
+        if not connected:
+            connected = True
+            return {"type": "websocket.connect"}
+        await accepted.wait()
+        return {"type": "websocket.disconnect", "code": 1000}
+    
+    async def send(message):
+        sent.append(message)
+        accepted.set()
+    
+    await asyncio.wait_for(app(scope, receive, send), timeout=5)
+    return sent[0] if sent else None
+
+
+async def test_budget_exceeded_raises():
+    """Режим raise действительно роняет запрос сверх бюджета"""
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware)
+    
+    @app.get("/two", dependencies=[Depends(QueryBudget(1))])
+    async def two_queries(db: AsyncSession = Depends(get_db)):
+        await db.execute(text("SELECT 1"))
+        await db.execute(text("SELECT 2"))
+        return {}
+    
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        with pytest.raises(QueryBudgetExceeded, match="2 SQL statements, budget is 1"):
+            await client.get("/two")
+
+
+async def test_budgeted_endpoints(asgi_app, client, register, customer, student):
+    """Все маршруты с бюджетом укладываются в него на типичных данных"""
+    admin = await register("admin@test.ru", UserRole.ADMIN)
+    second_student = await register("student2@test.ru", UserRole.STUDENT)
+    
+    async def call(method: str, path: str, headers: Optional[dict] = None, expected: int = 200, **kwargs):
+        response = await client.request(method, API + path, headers=headers, **kwargs)
+        assert response.status_code == expected, f"{method} {path}: {response.text}"
+        return response.json() if response.headers.get("content-type") == "application/json" else None
+    
+    # Пользователи
+    await call("PUT", "/users/me", student, json={"skills": ["Python", "React"]})
+    await call("PUT", "/users/me", second_student, json={"skills": ["React"]})
+    me = await call("GET", "/users/me", student)
+    second = await call("GET", "/users/me", second_student)
+    
+    # Проекты заказчика: с задачами, исполнителями и заявками — худший случай для выборок
+    project_ids = []
+    for index in range(3):
+        project = await call("POST", "/projects/", customer, expected=201, json={
+            "title": f"React приложение {index}",
+            "description": "Сделать SPA на React",
+            "budget": 1000,
+            "tech_stack": ["React", "Python"],
+        })
+        project_ids.append(project["id"])
+        await call("POST", f"/projects/{project['id']}/publish", customer)
+    project_id = project_ids[0]
+    
+    await call("PUT", f"/projects/{project_id}", customer, json={"title": "React приложение"})
+    task = await call("POST", f"/projects/{project_id}/tasks", customer, expected=201, json={
+        "title": "Вёрстка", "description": "Страницы",
+    })
+    tasks = await call("POST", f"/projects/{project_id}/tasks:batch", customer, expected=201, json={
+        "tasks": [{"title": f"Задача {index}", "description": "d"} for index in range(3)],
+    })
+    task_ids = [task["id"]] + [item["id"] for item in tasks]
+    await call("PATCH", f"/projects/{project_id}/tasks/order", customer, json={"task_ids": task_ids[::-1]})
+    
+    application = await call("POST", f"/projects/{project_id}/apply", student, expected=201, json={
+        "project_id": project_id, "cover_letter": "Хочу",
+    })
+    await call("POST", f"/projects/{project_id}/apply", second_student, expected=201, json={
+        "project_id": project_id,
+    })
+    await call("GET", f"/projects/{project_id}/applications", customer)
+    await call("PUT", f"/projects/{project_id}/applications/{application['id']}", customer, json={
+        "status": "accepted",
+    })
+    for task_id in task_ids[:2]:
+        await call("PUT", f"/projects/{project_id}/tasks/{task_id}/assign", customer, json={
+            "assignee_id": second["id"],
+        })
+    await call("PUT", f"/projects/{project_id}/assign", customer, json={"assignee_id": me["id"]})
+    await call("GET", f"/projects/{project_ids[1]}/candidates", customer)
+    
+    # Чтение
+    for status_filter in ("open", "in_progress"):
+        await call("GET", "/projects/", params={"status": status_filter})
+        await call("GET", "/projects/summary", params={"status": status_filter})
+    await call("GET", "/projects/", params={"tech": ["React", "Python"], "tech_match": "all"})
+    await call("GET", "/projects/search", params={"q": "React"})
+    await call("GET", f"/projects/{project_id}")
+    await call("GET", "/projects/my", customer)
+    await call("GET", "/projects/my", student)
+    await call("GET", "/projects/my/summary", customer)
+    await call("GET", "/projects/applications/my", student)
+    await call("GET", "/users/", params={"skill": "React"})
+    await call("GET", f"/users/{me['id']}")
+    
+    # Завершение проекта и рейтинг
+    await call("POST", f"/projects/{project_id}/request-review", student)
+    await call("POST", f"/projects/{project_id}/complete", customer)
+    await call("POST", "/ratings/", customer, expected=201, json={
+        "project_id": project_id, "reviewee_id": me["id"], "score": 5, "quality_score": 4,
+    })
+    await call("GET", f"/ratings/user/{me['id']}")
+    await call("GET", f"/ratings/user/{me['id']}/summary")
+    await call("GET", "/users/leaderboard")
+    await call("GET", "/users/leaderboard/me", student)
+    
+    # Фоновые задачи LLM (воркеры выключены: задача остаётся в очереди)
+    job = await call("POST", "/jobs/", customer, expected=202, json={
+        "kind": "generate_spec", "project_id": project_ids[1],
+    })
+    await call("GET", f"/jobs/{job['id']}", customer)
+    
+    # Выгрузки
+    for entity in ("projects", "applications", "ratings"):
+        await call("GET", f"/exports/{entity}", admin)
+    
+    # События реального времени
+    status_code, first_chunk = await open_event_stream(asgi_app, customer)
+    assert status_code == 200 and first_chunk.startswith(b"retry:")
+    handshake = await open_event_websocket(asgi_app, student["Authorization"].split()[1])
+    assert handshake == {"type": "websocket.accept", "subprotocol": None, "headers": []}
+    
+    missing = budgeted_routes() - asgi_app.routes
+    assert not missing, f"Маршруты с бюджетом без проверки: {sorted(missing)}"
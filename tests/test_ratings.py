@@ -0,0 +1,118 @@
+"""
+Рейтинги: накопительные агрегаты при параллельных отзывах
+"""
+import asyncio
+
+import pytest
+from sqlalchemy import func, select
+
+from app.core.database import async_session_maker
+from app.models.rating import Rating, UserRatingStats
+from app.models.user import User, UserRole
+from app.services.ratings import apply_rating
+
+
+pytestmark = pytest.mark.asyncio
+
+
+async def complete_project(client, customer: dict, student: dict, student_id: int) -> int:
+    """Проект заказчика, выполненный студентом"""
+    response = await client.post("/api/v1/projects/", headers=customer, json={
+        "title": "Проект", "description": "d", "budget": 1,
+    })
+    project_id = response.json()["id"]
+    steps = [
+        ("POST", f"/projects/{project_id}/publish", customer, None),
+        ("PUT", f"/projects/{project_id}/assign", customer, {"assignee_id": student_id}),
+        ("POST", f"/projects/{project_id}/request-review", student, None),
+        ("POST", f"/projects/{project_id}/complete", customer, None),
+    ]
+    for method, path, headers, body in steps:
+        response = await client.request(method, "/api/v1" + path, headers=headers, json=body)
+        assert response.status_code == 200, f"{method} {path}: {response.text}"
+    return project_id
+
+
+async def test_parallel_ratings_aggregate(client, register, student):
+    """
+    Одновременные отзывы об одном студенте не теряют обновлений агрегатов
+    
+    Каждый отзыв прибавляется к user_rating_stats атомарным upsert
+    (INSERT ... ON CONFLICT DO UPDATE), так что итог совпадает
+    с пересчётом по таблице ratings.
+    """
+    student_id = (await client.get("/api/v1/users/me", headers=student)).json()["id"]
+    customers = [await register(f"customer{index}@test.ru", UserRole.CUSTOMER) for index in range(4)]
+    reviews = []
+    for index in range(12):
+        customer = customers[index % len(customers)]
+        project_id = await complete_project(client, customer, student, student_id)
+        reviews.append((customer, {
+            "project_id": project_id,
+            "reviewee_id": student_id,
+            "score": index % 5 + 1,
+            # Категории заполнены не у всех: считаются отдельно от общего числа отзывов
+            "quality_score": index % 5 + 1 if index % 2 else None,
+            "deadline_score": 5 if index % 3 == 0 else None,
+        }))
+    
+    async with async_session_maker() as db:
+        completed_before = await db.scalar(select(User.completed_projects).where(User.id == student_id))
+    
+    responses = await asyncio.gather(*(
+        client.post("/api/v1/ratings/", headers=customer, json=review) for customer, review in reviews
+    ))
+    assert [response.status_code for response in responses] == [201] * len(reviews)
+    
+    async with async_session_maker() as db:
+        stats = await db.get(UserRatingStats, student_id)
+        expected = (await db.execute(
+            select(
+                func.count(),
+                func.sum(Rating.score),
+                func.sum(Rating.quality_score),
+                func.count(Rating.quality_score),
+                func.sum(Rating.deadline_score),
+                func.count(Rating.deadline_score),
+            ).where(Rating.reviewee_id == student_id)
+        )).one()
+        user = await db.get(User, student_id)
+    
+    assert (
+        stats.ratings_count, stats.score_sum,
+        stats.quality_sum, stats.quality_count,
+        stats.deadline_sum, stats.deadline_count,
+    ) == tuple(expected)
+    assert stats.ratings_count == len(reviews)
+    assert stats.communication_count == 0
+    assert user.rating_score == pytest.approx(stats.score_sum / stats.ratings_count)
+    assert user.completed_projects == completed_before + len(reviews)
+    
+    response = await client.get(f"/api/v1/ratings/user/{student_id}/summary")
+    assert response.json()["ratings_count"] == len(reviews)
+
+
+async def test_parallel_apply_rating_creates_stats_once(client, student):
+    """
+    Первые отзывы о пользователе, учтённые одновременно, не конфликтуют
+    
+    Строки user_rating_stats ещё нет: каждая транзакция пытается её
+    вставить, ON CONFLICT превращает все вставки, кроме первой, в прибавление.
+    """
+    student_id = (await client.get("/api/v1/users/me", headers=student)).json()["id"]
+    scores = [index % 5 + 1 for index in range(20)]
+    
+    async def apply(score: int) -> None:
+        async with async_session_maker() as db:
+            await apply_rating(db, Rating(reviewee_id=student_id, score=score, quality_score=score))
+            await db.commit()
+    
+    await asyncio.gather(*(apply(score) for score in scores))
+    
+    async with async_session_maker() as db:
+        stats = await db.get(UserRatingStats, student_id)
+        user = await db.get(User, student_id)
+    assert (stats.ratings_count, stats.score_sum, stats.quality_sum, stats.quality_count) == (
+        len(scores), sum(scores), sum(scores), len(scores)
+    )
+    assert user.rating_score == pytest.approx(sum(scores) / len(scores))
@@ -0,0 +1,193 @@
+"""
+Кэш готовых ответов (app/core/response_cache.py)
+
+Redis-бэкенд проверяется на FakeRedis: минимальной замене клиента
+redis.asyncio с теми же GET, SET с EX и INCR.
+"""
+import asyncio
+import time
+from typing import Dict, Optional, Tuple
+
+import pytest
+
+from app.core.response_cache import (
+    CachedResponse,
+    CacheBackend,
+    MemoryCacheBackend,
+    RedisCacheBackend,
+    ResponseCache,
+    response_cache_requests,
+)
+
+
+pytestmark = pytest.mark.asyncio
+
+
+class FakeRedis:
+    """Значения в памяти с истечением по EX; значения — bytes, как у redis.asyncio"""
+    
+    def __init__(self):
+        self.values: Dict[str, Tuple[bytes, Optional[float]]] = {}
+    
+    async def get(self, key: str) -> Optional[bytes]:
+        value, expires_at = self.values.get(key, (None, None))
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self.values[key]
+            return None
+        return value
+    
+    async def set(self, key: str, value, ex: Optional[int] = None) -> bool:
+        if isinstance(value, str):
+            value = value.encode()
+        self.values[key] = (value, time.monotonic() + ex if ex is not None else None)
+        return True
+    
+    async def incr(self, key: str) -> int:
+        value = int(await self.get(key) or 0) + 1
+        _, expires_at = self.values.get(key, (None, None))
+        self.values[key] = (str(value).encode(), expires_at)
+        return value
+
+
+@pytest.fixture(params=["memory", "redis"])
+def backend(request) -> CacheBackend:
+    if request.param == "redis":
+        return RedisCacheBackend(FakeRedis())
+    return MemoryCacheBackend(max_entries=100, ttl=60)
+
+
+class Loader:
+    """loader для get_or_load: считает вызовы и ждёт разрешения завершиться"""
+    
+    def __init__(self, body: bytes = b"[]"):
+        self.body = body
+        self.calls = 0
+        self.release = asyncio.Event()
+    
+    async def __call__(self) -> CachedResponse:
+        self.calls += 1
+        await self.release.wait()
+        return CachedResponse(self.body, {"X-Next-Cursor": f"call-{self.calls}"})
+
+
+def requests_total(cache: ResponseCache, result: str) -> float:
+    return response_cache_requests._values.get((cache.name, result), 0)
+
+
+async def test_concurrent_misses_load_once(backend):
+    cache = ResponseCache("test_single_flight", backend, ttl=60)
+    loader = Loader(b'[{"id": 1}]')
+    before = {result: requests_total(cache, result) for result in ("hit", "miss", "coalesced")}
+    
+    requests = [asyncio.create_task(cache.get_or_load("open", "page", loader)) for _ in range(10)]
+    await asyncio.sleep(0)
+    loader.release.set()
+    responses = await asyncio.gather(*requests)
+    
+    assert loader.calls == 1
+    assert {(response.body, response.headers["X-Next-Cursor"]) for response in responses} == {
+        (b'[{"id": 1}]', "call-1")
+    }
+    assert requests_total(cache, "miss") - before["miss"] == 1
+    assert requests_total(cache, "coalesced") - before["coalesced"] == 9
+    
+    # Следующий запрос — попадание: ответ с заголовками прочитан из бэкенда
+    response = await cache.get_or_load("open", "page", loader)
+    assert (loader.calls, response.headers) == (1, {"X-Next-Cursor": "call-1"})
+    assert requests_total(cache, "hit") - before["hit"] == 1
+
+
+async def test_cancelled_leader_hands_off(backend):
+    """Отмена загружавшего запроса не роняет ожидающих: загрузку берёт один из них"""
+    cache = ResponseCache("test_handoff", backend, ttl=60)
+    loader = Loader()
+    
+    leader = asyncio.create_task(cache.get_or_load("open", "page", loader))
+    await asyncio.sleep(0)
+    waiters = [asyncio.create_task(cache.get_or_load("open", "page", loader)) for _ in range(5)]
+    await asyncio.sleep(0)
+    assert loader.calls == 1
+    
+    leader.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await leader
+    await asyncio.sleep(0)
+    loader.release.set()
+    responses = await asyncio.gather(*waiters)
+    
+    assert loader.calls == 2
+    assert {response.headers["X-Next-Cursor"] for response in responses} == {"call-2"}
+
+
+async def test_loader_error_is_not_cached(backend):
+    cache = ResponseCache("test_error", backend, ttl=60)
+    calls = 0
+    
+    async def failing_loader() -> CachedResponse:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0)
+        raise RuntimeError("база недоступна")
+    
+    results = await asyncio.gather(
+        *(cache.get_or_load("open", "page", failing_loader) for _ in range(3)),
+        return_exceptions=True,
+    )
+    assert calls == 1
+    assert all(isinstance(result, RuntimeError) for result in results)
+    
+    loader = Loader()
+    loader.release.set()
+    await cache.get_or_load("open", "page", loader)
+    assert loader.calls == 1
+
+
+async def test_invalidate_bumps_generation(backend):
+    cache = ResponseCache("test_generation", backend, ttl=60)
+    loader = Loader()
+    loader.release.set()
+    
+    for scope in ("open", "in_progress"):
+        await cache.get_or_load(scope, "page", loader)
+    await cache.get_or_load("open", "page", loader)
+    assert loader.calls == 2
+    
+    await cache.invalidate("open", "open")
+    assert await backend.get_generation("test_generation:open") == 1
+    assert (await cache.get_or_load("open", "page", loader)).headers == {"X-Next-Cursor": "call-3"}
+    # Другая область не затронута
+    assert (await cache.get_or_load("in_progress", "page", loader)).headers == {"X-Next-Cursor": "call-2"}
+    assert loader.calls == 3
+
+
+async def test_redis_generation_shared_between_workers():
+    """С Redis инвалидация в одном воркере сразу видна остальным"""
+    redis = FakeRedis()
+    first = ResponseCache("test_shared", RedisCacheBackend(redis), ttl=60)
+    second = ResponseCache("test_shared", RedisCacheBackend(redis), ttl=60)
+    loader = Loader()
+    loader.release.set()
+    
+    await first.get_or_load("open", "page", loader)
+    await second.get_or_load("open", "page", loader)
+    assert loader.calls == 1
+    
+    await first.invalidate("open")
+    await second.get_or_load("open", "page", loader)
+    assert loader.calls == 2
+    
+    # Ключи с префиксом и TTL из настроек кэша
+    key = "work21:cache:test_shared:open:1:page"
+    value, expires_at = redis.values[key]
+    assert CachedResponse.decode(value).headers == {"X-Next-Cursor": "call-2"}
+    assert 0 < expires_at - time.monotonic() <= 60
+    assert redis.values["work21:cache:gen:test_shared:open"][0] == b"1"
+
+
+async def test_disabled_cache_always_loads(backend):
+    cache = ResponseCache("test_disabled", backend, ttl=0)
+    loader = Loader()
+    loader.release.set()
+    for _ in range(2):
+        await cache.get_or_load("open", "page", loader)
+    assert loader.calls == 2
@@ -0,0 +1,33 @@
+"""
+Полнотекстовый поиск по проектам
+"""
+import pytest
+
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_highlight_escapes_project_text(client, customer):
+    """В подсветке из HTML только `<mark>`: разметка из названия экранирована"""
+    response = await client.post("/api/v1/projects/", headers=customer, json={
+        "title": "<img src=x onerror=alert(1)> React",
+        "description": "Вёрстка & <script>alert(2)</script>",
+        "budget": 1,
+    })
+    project_id = response.json()["id"]
+    response = await client.post(f"/api/v1/projects/{project_id}/publish", headers=customer)
+    assert response.status_code == 200, response.text
+    
+    response = await client.get("/api/v1/projects/search", params={"q": "React"})
+    assert response.status_code == 200, response.text
+    [result] = response.json()
+    assert result["id"] == project_id
+    assert result["highlight"] == "&lt;img src=x onerror=alert(1)&gt; <mark>React</mark>"
+    # Сами поля проекта отдаются как есть: это не HTML
+    assert result["title"] == "<img src=x onerror=alert(1)> React"
+    
+    response = await client.get("/api/v1/projects/search", params={"q": "script"})
+    [result] = response.json()
+    assert result["highlight"] == (
+        "Вёрстка &amp; &lt;<mark>script</mark>&gt;alert(2)&lt;/<mark>script</mark>&gt;"
+    )
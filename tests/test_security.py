@@ -0,0 +1,57 @@
+"""
+Пул хеширования паролей
+"""
+import asyncio
+import threading
+
+import pytest
+
+from app.core.security import PasswordHashingBusy, PasswordHashingPool
+
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_failure_is_not_completed():
+    pool = PasswordHashingPool(workers=1, queue_size=0)
+    
+    def fail():
+        raise ValueError("bcrypt")
+    
+    with pytest.raises(ValueError):
+        await pool.run(fail)
+    assert await pool.run(lambda: "ok") == "ok"
+    
+    stats = pool.stats()
+    assert (stats["completed"], stats["failed"], stats["in_flight"]) == (1, 1, 0)
+    pool.shutdown()
+
+
+async def test_cancelled_caller_keeps_slot_until_thread_finishes():
+    """Отмена ожидающего запроса не освобождает слот, пока поток ещё хеширует"""
+    pool = PasswordHashingPool(workers=1, queue_size=0)
+    started, release = threading.Event(), threading.Event()
+    
+    def hash_password():
+        started.set()
+        release.wait(5)
+        return "hash"
+    
+    task = asyncio.create_task(pool.run(hash_password))
+    await asyncio.to_thread(started.wait, 5)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    
+    assert pool.stats()["in_flight"] == 1
+    with pytest.raises(PasswordHashingBusy):
+        await pool.run(lambda: "second")
+    
+    release.set()
+    for _ in range(100):
+        if pool.stats()["in_flight"] == 0:
+            break
+        await asyncio.sleep(0.01)
+    stats = pool.stats()
+    assert (stats["in_flight"], stats["completed"], stats["rejected"]) == (0, 1, 1)
+    pool.shutdown()
@@ -0,0 +1,132 @@
+"""
+Теги технологий и навыков: фильтры any/all и перенос из JSON-колонок
+"""
+import importlib.util
+import json
+from pathlib import Path
+
+import pytest
+from alembic.operations import Operations
+from alembic.runtime.migration import MigrationContext
+from sqlalchemy import create_engine, insert, select
+
+from app.core.database import Base
+from app.models import Project, User
+from app.models.tag import Tag, project_tags, user_skills
+from app.models.user import UserRole
+
+
+pytestmark = pytest.mark.asyncio
+
+MIGRATION = Path(__file__).resolve().parent.parent / "alembic" / "versions" / "add_tags.py"
+
+
+async def ids(client, path: str, headers=None, **params) -> set:
+    response = await client.get(path, headers=headers, params=params)
+    assert response.status_code == 200, response.text
+    return {item["id"] for item in response.json()}
+
+
+async def test_project_tech_any_and_all(client, customer):
+    projects = {}
+    for name, stack in (
+        ("fullstack", ["React", "Python"]),
+        ("frontend", ["React"]),
+        ("backend", ["Python", "Go"]),
+        ("other", ["Vue"]),
+    ):
+        response = await client.post("/api/v1/projects/", headers=customer, json={
+            "title": name, "description": "d", "budget": 1, "tech_stack": stack,
+        })
+        projects[name] = response.json()["id"]
+        await client.post(f"/api/v1/projects/{projects[name]}/publish", headers=customer)
+    
+    tech = ["react", " PYTHON "]
+    for path in ("/api/v1/projects/", "/api/v1/projects/summary"):
+        assert await ids(client, path, tech=tech) == {
+            projects["fullstack"], projects["frontend"], projects["backend"]
+        }
+        assert await ids(client, path, tech=tech, tech_match="any") == await ids(client, path, tech=tech)
+        assert await ids(client, path, tech=tech, tech_match="all") == {projects["fullstack"]}
+        # Повтор тега в фильтре не требует его дважды
+        assert await ids(client, path, tech=["React", "react"], tech_match="all") == {
+            projects["fullstack"], projects["frontend"]
+        }
+    
+    # Правка стека пересобирает связи проекта
+    response = await client.put(f"/api/v1/projects/{projects['frontend']}", headers=customer, json={
+        "tech_stack": ["Python", "React"],
+    })
+    assert response.status_code == 200, response.text
+    assert await ids(client, "/api/v1/projects/", tech=tech, tech_match="all") == {
+        projects["fullstack"], projects["frontend"]
+    }
+    response = await client.put(f"/api/v1/projects/{projects['backend']}", headers=customer, json={
+        "tech_stack": ["Go"],
+    })
+    assert await ids(client, "/api/v1/projects/", tech=tech) == {projects["fullstack"], projects["frontend"]}
+
+
+async def test_student_skills_any_and_all(client, customer, register):
+    students = {}
+    for name, skills in (("both", ["Python", "SQL"]), ("python", ["python"]), ("sql", ["SQL", "Docker"])):
+        headers = await register(f"{name}@test.ru", UserRole.STUDENT)
+        response = await client.put("/api/v1/users/me", headers=headers, json={"skills": skills})
+        students[name] = response.json()["id"]
+    
+    skill = ["Python", "sql"]
+    assert await ids(client, "/api/v1/users/", customer, skill=skill) == set(students.values())
+    assert await ids(client, "/api/v1/users/", customer, skill=skill, skill_match="all") == {students["both"]}
+    assert await ids(client, "/api/v1/users/", customer, skill=["docker"], skill_match="all") == {students["sql"]}
+
+
+def load_migration():
+    spec = importlib.util.spec_from_file_location("add_tags", MIGRATION)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+async def test_backfill_migration(tmp_path):
+    """Миграция add_tags переносит JSON-списки в связи, нормализуя теги"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'migration.db'}")
+    tag_tables = {Tag.__table__, project_tags, user_skills}
+    Base.metadata.create_all(engine, tables=[table for table in Base.metadata.sorted_tables if table not in tag_tables])
+    
+    with engine.begin() as conn:
+        conn.execute(insert(User), [
+            {"id": 1, "email": "c@test.ru", "hashed_password": "-", "first_name": "К", "last_name": "К",
+             "role": UserRole.CUSTOMER, "skills": None},
+            {"id": 2, "email": "s@test.ru", "hashed_password": "-", "first_name": "С", "last_name": "С",
+             "role": UserRole.STUDENT, "skills": json.dumps(["Python", "  python ", "SQL"])},
+            {"id": 3, "email": "b@test.ru", "hashed_password": "-", "first_name": "Б", "last_name": "Б",
+             "role": UserRole.STUDENT, "skills": "не JSON"},
+        ])
+        conn.execute(insert(Project), [
+            {"id": 1, "title": "A", "description": "d", "budget": 1, "customer_id": 1,
+             "tech_stack": json.dumps(["React", "Python", 5, ""])},
+            {"id": 2, "title": "B", "description": "d", "budget": 1, "customer_id": 1,
+             "tech_stack": json.dumps({"stack": "React"})},
+            {"id": 3, "title": "C", "description": "d", "budget": 1, "customer_id": 1, "tech_stack": None},
+        ])
+    
+    migration = load_migration()
+    with engine.begin() as conn:
+        with Operations.context(MigrationContext.configure(conn)):
+            migration.upgrade()
+    
+    with engine.connect() as conn:
+        tags = dict(conn.execute(select(Tag.slug, Tag.name)).all())
+        slug_of = dict(conn.execute(select(Tag.id, Tag.slug)).all())
+        links = {
+            "projects": {(owner, slug_of[tag]) for owner, tag in conn.execute(select(project_tags)).all()},
+            "users": {(owner, slug_of[tag]) for owner, tag in conn.execute(select(user_skills)).all()},
+        }
+    engine.dispose()
+    
+    # Первое написание тега сохраняется как имя
+    assert tags == {"react": "React", "python": "Python", "sql": "SQL"}
+    assert links == {
+        "projects": {(1, "react"), (1, "python")},
+        "users": {(2, "python"), (2, "sql")},
+    }